@@ -0,0 +1,254 @@
+# Motor de agregación de una sola pasada para las figuras del Bloque 2
+# Cada fila se resume en un código de combinación de síntomas y tratamiento
+# (3 estados por bandera: 0, 1 o nulo → 3^4 = 81 combinaciones) y, para cada
+# dimensión, un único np.bincount sobre (código de la dimensión × combinación)
+# cuenta todo a la vez. Conteos, sumas y proporciones de todas las figuras se
+# obtienen después de esos tensores sin volver a recorrer los datos.
+import numpy as np
+import pandas as pd
+
+from cubo import SINTOMAS, TRATAMIENTO, correlacion_ponderada
+
+DIMENSIONES = [
+    "programa_academico",
+    "Promedio_de_calificaciones",
+    "año_estudio",
+    "genero",
+    "estado_civil",
+]
+
+# Ejes del tensor de combinaciones, en orden
+BANDERAS = SINTOMAS + [TRATAMIENTO]
+NULO = 2
+ESTADOS = 3
+COMBINACIONES = ESTADOS ** len(BANDERAS)
+
+
+def _estado(valores):
+    """0/1 → mismo valor, nulo → NULO (2)."""
+    valores = np.asarray(valores, dtype=float)
+    return np.where(np.isnan(valores), NULO, valores).astype(np.int64)
+
+
+class Agregados:
+    """Resultado del motor: un tensor de conteos por dimensión.
+
+    `total` tiene forma (3, 3, 3, 3) y `por_dimension[dim]` (m, 3, 3, 3, 3),
+    con ejes en el orden de BANDERAS y `etiquetas[dim]` con los m valores
+    ordenados de la dimensión.
+    """
+
+    def __init__(self, total, por_dimension, etiquetas):
+        self.total = total
+        self.por_dimension = por_dimension
+        self.etiquetas = etiquetas
+
+    @staticmethod
+    def _eje(flag):
+        return BANDERAS.index(flag) + 1
+
+    def __add__(self, otro):
+        """Suma de dos resultados con las mismas etiquetas (p. ej. lo acumulado
+        más un lote nuevo)."""
+        return Agregados(
+            self.total + otro.total,
+            {dim: t + otro.por_dimension[dim] for dim, t in self.por_dimension.items()},
+            self.etiquetas,
+        )
+
+    def marginal(self, dim, flag):
+        """Conteos (m, 3) de los estados de `flag` por valor de `dim`."""
+        tensor = self.por_dimension[dim]
+        eje = self._eje(flag)
+        otros = tuple(i for i in range(1, tensor.ndim) if i != eje)
+        return tensor.sum(axis=otros)
+
+    def n_filas(self):
+        return int(self.total.sum())
+
+    def estados(self, flag):
+        """Conteos totales (3,) de `flag` = 0, 1 y nulo."""
+        eje = self._eje(flag) - 1
+        otros = tuple(i for i in range(self.total.ndim) if i != eje)
+        return self.total.sum(axis=otros)
+
+    def conteos(self, flag):
+        """Equivale a df[flag].value_counts().sort_index()."""
+        por_estado = self.estados(flag)[:NULO]
+        serie = pd.Series(por_estado, index=[0, 1], name="count").rename_axis(flag)
+        return serie[serie > 0]
+
+    def suma(self, flag):
+        """Equivale a df[flag].sum()."""
+        return self.conteos(flag).get(1, 0)
+
+    def presentes(self, dim):
+        """Valores de `dim` con al menos una fila (los grupos que vería groupby)."""
+        tensor = self.por_dimension[dim]
+        return tensor.reshape(len(tensor), -1).sum(axis=1) > 0
+
+    def suma_por(self, dim, flag):
+        """Equivale a df.groupby(dim)[flag].sum()."""
+        marg = self.marginal(dim, flag)
+        serie = pd.Series(marg[:, 1], index=self.etiquetas[dim], name=flag)
+        return serie[self.presentes(dim)]
+
+    def tamanos_por(self, dim, flag):
+        """Filas con `flag` no nulo por valor de `dim` (denominador de las medias)."""
+        marg = self.marginal(dim, flag)
+        serie = pd.Series(marg[:, 0] + marg[:, 1], index=self.etiquetas[dim], name=flag)
+        return serie[self.presentes(dim)]
+
+    def media_por(self, dim, flags):
+        """Equivale a df.groupby(dim)[flags].mean()."""
+        # rename_axis: sin grupos presentes el DataFrame vacío pierde el nombre del índice
+        return pd.DataFrame(
+            {f: self.suma_por(dim, f) / self.tamanos_por(dim, f) for f in flags}
+        ).rename_axis(dim)
+
+    def conteo_condicional(self, cond, flag=TRATAMIENTO):
+        """(casos con flag=1, casos con flag no nulo) entre las filas con cond == 1."""
+        a, b = self._eje(cond) - 1, self._eje(flag) - 1
+        otros = tuple(i for i in range(self.total.ndim) if i not in (a, b))
+        tabla = self.total.sum(axis=otros)
+        if a > b:
+            tabla = tabla.T
+        return int(tabla[1, 1]), int(tabla[1, 0] + tabla[1, 1])
+
+    def proporcion_condicional(self, cond, flag=TRATAMIENTO):
+        """Media de `flag` entre las filas con cond == 1 (0 si no hay)."""
+        si, n = self.conteo_condicional(cond, flag)
+        return si / n if n else 0
+
+
+class TablaConteos:
+    """Códigos precalculados de una tabla (normalmente el cubo) para agregar
+    subconjuntos filtrados sin volver a factorizar texto.
+
+    `agregados(mascara)` y `correlacion(mascara)` solo hacen np.bincount y
+    álgebra sobre arreglos enteros, lo que permite responder a los filtros
+    del tablero en milisegundos.
+    """
+
+    def __init__(self, datos, pesos=None, dimensiones=DIMENSIONES, numericas=None, banderas=BANDERAS):
+        self.n = len(datos)
+        # Sin banderas (p. ej. el cubo temporal) todas las filas quedan en la combinación 0
+        self.banderas = banderas
+        self.columna_pesos = pesos
+        self.pesos = None if pesos is None else datos[pesos].to_numpy(dtype=np.float64)
+        self.combo = self._combo(datos)
+
+        self.codigos, self.etiquetas = {}, {}
+        for dim in dimensiones:
+            codigos, valores = pd.factorize(datos[dim], sort=True)
+            self.codigos[dim] = codigos
+            self.etiquetas[dim] = pd.Index(np.asarray(valores), name=dim)
+
+        self.numericas = numericas or []
+        self.matriz = (
+            datos[self.numericas].to_numpy(dtype=np.float64) if self.numericas else None
+        )
+
+    def _combo(self, datos):
+        combo = np.zeros(len(datos), dtype=np.int64)
+        for flag in self.banderas:
+            combo = combo * ESTADOS + _estado(datos[flag])
+        return combo
+
+    def con_filas(self, datos):
+        """Nueva tabla con las filas de `datos` añadidas al final (la actual no
+        cambia, así los callbacks que la están usando no ven un estado a medias).
+
+        Los códigos de las filas nuevas se buscan en las etiquetas existentes;
+        solo si aparece un valor nunca visto se vuelve a factorizar esa
+        dimensión para mantener las etiquetas ordenadas. `etiquetas_nuevas`
+        indica si pasó (los Agregados anteriores dejan de ser sumables).
+        """
+        nueva = object.__new__(TablaConteos)
+        nueva.n = self.n + len(datos)
+        nueva.columna_pesos = self.columna_pesos
+        nueva.banderas = self.banderas
+        nueva.pesos = None if self.pesos is None else np.concatenate(
+            [self.pesos, datos[self.columna_pesos].to_numpy(dtype=np.float64)]
+        )
+        nueva.combo = np.concatenate([self.combo, self._combo(datos)])
+        nueva.etiquetas_nuevas = False
+
+        nueva.codigos, nueva.etiquetas = {}, {}
+        for dim, etiquetas in self.etiquetas.items():
+            valores = datos[dim]
+            codigos = etiquetas.get_indexer(valores)
+            if ((codigos < 0) & valores.notna().to_numpy()).any():
+                # Valores previos reconstruidos desde sus códigos (-1 → nulo)
+                previos = np.append(np.asarray(etiquetas, dtype=object), None)[self.codigos[dim]]
+                todos = pd.concat([pd.Series(previos), valores.astype(object)], ignore_index=True)
+                codigos, unicos = pd.factorize(todos, sort=True)
+                nueva.codigos[dim] = codigos
+                nueva.etiquetas[dim] = pd.Index(np.asarray(unicos), name=dim).infer_objects()
+                nueva.etiquetas_nuevas = True
+            else:
+                nueva.codigos[dim] = np.concatenate([self.codigos[dim], codigos])
+                nueva.etiquetas[dim] = etiquetas
+
+        nueva.numericas = self.numericas
+        nueva.matriz = None if self.matriz is None else np.vstack(
+            [self.matriz, datos[self.numericas].to_numpy(dtype=np.float64)]
+        )
+        return nueva
+
+    def mascara(self, seleccion):
+        """Máscara booleana de filas para {dimensión: valores permitidos}.
+        Una lista vacía o None en una dimensión significa "sin filtro"."""
+        mascara = np.ones(self.n, dtype=bool)
+        for dim, valores in (seleccion or {}).items():
+            if not valores:
+                continue
+            permitido = self.etiquetas[dim].isin(valores)
+            # Código -1 (valor nulo) → última posición, siempre excluida
+            permitido = np.append(permitido, False)
+            mascara &= permitido[self.codigos[dim]]
+        return mascara
+
+    def agregados(self, mascara=None):
+        sel = slice(None) if mascara is None else mascara
+        combo = self.combo[sel]
+        w = None if self.pesos is None else self.pesos[sel]
+
+        def contar(claves, tamano, pesos_validos):
+            c = np.bincount(claves, weights=pesos_validos, minlength=tamano)
+            return np.rint(c).astype(np.int64) if pesos_validos is not None else c
+
+        forma = (ESTADOS,) * len(BANDERAS)
+        total = contar(combo, COMBINACIONES, w).reshape(forma)
+
+        por_dimension = {}
+        for dim, codigos in self.codigos.items():
+            codigos = codigos[sel]
+            # Igual que groupby: las filas con la dimensión nula no cuentan
+            validos = codigos >= 0
+            claves = codigos[validos] * COMBINACIONES + combo[validos]
+            m = len(self.etiquetas[dim])
+            tensor = contar(claves, m * COMBINACIONES, None if w is None else w[validos])
+            por_dimension[dim] = tensor.reshape((m,) + forma)
+
+        return Agregados(total, por_dimension, self.etiquetas)
+
+    def total(self, mascara=None):
+        if self.pesos is None:
+            return int(self.n if mascara is None else mascara.sum())
+        return int(self.pesos.sum() if mascara is None else self.pesos[mascara].sum())
+
+    def correlacion(self, mascara=None):
+        """Correlación ponderada de las columnas numéricas del subconjunto."""
+        sel = slice(None) if mascara is None else mascara
+        w = np.ones(self.n)[sel] if self.pesos is None else self.pesos[sel]
+        return correlacion_ponderada(self.matriz[sel], w, self.numericas)
+
+
+def calcular_agregados(datos, pesos=None, dimensiones=DIMENSIONES):
+    """Recorre `datos` (DataFrame limpio o cubo) una vez y devuelve Agregados.
+
+    `pesos` es el nombre de una columna de frecuencias (p. ej. "n" en el cubo)
+    o None para contar cada fila una vez.
+    """
+    return TablaConteos(datos, pesos, dimensiones).agregados()
@@ -4,513 +4,275 @@
 # %%
 # 0. Cargar librerías
 import os
+from pathlib import Path
+from urllib.parse import parse_qs, quote
+
 import pandas as pd
 import numpy as np
 import dash
-from dash import dcc, html
+from dash import dcc, html, ctx, Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import plotly.graph_objects as go
-# 1. Carga del conjunto de datos
-# Asegurarse de que el archivo este en la ruta dada/
-df = pd.read_csv("data/Student_Mental_health.csv")
-print("\nDimensión Df:", df.shape)
-
-# %%
-# 2. Estandarizar nombres de columnas cambiar _ por espacios y pasar a minúsculas
-df.columns = (
-    df.columns
-    .str.strip()
-    .str.lower()
-    .str.replace(" ", "_")
-    .str.replace("-", "_")
-)
-print("\nTipos de datos:")
-df.info()
 
-print("\nValores nulos por columna:")
-print(df.isnull().sum())
-
-# %%
-# 3. Tratamiento simple de valores nulos
-for col in df.columns:
-    if df[col].dtype.name == "category":
-        df[col] = df[col].cat.add_categories("Desconocido").fillna("Desconocido")
-    elif df[col].dtype == "object":
-        df[col] = df[col].fillna("Nulo")
-    else:
-        df[col] = df[col].fillna(df[col].median())
-
-# %%
-# 4. Eliminar duplicados
-duplicates = df.duplicated().sum()
-print("Duplicados encontrados:", duplicates)
-df = df.drop_duplicates()
-
-# 5. Normalizaciones específicas
-
-# 5.1 Normalizar curso
-course_map = {
-    "bcs": "Computer Science",
-    "bit": "Information Technology",
-    "engine": "Engineering",
-    "engin": "Engineering",
-    "engineering": "Engineering",
-    "mhsc": "Health Sciences",
-    "biomedical science": "Biomedical Science",
-    "koe": "Education",
-    "koe ": "Education",
-    "benl": "English",
-    "ala": "Arts and Letters",
-    "psychology": "Psychology",
-    "irkhs": "Islamic Studies",
-    "kirkhs": "Islamic Studies",
-    "kirkhs ": "Islamic Studies",
-    "islamic education": "Islamic Education",
-    "pendidikan islam": "Islamic Education",
-    "fiqh": "Islamic Jurisprudence",
-    "fiqh fatwa": "Islamic Jurisprudence",
-    "nursing": "Nursing",
-    "diploma nursing": "Nursing",
-    "marine science": "Marine Science",
-    "banking studies": "Banking Studies",
-    "mathemathics": "Mathematics",
-    "communication": "Communication",
-    "cts": "Computer Technology",
-}
-
-df["what_is_your_course?"] = (
-    df["what_is_your_course?"]
-    .astype(str)
-    .str.strip()
-    .str.lower()
-    .replace(course_map)
-)
+import cubo as cb
+from distribuciones import (
+    GRANULARIDAD_INICIAL, RESOLUCION_STREAMING, construir_cubo_tiempo, figura_edad,
+    figura_linea_tiempo, histograma_edad, linea_tiempo, parche_edad, parche_linea_tiempo,
+    tabla_tiempo,
+)
+from cache_http import CacheRespuestas, CompresionHTTP, serializar
+from agregados import TablaConteos
+from asociacion import asociaciones
+from cohortes import CacheCohortes, Cohorte, descubrir_cohortes
+from indice_bitmap import IndiceBitmap
+from figuras import FIGURAS_LAYOUT, construir_figuras, datos_figuras, numeric_cols, parches_figuras
+from ingesta_viva import EstadoDatos, FilasPorPartes, IngestaViva
+from limpieza import compactar_tipos, load_clean_dataset, procesos_disponibles
+from metricas import metricas
+from momentos import Momentos
+from perfiles import PerfilesPeticion
+from pestanas import FIGURAS_POR_PESTANA, PESTANAS, PESTANAS_PESADAS
+from trabajos import GestorTrabajos
 
-# %%
-# 5.2 Año de estudio
-df["your_current_year_of_study"] = (
-    df["your_current_year_of_study"]
-    .astype(str)
-    .str.lower()
-    .str.replace("year", "")
-    .str.strip()
-    .replace({"1": "Año 1", "2": "Año 2", "3": "Año 3", "4": "Año 4"})
-)
-
-# 5.3 CGPA
-df["what_is_your_cgpa?"] = df["what_is_your_cgpa?"].astype(str).str.strip()
-df["what_is_your_cgpa?"] = df["what_is_your_cgpa?"].replace({
-    "3.50 - 4.00": "3.50 - 4.00",
-    "3.50-4.00": "3.50 - 4.00"
-})
-
-# 5.4 Convertir columnas Yes/No a 1/0
-yn_cols = [
-    "marital_status",
-    "do_you_have_depression?",
-    "do_you_have_anxiety?",
-    "do_you_have_panic_attack?",
-    "did_you_seek_any_specialist_for_a_treatment?"
-]
-
-for col in yn_cols:
-    if col in df.columns:
-        df[col] = df[col].map({"Yes": 1, "No": 0})
-
-# 5.5 Timestamp a datetime (si existe)
-if "timestamp" in df.columns:
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-
-# 5.6 Edad a entero
-df["age"] = df["age"].astype(float).astype(int)
-
-# %%
-# 6. Traducción de nombres de columnas al español
-column_translate = {
-    "timestamp": "fecha_registro",
-    "choose_your_gender": "genero",
-    "age": "edad",
-    "what_is_your_course?": "programa_academico",
-    "your_current_year_of_study": "año_estudio",
-    "what_is_your_cgpa?": "Promedio_de_calificaciones",
-    "marital_status": "estado_civil",
-    "do_you_have_depression?": "tiene_depresion",
-    "do_you_have_anxiety?": "tiene_ansiedad",
-    "do_you_have_panic_attack?": "tiene_ataques_panico",
-    "did_you_seek_any_specialist_for_a_treatment?": "busco_tratamiento_especialista"
-}
-
-df = df.rename(columns=column_translate)
-
-print("\nEncabezados finales del DataFrame:")
-print(df.columns)
-
-df.head()
+# 1. Carga del conjunto de datos
+# Asegurarse de que el archivo este en la ruta dada/
+# La limpieza completa (pasos 2 a 6) vive en limpieza.py; si el CSV no cambió
+# desde el último arranque se reutiliza el snapshot guardado en disco.
+RUTA_DATOS = os.environ.get("RUTA_DATOS", "data/Student_Mental_health.csv")
+
+# Cohortes adicionales: cada CSV de CARPETA_COHORTES se puede abrir con el
+# selector del encabezado o con ?cohorte=<nombre del archivo> en la URL. Las
+# ya preparadas se guardan en un LRU de hasta MEMORIA_COHORTES_MB (ver cohortes.py).
+CARPETA_COHORTES = os.environ.get("CARPETA_COHORTES", "")
+MEMORIA_COHORTES_MB = int(os.environ.get("MEMORIA_COHORTES_MB", 1024))
+
+# MODO_INGESTA=streaming lee el CSV por partes de CHUNK_FILAS filas y solo
+# conserva el cubo de frecuencias (para archivos más grandes que la memoria).
+MODO_INGESTA = os.environ.get("MODO_INGESTA", "memoria")
+# Horas por bin de la línea de tiempo: en streaming, por día (ver distribuciones.py)
+RESOLUCION_TIEMPO = RESOLUCION_STREAMING if MODO_INGESTA == "streaming" else 1
+# TIPOS_COMPACTOS=1 guarda las columnas como category/int8/uint8 (ver limpieza.py)
+TIPOS_COMPACTOS = os.environ.get("TIPOS_COMPACTOS", "0") == "1"
+# PROCESOS_LIMPIEZA>1 limpia el CSV en paralelo (0 = todos los núcleos)
+PROCESOS_LIMPIEZA = int(os.environ.get("PROCESOS_LIMPIEZA", 1)) or procesos_disponibles()
+
+# Estado de los datos que leen los callbacks. MODO_VIVO=1 sigue el final del
+# CSV y suma las respuestas nuevas; el navegador pregunta por la versión cada
+# INTERVALO_VIVO segundos y solo si cambió se recalculan sus figuras.
+MODO_VIVO = os.environ.get("MODO_VIVO", "0") == "1"
+INTERVALO_VIVO = int(os.environ.get("INTERVALO_VIVO", 10))
+# PRECARGAR_PESTANAS=1 arma en segundo plano la pestaña siguiente a la abierta
+PRECARGAR_PESTANAS = os.environ.get("PRECARGAR_PESTANAS", "0") == "1"
+# TRABAJOS_FONDO=1 calcula los filtros de las pestañas pesadas en
+# TRABAJOS_PROCESOS procesos aparte (0 = todos los núcleos) con cola en TRABAJOS_DB;
+# el navegador consulta el resultado cada TRABAJOS_INTERVALO_MS (ver trabajos.py)
+TRABAJOS_FONDO = os.environ.get("TRABAJOS_FONDO", "0") == "1"
+TRABAJOS_PROCESOS = int(os.environ.get("TRABAJOS_PROCESOS", 1)) or procesos_disponibles()
+TRABAJOS_INTERVALO_MS = int(os.environ.get("TRABAJOS_INTERVALO_MS", 250))
 
 # %% [markdown]
 # # Bloque 2. Cálculos agregados y figuras para cada parte del storytelling
 # Aquí se generan las figuras siguiendo la estructura: contexto → factores académicos → personales → ayuda
-
-# %% [markdown]
-# ## Pestaña 1 Contexto: Calculos
-
-# %%
-# BLOQUE 2: Calculos agregados y figuras para cada parte del storytelling con plotly
-# ______________________________________________________________________
-# -------------------------------
-# 2.1 Pestaña Contexto: Sección Detalle por síntoma, Gráficas: Distribución general de síntomas
-# -------------------------------
-# Conteos Sí/No de cada síntoma
-counts_dep = df["tiene_depresion"].value_counts().sort_index()
-counts_ans = df["tiene_ansiedad"].value_counts().sort_index()
-counts_panic = df["tiene_ataques_panico"].value_counts().sort_index()
-
-# Porcentajes
-percent_dep = (counts_dep / counts_dep.sum() * 100).round(1)
-percent_ans = (counts_ans / counts_ans.sum() * 100).round(1)
-percent_panic = (counts_panic / counts_panic.sum() * 100).round(1)
-
-# %% [markdown]
-# ## Pestaña 1 Contexto: Distribución de estudiantes con síntomas de depresión
-
-# %%
-# Gráfico 1: Dispersión
-# _______________________________________________________________
-# Opciones de gráfica tipo barra
-'''
-fig_dep = px.bar(
-    x=["No (0)", "Sí (1)"],
-    y=counts_dep.values,
-    labels={"x": "Respuesta", "y": "Cantidad de estudiantes"},
-    title="Distribución de estudiantes con síntomas de depresión"
-)
-fig_dep.update_traces(
-    text=[f"{v} ({p}%)" for v, p in zip(counts_dep.values, percent_dep.values)],
-    textposition="outside"
-)
-fig_dep.update_yaxes(range=[0, counts_dep.max() + 7])   # Ajuste de etiquetas
-
-# Grafico 2: Ansiedad
-# _______________________________________________________________
-fig_ans = px.bar(
-    x=["No (0)", "Sí (1)"],
-    y=counts_ans.values,
-    labels={"x": "Respuesta", "y": "Cantidad de estudiantes"},
-    title="Distribución de estudiantes con síntomas de ansiedad"
-)
-fig_ans.update_traces(
-    text=[f"{v} ({p}%)" for v, p in zip(counts_ans.values, percent_ans.values)],
-    textposition="outside"
-)
-fig_ans.update_yaxes(range=[0, counts_ans.max() + 7])   # Ajuste de etiquetas
-
-# Gráfico 3: Ataques de pánico
-# _______________________________________________________________
-fig_panic = px.bar(
-    x=["No (0)", "Sí (1)"],
-    y=counts_panic.values,
-    labels={"x": "Respuesta", "y": "Cantidad de estudiantes"},
-    title="Distribución de estudiantes con ataques de pánico"
-)
-fig_panic.update_traces(
-    text=[f"{v} ({p}%)" for v, p in zip(counts_panic.values, percent_panic.values)],
-    textposition="outside"
-)
-fig_panic.update_yaxes(range=[0, counts_panic.max() + 7])   # Ajuste de etiquetas
-'''
-# ============================================================
-# GRÁFICO 1: DEPRESIÓN (Pie)
-# ============================================================
-fig_dep = px.pie(
-    names=["No (0)", "Sí (1)"],
-    values=counts_dep.values,
-    title="Distribución de estudiantes con síntomas de depresión"
-)
-fig_dep.update_traces(
-    text=[f"{v} ({p}%)" for v, p in zip(counts_dep.values, percent_dep.values)],
-    textinfo="text+percent",  # Muestra tanto el texto personalizado como el %
-    textposition="inside"
-)
-
-# %% [markdown]
-# ## Pestaña 1 Contexto: Distribución de estudiantes con síntomas de ansiedad
-
-# %%
-# ============================================================
-# GRÁFICO 2: ANSIEDAD (Pie)
-# ============================================================
-fig_ans = px.pie(
-    names=["No (0)", "Sí (1)"],
-    values=counts_ans.values,
-    title="Distribución de estudiantes con síntomas de ansiedad"
-)
-fig_ans.update_traces(
-    text=[f"{v} ({p}%)" for v, p in zip(counts_ans.values, percent_ans.values)],
-    textinfo="text+percent",
-    textposition="inside"
-)
-
-# %% [markdown]
-# ## Pestaña 1 Contexto: Distribución de estudiantes con ataques de pánico
-
-# %%
-# ============================================================
-# GRÁFICO 3: ATAQUES DE PÁNICO (Pie)
-# ============================================================
-fig_panic = px.pie(
-    names=["No (0)", "Sí (1)"],
-    values=counts_panic.values,
-    title="Distribución de estudiantes con ataques de pánico"
-)
-fig_panic.update_traces(
-    text=[f"{v} ({p}%)" for v, p in zip(counts_panic.values, percent_panic.values)],
-    textinfo="text+percent",
-    textposition="inside"
-)
-
-# %% [markdown]
-# ## Pestaña 1 Contexto: Distribución de estudiantes por síntoma emocional
+# Los cálculos y el armado de cada figura viven en agregados.py y figuras.py.
 
 # %%
-# Gráfico resumen: total de casos por síntoma
-counts_symptoms = pd.Series({
-    "Depresión": df["tiene_depresion"].sum(),
-    "Ansiedad": df["tiene_ansiedad"].sum(),
-    "Ataques de pánico": df["tiene_ataques_panico"].sum()
-})
-
-# Gráfico tipo barra
-'''
-fig_resumen_sintomas = px.bar(
-    x=counts_symptoms.index,
-    y=counts_symptoms.values,
-    labels={"x": "Síntoma", "y": "Número de estudiantes"},
-    title="Número de estudiantes que reportan cada síntoma emocional",
-    width=600,   # Ancho personalizado
-    height=450   # Opcional
-)
-#fig_resumen_sintomas.update_traces(text=counts_symptoms.values, textposition="outside")
-
-fig_resumen_sintomas.update_traces(
-    text=counts_symptoms.values,
-    textposition="outside"
-)
-
-# Ajustar espacio para que se vean los textos
-fig_resumen_sintomas.update_yaxes(range=[0, counts_symptoms.max() + 7])
-
-#fig_resumen_sintomas.show()
-'''
-# Gráfico tipo Pie
-fig_resumen_sintomas = px.pie(
-    names=counts_symptoms.index,
-    values=counts_symptoms.values,
-    title="Distribución de estudiantes por síntoma emocional",
-    hole=0,        # Si quieres tipo doughnut, cambia a 0.4
-)
-
-# Mostrar valores y porcentajes dentro o fuera del pie
-fig_resumen_sintomas.update_traces(
-    textinfo="label+value+percent",
-    textposition="inside"   # Usa "outside" si prefieres afuera
-)
-
-fig_resumen_sintomas.update_layout(title_x=0.5)
-
-# fig_resumen_sintomas.show()  # En Dash no se necesita
-
+def preparar_cohorte(nombre, ruta):
+    """Bloques 1 y 2 para un CSV: limpieza, cubo, agregados y figuras.
+    Cada paso queda medido como una etapa de la cohorte (ver metricas.py)."""
+    def etapa(paso):
+        return metricas.etapa(paso, nombre)
+
+    if MODO_INGESTA == "streaming":
+        df = None
+        with etapa("bloque1_cubos_streaming"):
+            cubos = cb.cubos_desde_csv(
+                ruta,
+                {"cubo": cb.construir_cubo,
+                 "tiempo": lambda chunk: construir_cubo_tiempo(chunk, RESOLUCION_TIEMPO)},
+                chunksize=int(os.environ.get("CHUNK_FILAS", 200_000)),
+            )
+        cubo, cubo_tiempo = cubos["cubo"], cubos["tiempo"]
+        print(f"\n[{nombre}] Filas procesadas:", cb.total_filas(cubo))
+    else:
+        with etapa("bloque1_carga_limpieza"):
+            df = load_clean_dataset(ruta, verbose=True, compacto=TIPOS_COMPACTOS,
+                                    procesos=PROCESOS_LIMPIEZA)
+        print(f"\n[{nombre}] Dimensión Df:", df.shape)
+
+        print("\nEncabezados finales del DataFrame:")
+        print(df.columns)
+
+        with etapa("bloque2_cubo"):
+            cubo = cb.construir_cubo(df)
+        with etapa("bloque2_cubo_tiempo"):
+            cubo_tiempo = construir_cubo_tiempo(df)
+
+    # BLOQUE 2: Calculos agregados y figuras para cada parte del storytelling con plotly
+    # ______________________________________________________________________
+    # Tabla de conteos precalculada sobre el cubo: los filtros del tablero se
+    # responden desde aquí sin volver a recorrer df
+    with etapa("bloque2_tabla_conteos"):
+        tabla = TablaConteos(cubo, pesos="n", numericas=numeric_cols)
+
+    # Un solo recorrido del cubo calcula los conteos de todas las figuras del Bloque 2
+    with etapa("bloque2_agregados"):
+        agg = tabla.agregados()
+
+    # Momentos combinables de las columnas numéricas (ver momentos.py): el mapa de
+    # calor se puede poner al día absorbiendo solo los lotes nuevos de respuestas
+    with etapa("bloque2_momentos_correlacion"):
+        momentos = Momentos.desde_df(cubo, numeric_cols, pesos="n")
+        corr = momentos.correlacion()
+    # V de Cramér y chi-cuadrado de todos los pares de variables categóricas
+    # (ver asociacion.py): una matriz de Burt sobre los códigos de la tabla
+    with etapa("bloque2_asociacion"):
+        asoc = asociaciones(tabla)
+    # Incluye los intervalos bootstrap de las barras de proporciones
+    with etapa("bloque2_datos_figuras"):
+        datos = datos_figuras(agg, corr, asoc)
+    with etapa("bloque2_figuras_storytelling"):
+        figs = construir_figuras(datos)
+
+    # Distribución de edades y línea de tiempo: binadas en el servidor (ver
+    # distribuciones.py), al navegador solo llegan los conteos de cada bin
+    with etapa("bloque2_fig_edad"):
+        figs["fig_edad"] = figura_edad(*histograma_edad(tabla))
+    with etapa("bloque2_fig_linea_tiempo"):
+        tiempo = tabla_tiempo(cubo_tiempo)
+        figs["fig_linea_tiempo"] = figura_linea_tiempo(*linea_tiempo(tiempo, resolucion=RESOLUCION_TIEMPO))
+
+    # Pestaña 8: índice de bits sobre las filas de df para la exploración de casos
+    # (en modo streaming no hay filas individuales, solo el cubo)
+    with etapa("bloque2_indice_bitmap"):
+        indice = IndiceBitmap(df) if df is not None else None
+    estado = EstadoDatos(
+        0, tabla, agg, momentos, indice, FilasPorPartes([df]) if df is not None else None, tiempo
+    )
+    ingesta = IngestaViva(
+        ruta, estado, numeric_cols, compactar=compactar_tipos if TIPOS_COMPACTOS else None,
+        resolucion_tiempo=RESOLUCION_TIEMPO,
+    ) if MODO_VIVO else None
+    return Cohorte(nombre, ruta, estado, figs, list(df.columns) if df is not None else [],
+                   ingesta, precargar=PRECARGAR_PESTANAS)
+
+
+# La cohorte de RUTA_DATOS se prepara al arrancar y no se desaloja nunca
+COHORTE_INICIAL = Path(RUTA_DATOS).stem
+cohortes = CacheCohortes(
+    {**descubrir_cohortes(CARPETA_COHORTES), COHORTE_INICIAL: RUTA_DATOS},
+    preparar_cohorte,
+    limite_bytes=MEMORIA_COHORTES_MB * 2**20,
+    fijas=[COHORTE_INICIAL],
+)
+cohorte_inicial = cohortes.obtener(COHORTE_INICIAL)
+print(f"\nEtapas de preparación de {COHORTE_INICIAL}:\n" + metricas.resumen(COHORTE_INICIAL))
+tabla, agg = cohorte_inicial.estado_inicial.tabla, cohorte_inicial.estado_inicial.agg
+figs = cohorte_inicial.figs
+
+# Pestaña 1 Contexto
+fig_resumen_sintomas = figs["fig_resumen_sintomas"]
+fig_dep = figs["fig_dep"]
+fig_ans = figs["fig_ans"]
+fig_panic = figs["fig_panic"]
+# Pestaña 2 Factores académicos
+fig_programa_dep = figs["fig_programa_dep"]
+fig_cgpa_dep = figs["fig_cgpa_dep"]
+fig_anio_symptoms = figs["fig_anio_symptoms"]
+# Pestaña 3 Factores personales
+fig_genero_panic = figs["fig_genero_panic"]
+fig_estado_ans = figs["fig_estado_ans"]
+# Pestañas 4 y 5 Acceso a ayuda e Insight principal
+fig_help_symptoms = figs["fig_help_symptoms"]
+fig_insight = figs["fig_insight"]
+fig_corr = figs["fig_corr"]
+fig_asociacion = figs["fig_asociacion"]
 
 # %% [markdown]
-# # Pestaña 2 Factores Académicos
-# ## Pestaña 2 Estudiantes con depresión por programa académico
-
-# %%
-# 2.2 Factores académicos
-# -------------------------------
-
-# 2.2.1 Programa académico vs Depresión
-program_dep = (
-    df.groupby("programa_academico")["tiene_depresion"]
-    .sum()
-    .sort_values(ascending=False)
-)
-# Filtrar solo los que son mayores que 0
-program_dep = program_dep.loc[program_dep > 0]
-
-fig_programa_dep = px.bar(
-    x=program_dep.index,
-    y=program_dep.values,
-    labels={"x": "Programa académico", "y": "Estudiantes con depresión"},
-    title="Estudiantes con depresión por programa académico"
-)
-fig_programa_dep.update_layout(xaxis=dict(tickangle=75))
-
-# %%
-# 2.2.2 Promedio de calificaciones vs Depresión
-dep_por_cgpa = df.groupby("Promedio_de_calificaciones")["tiene_depresion"].sum().sort_index()
-# Filtrar intervalos con al menos un caso
-dep_por_cgpa = dep_por_cgpa[dep_por_cgpa > 0]
-
-fig_cgpa_dep = px.bar(
-    x=dep_por_cgpa.index,
-    y=dep_por_cgpa.values,
-    labels={"x": "Promedio de calificaciones (CGPA)", "y": "Estudiantes con depresión"},
-    title="Relación entre CGPA y depresión"
-)
-
-#fig_cgpa_dep.update_layout(xaxis=dict(tickangle=360))
+# # Bloque 3 – Layout de la app Dash con tabs narrativos
+# Aquí organizamos el storytelling: cada Tab responde a una parte de la guía.
 
 # %%
-# 2.2.3 Año de estudio vs Ansiedad y Depresión (nueva figura)
-anio_symptoms = (
-    df.groupby("año_estudio")[["tiene_ansiedad", "tiene_depresion"]]
-    .mean()
-    .reset_index()
-)
-
-fig_anio_symptoms = px.bar(
-    anio_symptoms,
-    x="año_estudio",
-    y=["tiene_ansiedad", "tiene_depresion"],
-    barmode="group",
-    labels={
-        "value": "Proporción de estudiantes",
-        "año_estudio": "Año de estudio",
-        "variable": "Síntoma"
-    },
-    title="Proporción de ansiedad y depresión por año de estudio"
-)
+# Bloque 3: Configuración del layout de Dash con storytelling
+# =============================================================================
+# Los componentes de cada pestaña no existen hasta que se abre: se permiten
+# callbacks cuyos ids aún no están en el layout
+app = dash.Dash(__name__, suppress_callback_exceptions=True)
+# Servidor WSGI para gunicorn (ver gunicorn.conf.py)
+server = app.server
+# Latencias, tamaños de respuesta y etapas en /metrics (ver metricas.py). Va
+# primero para que sus hooks midan también lo que responde cache_http
+metricas.instrumentar(server)
+# PERFILES=1 perfila las peticiones de Dash que traen PERFILES_SECRETO en la
+# cabecera X-Perfil o como ?perfil= en la URL de la página (ver perfiles.py).
+# Apagado no registra ningún hook
+if os.environ.get("PERFILES", "0") == "1":
+    perfiles = PerfilesPeticion(
+        server,
+        rutas=[app.config.routes_pathname_prefix + ruta for ruta in ("_dash-layout", "_dash-update-component")],
+        secreto=os.environ.get("PERFILES_SECRETO", ""),
+        carpeta=os.environ.get("PERFILES_DIR", ".cache/perfiles"),
+        modo=os.environ.get("PERFILES_MODO", "muestreo"),
+        tasa=float(os.environ.get("PERFILES_TASA", 1.0)),
+        intervalo=float(os.environ.get("PERFILES_INTERVALO_MS", 1)) / 1000,
+        maximo=int(os.environ.get("PERFILES_MAX", 100)),
+    )
 
-# Etiquetas dentro de las barras
-fig_anio_symptoms.update_traces(
-    texttemplate='%{y:.2f}',
-    textposition='inside'
-)
+# Filtros cruzados: cada uno limita el cubo a los valores elegidos de una
+# dimensión (vacío = todos) y todas las figuras se recalculan con ese subconjunto
+FILTROS = [
+    ("filtro-genero", "genero", "Género"),
+    ("filtro-anio", "año_estudio", "Año de estudio"),
+    ("filtro-programa", "programa_academico", "Programa académico"),
+    ("filtro-cgpa", "Promedio_de_calificaciones", "Promedio de calificaciones (CGPA)"),
+    ("filtro-estado", "estado_civil", "Casado(a)"),
+]
+ETIQUETAS_ESTADO = {0: "No", 1: "Sí"}
 
-# %%
-# -------------------------------
-# 2.3 FACTORES PERSONALES
-# -------------------------------
-
-# 2.3.1 Género vs Ataques de pánico
-panic_por_genero = df.groupby("genero")["tiene_ataques_panico"].mean().reset_index()
-
-fig_genero_panic = px.bar(
-    panic_por_genero,
-    x="genero",
-    y="tiene_ataques_panico",
-    labels={"genero": "Género", "tiene_ataques_panico": "Proporción con ataques de pánico"},
-    title="Proporción de estudiantes con ataques de pánico por género"
-)
 
+def opciones_filtro(tabla_cohorte, dim):
+    valores = [v.item() if hasattr(v, "item") else v for v in tabla_cohorte.etiquetas[dim]]
+    if dim == "estado_civil":
+        return [{"label": ETIQUETAS_ESTADO.get(v, str(v)), "value": v} for v in valores]
+    return [{"label": str(v), "value": v} for v in valores]
 
-# %%
-# 2.3.2 Estado civil vs Ansiedad
-ans_por_estado = df.groupby("estado_civil")["tiene_ansiedad"].mean().reset_index()
-
-fig_estado_ans = px.bar(
-    ans_por_estado,
-    x="estado_civil",
-    y="tiene_ansiedad",
-    labels={"estado_civil": "Estado civil", "tiene_ansiedad": "Proporción con ansiedad"},
-    title="Proporción de estudiantes con ansiedad por estado civil"
-)
-fig_estado_ans
 
-# %%
-# 2.3.3 Correlaciones (Edad y síntomas)
-yn_cols_esp = [
-    "tiene_depresion",
-    "tiene_ansiedad",
-    "tiene_ataques_panico",
-    "busco_tratamiento_especialista"
-]
-numeric_cols = ["edad"] + yn_cols_esp
-corr = df[numeric_cols].corr()
-
-# Propuesta Maria Fernanda
-'''
-fig_corr = px.imshow(
-    corr,
-    text_auto=True,
-    color_continuous_scale="Oranges",
-    title="Mapa de calor de correlaciones: edad, síntomas y búsqueda de tratamiento"
-)
-'''
-fig_corr = px.imshow(
-    corr,
-    text_auto=".2f",               # Muestra los valores con 2 decimales
-    color_continuous_scale="RdBu", # Colores rojo-azul para positiva/negativa
-    title="Mapa de calor de correlaciones: edad, síntomas y búsqueda de tratamiento",
-    width=700,
-    height=600,
-    aspect="auto"                  # Ajusta proporción de celdas
-)
+def control_filtro(id_filtro, dim, titulo):
+    if dim in ("genero", "estado_civil"):
+        control = dcc.Checklist(id=id_filtro, options=opciones_filtro(tabla, dim), value=[], inline=True)
+    else:
+        control = dcc.Dropdown(id=id_filtro, options=opciones_filtro(tabla, dim), value=[], multi=True,
+                               placeholder="Todos")
+    return html.Div([html.Label(titulo, style={"fontWeight": "bold"}), control],
+                    style={"flex": "1", "minWidth": "180px", "margin": "0 8px"})
 
-# Ajustes de estilo
-fig_corr.update_layout(
-    title_x=0.5,                   # Centrar el título
-    coloraxis_colorbar=dict(
-        title="Correlación",
-        tickvals=[-1, -0.5, 0, 0.5, 1],
-        ticktext=["-1", "-0.5", "0", "0.5", "1"]
-    )
-)
 
-# Rotar etiquetas si es necesario
-fig_corr.update_xaxes(tickangle=45)
-fig_corr.update_yaxes(tickangle=0)
+def cohorte_actual(nombre):
+    """Cohorte elegida en el navegador (la inicial si el nombre no existe)."""
+    return cohortes.obtener(nombre if nombre in cohortes else COHORTE_INICIAL)
 
-# Mostrar la figura
 
-# %%
-# -------------------------------
-# 2.4 Acceso a ayuda profesional
-# -------------------------------
-
-# Proporción que busca tratamiento entre quienes SÍ tienen cada síntoma
-def prop_tratamiento(cond_col):
-    sub = df[df[cond_col] == 1]
-    if len(sub) == 0:
-        return 0
-    return sub["busco_tratamiento_especialista"].mean()
-
-help_dep = prop_tratamiento("tiene_depresion")
-help_ans = prop_tratamiento("tiene_ansiedad")
-help_panic = prop_tratamiento("tiene_ataques_panico")
-
-help_data = pd.DataFrame({
-    "Síntoma": ["Depresión", "Ansiedad", "Ataques de pánico"],
-    "Proporción_que_busca_tratamiento": [help_dep, help_ans, help_panic]
-})
-
-fig_help_symptoms = px.bar(
-    help_data,
-    x="Síntoma",
-    y="Proporción_que_busca_tratamiento",
-    labels={"Proporción_que_busca_tratamiento": "Proporción que busca tratamiento"},
-    title="Proporción de estudiantes con síntomas que buscan tratamiento especializado"
-)
-fig_help_symptoms.update_yaxes(tickformat=".0%")
+def estado_datos(nombre=COHORTE_INICIAL):
+    return cohorte_actual(nombre).estado
 
-# %%
-# -------------------------------
-# 2.5 INSIGHT PRINCIPAL (Clímax)
-# -------------------------------
 
-# Para el clímax usamos la misma figura, pero con título más narrativo
-fig_insight = fig_help_symptoms.update_layout(
-    title="Brecha entre padecer síntomas y buscar ayuda profesional"
-)
+terminar_layout = metricas.iniciar_etapa("bloque3_layout")
 
-# %% [markdown]
-# # Bloque 3 – Layout de la app Dash con tabs narrativos
-# Aquí organizamos el storytelling: cada Tab responde a una parte de la guía.
+# Selector de cohorte: solo visible si hay más de un CSV para elegir
+selector_cohorte = html.Div([
+    html.Label("Cohorte", style={"fontWeight": "bold"}),
+    dcc.Dropdown(id="cohorte", options=[{"label": nombre, "value": nombre} for nombre in cohortes.rutas],
+                 value=COHORTE_INICIAL, clearable=False),
+], style={"maxWidth": "400px", "margin": "0 8px 20px",
+          "display": "block" if len(cohortes.rutas) > 1 else "none"})
 
-# %%
-# Bloque 3: Configuración del layout de Dash con storytelling
-# =============================================================================
-app = dash.Dash(__name__)
+panel_filtros = html.Div([
+    html.Div([control_filtro(*f) for f in FILTROS],
+             style={"display": "flex", "flexWrap": "wrap"}),
+    html.P(id="resumen-filtros", style={"textAlign": "right", "fontStyle": "italic"}),
+    # Avance de los cálculos en segundo plano (vacío si no hay ninguno)
+    html.P(id="progreso-calculo", style={"textAlign": "right", "color": "#666"}),
+], style={"marginBottom": "20px"})
 
 app.layout = html.Div([
     html.H1(
@@ -522,284 +284,302 @@ app.layout = html.Div([
         style={"textAlign": "center", "marginBottom": "30px"}
     ),
 
-    dcc.Tabs([
-
-# ---------------- Pestaña 1: Contexto ----------------
-dcc.Tab(label="1. Contexto", children=[
-    html.Br(),
-    html.H2("Contexto del problema"),
-    html.P(
-        "En los últimos años, la salud mental ha adquirido una importancia exponencial debido al aumento "
-        "de trastornos como la ansiedad o la depresión. La OMS estima que 1 de cada 7 adolescentes presenta "
-        "un trastorno mental (OMS 2025). En el ámbito educativo por otro lado, diversas investigaciones "
-        "señalan que la depresión puede afectar hasta al 66 % de los estudiantes universitarios y la ansiedad "
-        "a más del 40 %, influyendo directamente en su concentración, rendimiento y permanencia académica. "
-        "En Colombia, se calcula que el 44,7 % de los estudiantes reporta algún tipo de afectación emocional "
-        "como estrés o ansiedad (El Colombiano, 2025)."
-    ),
-    html.P(
-        "Es por lo anterior que vemos la importancia de analizar este conjunto de datos para estudiar la "
-        "relación entre la vida académica y el bienestar mental de los estudiantes universitarios, con el fin "
-        "de encontrar puntos clave para implementar mejoras continuas."
-    ),
-    
-    html.H3("Descripción del conjunto de datos:"),
-    html.P(
-        "La información fue recopilada mediante una encuesta anónima en línea aplicada a 102 estudiantes "
-        "universitarios de diversas disciplinas. Las variables incluidas son:"
-    ),
-    html.Ul([
-        html.Li("Seleccione su género: Identidad de género del encuestado."),
-        html.Li("Edad: La edad del estudiante."),
-        html.Li("¿Cuál es tu curso?: Programa académico del estudiante."),
-        html.Li("Año actual de estudio: Nivel académico actual."),
-        html.Li("¿Cuál es su CGPA?: Promedio acumulado de calificaciones."),
-        html.Li("Estado civil: Situación civil del estudiante."),
-        html.Li("¿Sufre usted de depresión, ansiedad o ataques de pánico?: Síntomas reportados."),
-        html.Li("¿Consultó a algún especialista para recibir tratamiento?: Búsqueda de ayuda profesional."),
-    ]),
-
-    html.H3("Resultado general:"),
-    html.P("Inicialmente se observa cuántos estudiantes reportan cada uno de los trastornos mentales:"),
-
-    html.H3("Distribución general de síntomas"),
-    html.P("A continuación se muestra el porcentaje de estudiantes que reportan cada síntoma emocional:"),
-    dcc.Graph(figure=fig_resumen_sintomas),
-
-    html.P("Distribuidos de la siguiente manera:"),
-
-    html.H4("Detalle por síntoma"),
-
-
-    html.Div([
-        html.Div([dcc.Graph(figure=fig_dep)], style={"width": "32%"}),
-        html.Div([dcc.Graph(figure=fig_ans)], style={"width": "32%"}),
-        html.Div([dcc.Graph(figure=fig_panic)], style={"width": "32%"}),
-    ], style={"display": "flex", "justify-content": "space-between"}),
-
-    html.Br(),
-
-    html.P(
-        "Se puede concluir que todos los estudiantes encuestados tenían o tuvieron algún tipo de trastorno "
-        "mental, ya sea ansiedad, depresión o ataques de pánico. Las proporciones entre cada condición son "
-        "muy similares, aunque la depresión presenta una ligera prevalencia del 34.3 %. Sin embargo, las "
-        "diferencias no son estadísticamente significativas."
-    ),
-]),
-# ---------------- Pestaña 2: Factores académicos ----------------
-        
-dcc.Tab(label="2. Factores académicos", children=[
-    html.Br(),
-    html.H2("Factores académicos en relación a la salud mental", style={"fontWeight": "bold"}),
-
-
-    html.P(
-        "La siguiente variable por explorar es el programa académico en relación con los estudiantes que tienen "
-        "depresión. Se encuentra que priman con un 2.5 las carreras de tecnología de la información y ciencias "
-        "computacionales; a continuación, se encuentran Inglés, Psicología y Educación con un 2, y con una menor "
-        "cantidad se encuentran las carreras restantes de los alumnos encuestados."
-    ),
-
-  
-    html.H3("Estudiantes con depresión por programa académico"),
-    dcc.Graph(figure=fig_programa_dep),
-
-    html.Br(),
-
-    html.P(
-        "De igual forma, se toma la siguiente variable a considerar, la cual relaciona los estudiantes con "
-        "depresión con el promedio de calificaciones. Podemos observar que el promedio acumulado de calificaciones, "
-        "considerado una medida del rendimiento académico, oscila entre 3.0 y 3.49 con aproximadamente 17 estudiantes; "
-        "contiguo a este, el rango de 3.5 a 4.0 con aproximadamente 13 estudiantes; y finalmente el rango entre "
-        "2.5 y 2.9 con cerca de 3 estudiantes. Dado lo anterior, la mayoría de los estudiantes superan una media "
-        "académica, sin embargo, es una calificación baja para unas expectativas académicas elevadas."
-    ),
-
-   
-    html.H3("Relación entre CGPA y depresión"),
-    dcc.Graph(figure=fig_cgpa_dep),
-
-    html.Br(),
-    
-    html.P(
-        "Continuando con las relaciones de las variables de depresión, anexamos la variable de ansiedad en relación "
-        "al año de estudio. Podemos observar que en el tercer año se encuentra el mayor número de estudiantes con "
-        "depresión y el segundo mayor número de estudiantes con ansiedad; mientras que en el segundo año se encuentra "
-        "una misma cantidad de estudiantes con ansiedad y con depresión. Esto puede relacionarse a que los momentos "
-        "críticos de un estudiante suelen ser antes del último año, pues se toman decisiones importantes como la "
-        "modalidad y tema de grado."
-    ),
-
-   
-    html.H3("Ansiedad y depresión por año de estudio"),
-    dcc.Graph(figure=fig_anio_symptoms),
+    # ?cohorte=<nombre> en la URL elige la cohorte; cambiarla actualiza la URL
+    dcc.Location(id="url", refresh=False),
+    selector_cohorte,
+    panel_filtros,
 
-    html.Br(),
-]), 
-        # ---------------- Pestaña 3: Factores personales ----------------
+    # Solo la barra de pestañas: el contenido se pide al cambiar de pestaña
+    dcc.Tabs(id="pestanas", value=PESTANAS[0][0],
+             children=[dcc.Tab(label=etiqueta, value=valor) for valor, etiqueta, _ in PESTANAS]),
+    html.Div(id="contenido-pestana"),
 
-dcc.Tab(label="3. Factores personales", children=[
-    html.Br(),
-
-    html.H2("Factores personales en relación a la salud mental", style={"fontWeight": "bold"}),
-
-    html.P(
-        "Pasando a las variables personales, tenemos el género, la edad y el estado civil, los cuales pueden "
-        "influir positiva o negativamente en los temas de salud mental, afectando el bienestar emocional. "
-        "Inicialmente, se identifica que las mujeres son más propensas a verse afectadas por ataques de pánico "
-        "en comparación con los hombres. Sin embargo, es importante señalar que esta diferencia no es altamente "
-        "marcada, lo cual puede sugerir que el entorno académico no presenta una discriminación significativa "
-        "entre géneros en este aspecto."
-    ),
-
-    html.H3("Proporción de estudiantes con ataques de pánico por género"),
-    dcc.Graph(figure=fig_genero_panic),
-
-    html.Br(),
-]),
-        # ---------------- Pestaña 4: Acceso a ayuda profesional ----------------
-dcc.Tab(label="4. Acceso a ayuda profesional", children=[
-    html.Br(),
-
-    html.H2("Acceso a ayuda profesional", style={"fontWeight": "bold"}),
-
-    html.P(
-        "Se tiene también la información de si los estudiantes contemplados han buscado o no una ayuda profesional, "
-        "llámese psicólogo y/o psiquiatra. Se observa que el 18% de los estudiantes con depresión han buscado ayuda "
-        "profesional, siendo este el porcentaje más alto en relación con las otras patologías; seguido por quienes "
-        "presentan ataques de pánico con un 9% y, finalmente, los estudiantes con ansiedad con un 12%. "
-        "Podemos observar una brecha importante: aunque muchos estudiantes reportan síntomas, solo una fracción de "
-        "ellos busca ayuda profesional, lo que sugiere la presencia de barreras como estigmas, falta de información "
-        "o acceso limitado a servicios especializados."
-    ),
-
-    html.H3("Brecha entre padecer síntomas y buscar ayuda profesional"),
-    dcc.Graph(figure=fig_insight),
-
-    html.Br(),
-]),
-        # ---------------- Pestaña 5: Insight principal ----------------
-dcc.Tab(label="5. Insight principal", children=[
-    html.Br(),
-
-    html.H2("Insight principal del análisis a través de la correlación", style={"fontWeight": "bold"}),
-
-    
-    html.P(
-        "Dadas las visualizaciones obtenidas, para encontrar el punto clave del análisis se obtiene una "
-        "matriz de correlación, representada por el mapa de calor, con el cual se puede analizar la relación "
-        "entre las variables tenidas en cuenta con las patologías identificadas (depresión, ansiedad y ataques "
-        "de pánico). Normalmente, en un mapa de calor los coeficientes de correlación oscilan entre -1 y 1, "
-        "donde valores cercanos a cero indican relaciones débiles y valores positivos o negativos más altos "
-        "indican relaciones fuertes."
-    ),
- 
-    html.H3("Mapa de calor de correlaciones: edad, síntomas y búsqueda de tratamiento"),
-    dcc.Graph(figure=fig_corr),
-
-    html.Br(),
-
-    html.H3("Análisis:"),
-
-    html.P(
-        "En primer lugar, la edad muestra correlaciones muy bajas con los síntomas de salud mental: "
-        "-0.07 con depresión, -0.09 con ansiedad y 0.06 con ataques de pánico. Esto indica que la edad "
-        "no es un factor determinante en la presencia de síntomas, pues personas de distintas edades "
-        "manifiestan niveles similares de malestar emocional."
-    ),
-    html.P(
-        "Por otro lado, se observa una relación moderada y positiva entre depresión y ansiedad (0.27), "
-        "y entre depresión y ataques de pánico (0.25). Esto sugiere que quienes reportan síntomas "
-        "depresivos tienden también a manifestar ansiedad o ataques de pánico, lo cual es coherente "
-        "con la frecuente coexistencia de estos trastornos. La relación entre ansiedad y ataques de pánico "
-        "es baja (0.08), lo que podría deberse a las características de la muestra o a la forma en que se "
-        "formularon las preguntas del cuestionario."
-    ),
-    html.P(
-        "En cuanto a la búsqueda de tratamiento especializado, esta variable mantiene la correlación más alta "
-        "del conjunto con la depresión (0.35). Esto indica que quienes reportan depresión tienen mayor probabilidad "
-        "de acudir a un profesional de salud mental. También existen correlaciones positivas con ansiedad (0.09) "
-        "y ataques de pánico (0.18), aunque de menor magnitud. Esto sugiere que la presencia de síntomas puede "
-        "influir en la decisión de buscar ayuda, pero especialmente cuando se presenta depresión."
-    ),
-
-    html.Br(),
-]),
+    # Versión de los datos que tiene el navegador (bytes ingeridos en modo vivo)
+    dcc.Store(id="version-datos", data=0),
+    dcc.Interval(id="intervalo-datos", interval=INTERVALO_VIVO * 1000, disabled=not MODO_VIVO),
+])
+terminar_layout()
+
+# Layout serializado y comprimido una sola vez (ver cache_http.py)
+cache_http = CacheRespuestas(app.server)
+RUTA_LAYOUT = app.config.routes_pathname_prefix + "_dash-layout"
+with metricas.etapa("bloque3_layout_serializado"):
+    cache_http.registrar(RUTA_LAYOUT, lambda: serializar(app.get_layout()))
+
+
+# Medidas que /metrics lee en cada scrape: memoria de los datos y de las
+# figuras de cada cohorte en caché, bytes de sus pestañas ya serializadas,
+# tamaños del layout comprimido y contadores del LRU de cohortes
+def medidas_datos():
+    en_cache = list(cohortes.entradas.items())
+    estadisticas = cohortes.estadisticas()
+    return [
+        ("cohorte_datos_bytes", "gauge", "Memoria estimada de los datos de cada cohorte en caché",
+         [([("cohorte", nombre)], c.bytes_datos) for nombre, c in en_cache]),
+        ("cohorte_figuras_bytes", "gauge", "JSON de las figuras completas de cada cohorte en caché",
+         [([("cohorte", nombre)], c.bytes_figuras) for nombre, c in en_cache]),
+        ("cohorte_respuestas", "gauge", "Respuestas de la encuesta en cada cohorte en caché",
+         [([("cohorte", nombre)], c.estado.tabla.total()) for nombre, c in en_cache]),
+        ("pestana_bytes", "gauge", "JSON serializado de cada pestaña ya armada",
+         [([("cohorte", nombre), ("pestana", valor)], n)
+          for nombre, c in en_cache for valor, n in list(c.pestanas.bytes.items())]),
+        ("layout_bytes", "gauge", "Layout inicial serializado por codificación",
+         [([("codificacion", cod)], n) for cod, n in cache_http.obtener(RUTA_LAYOUT).tamanos().items()]),
+        ("cohortes_cache_bytes", "gauge", "Memoria estimada del LRU de cohortes",
+         [([], estadisticas["bytes"])]),
+        ("cohortes_cache_limite_bytes", "gauge", "Límite de memoria del LRU de cohortes",
+         [([], estadisticas["limite_bytes"])]),
+        ("cohortes_cache_total", "counter", "Accesos al LRU de cohortes por resultado",
+         [([("resultado", r)], estadisticas[r]) for r in ("aciertos", "fallos", "esperas", "desalojos")]),
+    ] + ([
+        ("trabajos", "gauge", "Trabajos en segundo plano en la base por estado",
+         [([("estado", e)], n) for e, n in gestor_trabajos.estadisticas().items()]),
+    ] if gestor_trabajos is not None else [])
+
+
+metricas.medidas.append(medidas_datos)
+
+# Compresión gzip/brotli del resto de respuestas (COMPRESION=0 la desactiva) y
+# caché inmutable de los paquetes JS/CSS con huella de versión
+if os.environ.get("COMPRESION", "1") == "1":
+    compresion = CompresionHTTP(
+        app.server,
+        prefijo_estatico=app.config.requests_pathname_prefix + "_dash-component-suites/",
+        minimo=int(os.environ.get("COMPRESION_MIN_BYTES", 1024)),
+        algoritmos=os.environ.get("COMPRESION_ALGORITMOS", "br,gzip").split(","),
+    )
+else:
+    compresion = None
 
-        # ---------------- Pestaña 6: Limitaciones ----------------
-dcc.Tab(label="6. Limitaciones del análisis", children=[
-    html.Br(),
+# %%
+# Al cambiar de pestaña (o de cohorte) se envía solo su contenido
+@app.callback(
+    Output("contenido-pestana", "children"),
+    Input("pestanas", "value"),
+    Input("cohorte", "value"),
+)
+def mostrar_pestana(valor, nombre):
+    return cohorte_actual(nombre).pestanas.obtener(valor)
+
+
+# URL y selector de cohorte sincronizados en un solo callback
+@app.callback(
+    Output("cohorte", "value"),
+    Output("url", "search"),
+    Input("url", "search"),
+    Input("cohorte", "value"),
+)
+def sincronizar_cohorte(busqueda, nombre):
+    if ctx.triggered_id == "cohorte":
+        return dash.no_update, f"?cohorte={quote(nombre)}"
+    pedida = parse_qs((busqueda or "").lstrip("?")).get("cohorte", [None])[0]
+    if pedida is None or pedida not in cohortes or pedida == nombre:
+        raise PreventUpdate
+    return pedida, dash.no_update
+
+
+# Otra cohorte tiene otras categorías: se cambian las opciones y se limpian los filtros
+@app.callback(
+    [Output(id_filtro, "options") for id_filtro, _, _ in FILTROS],
+    [Output(id_filtro, "value") for id_filtro, _, _ in FILTROS],
+    Input("cohorte", "value"),
+    prevent_initial_call=True,
+)
+def opciones_cohorte(nombre):
+    tabla_cohorte = estado_datos(nombre).tabla
+    return [opciones_filtro(tabla_cohorte, dim) for _, dim, _ in FILTROS] + [[] for _ in FILTROS]
+
+
+def seleccion_filtros(valores):
+    return {dim: v for (_, dim, _), v in zip(FILTROS, valores)}
+
+
+# Modo vivo: consulta barata de la versión; si no cambió no se envía nada
+if MODO_VIVO:
+    @app.callback(
+        Output("version-datos", "data"),
+        Input("intervalo-datos", "n_intervals"),
+        State("version-datos", "data"),
+        State("cohorte", "value"),
+    )
+    def revisar_datos(_, version_cliente, nombre):
+        version = cohorte_actual(nombre).ingesta.revisar()
+        if version == version_cliente:
+            raise PreventUpdate
+        return version
+
+
+@app.callback(
+    Output("resumen-filtros", "children"),
+    [Input(id_filtro, "value") for id_filtro, _, _ in FILTROS],
+    Input("version-datos", "data"),
+    Input("cohorte", "value"),
+)
+def resumen_filtros(*args):
+    *valores, _, nombre = args
+    tabla_actual = estado_datos(nombre).tabla
+    n = tabla_actual.total(tabla_actual.mascara(seleccion_filtros(valores)))
+    return f"{n} estudiantes en la selección"
+
+
+# Callbacks de filtros, uno por pestaña: máscara sobre el cubo precalculado →
+# bincount → Patch de las figuras de esa pestaña (solo viajan los datos nuevos).
+# Se disparan también al montar la pestaña, para que llegue ya filtrada, y
+# cuando cambia la versión de los datos en modo vivo.
+def parches_pestana(nombres, valores, nombre, avance=lambda paso: None):
+    """Patch de las figuras `nombres` con los filtros `valores`. `avance`
+    recibe una descripción de cada paso (progreso de los trabajos en fondo)."""
+    estado = estado_datos(nombre)
+    seleccion = seleccion_filtros(valores)
+    if not any(seleccion.values()):
+        if ctx.triggered_id is None and estado.version == 0:
+            # Pestaña recién montada sin filtros ni datos nuevos: la figura
+            # servida ya es la correcta
+            return [dash.no_update] * len(nombres)
+        # Sin filtros: agregados y momentos que la ingesta mantiene al día
+        agg_actual, corr = estado.agg, estado.momentos.correlacion()
+        mascara = None
+    else:
+        avance("Recalculando agregados del subconjunto…")
+        mascara = estado.tabla.mascara(seleccion)
+        agg_actual = estado.tabla.agregados(mascara)
+        if "fig_corr" in nombres:
+            avance("Calculando correlaciones…")
+        corr = estado.tabla.correlacion(mascara) if "fig_corr" in nombres else None
+    if "fig_asociacion" in nombres:
+        avance("Calculando asociaciones (chi-cuadrado y V de Cramér)…")
+    asoc = asociaciones(estado.tabla, mascara) if "fig_asociacion" in nombres else None
+    avance("Actualizando figuras…")
+    parches = parches_figuras(agg_actual, corr, nombres, asoc)
+    return [parches[nombre] for nombre in nombres]
+
+
+# Con TRABAJOS_FONDO=1 los callbacks de PESTANAS_PESADAS corren en los procesos
+# de trabajo: las peticiones idénticas comparten un solo cálculo, el avance se
+# muestra bajo los filtros y cambiar de pestaña cancela el que quedó en curso
+gestor_trabajos = GestorTrabajos(
+    os.environ.get("TRABAJOS_DB", ".cache/trabajos.sqlite"),
+    procesos=TRABAJOS_PROCESOS,
+    retencion=int(os.environ.get("TRABAJOS_RETENCION", 300)),
+) if TRABAJOS_FONDO else None
+
+
+def registrar_filtros_pestana(valor_pestana, nombres):
+    dependencias = (
+        [Output(nombre, "figure") for nombre in nombres],
+        [Input(id_filtro, "value") for id_filtro, _, _ in FILTROS],
+        Input("version-datos", "data"),
+        Input("cohorte", "value"),
+    )
+    if gestor_trabajos is None or valor_pestana not in PESTANAS_PESADAS:
+        @app.callback(*dependencias)
+        def actualizar_filtros(*args):
+            *valores, _, nombre = args
+            return parches_pestana(nombres, valores, nombre)
+        return
+
+    # La pestaña va en los argumentos para que la clave del trabajo (hash de
+    # la función y sus argumentos) no se repita entre pestañas con los mismos
+    # filtros. El Input que disparó el callback también va en la clave: montar
+    # la pestaña sin filtros devuelve no_update, y quitar todos los filtros
+    # (mismos argumentos) no debe recibir ese resultado guardado
+    @app.callback(
+        *dependencias,
+        State("pestanas", "value"),
+        background=True,
+        manager=gestor_trabajos,
+        cache_ignore_triggered=False,
+        progress=[Output("progreso-calculo", "children")],
+        progress_default=[""],
+        cancel=[Input("pestanas", "value")],
+        interval=TRABAJOS_INTERVALO_MS,
+    )
+    def actualizar_filtros_fondo(set_progress, *args):
+        *valores, _, nombre, _ = args
+        if MODO_VIVO:
+            # El proceso de trabajo tiene su propia copia de la ingesta: se pone al día
+            cohorte_actual(nombre).ingesta.revisar()
+        return parches_pestana(nombres, valores, nombre, avance=set_progress)
+
+
+for valor_pestana, nombres_pestana in FIGURAS_POR_PESTANA.items():
+    registrar_filtros_pestana(valor_pestana, nombres_pestana)
+
+
+# Distribuciones de la Pestaña 1: mismos filtros, bins contados en el servidor
+@app.callback(
+    Output("fig_edad", "figure"),
+    Output("fig_linea_tiempo", "figure"),
+    [Input(id_filtro, "value") for id_filtro, _, _ in FILTROS],
+    Input("granularidad-tiempo", "value"),
+    Input("version-datos", "data"),
+    Input("cohorte", "value"),
+)
+def actualizar_distribuciones(*args):
+    *valores, granularidad, _, nombre = args
+    estado = estado_datos(nombre)
+    seleccion = seleccion_filtros(valores)
+    if (ctx.triggered_id is None and not any(seleccion.values())
+            and estado.version == 0 and granularidad == GRANULARIDAD_INICIAL):
+        return dash.no_update, dash.no_update
+    mascara_edad = estado.tabla.mascara(seleccion)
+    mascara_tiempo = estado.tiempo.mascara(seleccion)
+    return (
+        parche_edad(*histograma_edad(estado.tabla, mascara_edad)),
+        parche_linea_tiempo(*linea_tiempo(estado.tiempo, mascara_tiempo, granularidad, RESOLUCION_TIEMPO)),
+    )
 
-    html.H2("Consideraciones y limitaciones del estudio", style={"fontWeight": "bold"}),
 
-    html.P(
-        "Cabe resaltar que, aunque el conjunto de datos proporciona información valiosa sobre la relación entre "
-        "la salud mental y diversos factores académicos y personales de los estudiantes universitarios, es importante "
-        "reconocer ciertas limitaciones que pueden influir en la interpretación de los resultados. Dentro de estas "
-        "consideraciones encontramos:"
-    ),
+# Callback de la exploración de casos: AND/OR de mapas de bits y solo se
+# decodifican las filas de la página visible
+@app.callback(
+    Output("tabla-casos", "data"),
+    Output("tabla-casos", "page_count"),
+    Output("tabla-casos", "page_current"),
+    Output("conteo-casos", "children"),
+    [Input(id_filtro, "value") for id_filtro, _, _ in FILTROS],
+    Input("filtro-sintomas", "value"),
+    Input("filtro-tratamiento", "value"),
+    Input("filtro-edad", "value"),
+    Input("tabla-casos", "page_current"),
+    Input("tabla-casos", "page_size"),
+    Input("version-datos", "data"),
+    Input("cohorte", "value"),
+)
+def explorar_casos(*args):
+    *valores, sintomas, tratamiento, edades, pagina, tamano, _, nombre = args
+    estado = estado_datos(nombre)
+    if estado.indice is None:
+        return [], 0, 0, "La exploración de casos no está disponible en modo streaming."
+
+    condiciones = seleccion_filtros(valores)
+    condiciones["busco_tratamiento_especialista"] = tratamiento
+    condiciones["rango_edad"] = edades
+    for col in sintomas:
+        condiciones[col] = [1]
+
+    conjunto = estado.indice.consulta(condiciones)
+    total = estado.indice.contar(conjunto)
+    # Cualquier cambio de filtro vuelve a la primera página (los datos nuevos no)
+    if ctx.triggered_id not in ("tabla-casos", "version-datos"):
+        pagina = 0
+    posiciones = estado.indice.filas(conjunto, pagina * tamano, tamano)
+
+    filas = estado.filas.tomar(posiciones).copy()
+    if "fecha_registro" in filas:
+        filas["fecha_registro"] = filas["fecha_registro"].dt.strftime("%Y-%m-%d %H:%M")
+    paginas = max(1, -(-total // tamano))
+    return filas.to_dict("records"), paginas, pagina, f"{total} respuestas cumplen las condiciones"
+
+
+# PRECALENTAR_PAQUETES=1 comprime los paquetes al arrancar (con preload de
+# gunicorn los workers heredan el resultado). Va al final, con todos los
+# callbacks ya registrados, porque simula la primera visita a la app.
+if compresion is not None and os.environ.get("PRECALENTAR_PAQUETES", "0") == "1":
+    with metricas.etapa("bloque3_precalentar_paquetes"):
+        print("Paquetes precomprimidos:", compresion.precalentar(app.server))
+print("\nEtapas del layout:\n" + metricas.resumen(""))
 
-    html.Ul([
-        html.Li(
-            "Las respuestas son auto-reportadas y pueden incluir sesgos de percepción o de deseabilidad social, "
-            "afectando la precisión de los datos."
-        ),
-        html.Li(
-            "El tamaño y la representatividad de la muestra (102 estudiantes) no es suficiente para generalizar "
-            "los resultados a toda la población universitaria."
-        ),
-        html.Li(
-            "La ausencia de variables relevantes no registradas, como factores socioeconómicos, antecedentes "
-            "clínicos, consumo de sustancias, redes de apoyo familiar y social, o carga académica real."
-        ),
-        html.Li(
-            "El uso de preguntas dicotómicas simplifica condiciones que, en la práctica, requieren evaluación "
-            "y diagnóstico clínico, lo cual puede limitar la profundidad e interpretación de los resultados."
-        ),
-    ]),
-
-    html.Br(),
-]),
-        # ---------------- Pestaña 7: Conclusiones y recomendaciones ----------------
-dcc.Tab(label="7. Conclusiones y recomendaciones", children=[
-    html.Br(),
-
-    html.H2("Puntos de mejora y de recomendación", style={"fontWeight": "bold"}),
-    html.P(
-        "Con el fin de proceder a fortalecer el bienestar y salud mental estudiantil, se podría enfatizar en "
-        "realizar acciones estratégicas y de mejora encaminadas a la detección temprana y el acompañamiento oportuno. "
-        "Entre estas acciones, los tamizajes periódicos en programas o cohortes con mayor vulnerabilidad permitirían "
-        "identificar a tiempo a los estudiantes que requieren apoyo. De igual forma, es esencial mejorar el acceso "
-        "a los servicios de salud mental mediante campañas institucionales que reduzcan el estigma, amplíen la "
-        "información disponible y faciliten rutas ágiles hacia la atención psicológica o psiquiátrica. "
-        "Estas iniciativas deben complementarse con una revisión de las cargas académicas y con la incorporación "
-        "de talleres de manejo del estrés y habilidades socioemocionales en momentos críticos del semestre, "
-        "favoreciendo el equilibrio entre rendimiento y bienestar. Asimismo, la capacitación docente en señales "
-        "de alerta y derivación adecuada permitirá una respuesta más rápida y efectiva ante situaciones emergentes. "
-        "Finalmente, establecer un sistema de seguimiento y evaluación de los casos y de las intervenciones "
-        "posibilitará medir su impacto sobre la permanencia estudiantil y el desempeño académico, consolidando "
-        "un entorno universitario más saludable y preventivo."
-    ),
-    html.Br(),
-    html.H2("Conclusiones", style={"fontWeight": "bold"}),
-    html.P(
-        "El análisis realizado permite comprender que la salud mental de los estudiantes universitarios es un aspecto "
-        "profundamente ligado a su experiencia académica y personal. Los resultados evidencian una presencia "
-        "significativa de síntomas como depresión, ansiedad y ataques de pánico, así como relaciones importantes entre "
-        "estos trastornos y variables como el programa de estudio o el año académico, lo que sugiere que determinadas "
-        "etapas y exigencias aumentan la vulnerabilidad emocional. Adicionalmente, se identifica una brecha "
-        "preocupante entre la aparición de síntomas y la búsqueda de apoyo profesional, lo cual señala la existencia "
-        "de barreras que limitan el acceso oportuno a servicios de salud mental. En conjunto, estos hallazgos resaltan "
-        "la necesidad de que las instituciones educativas reconozcan la salud mental como un elemento central del "
-        "bienestar y rendimiento estudiantil, promoviendo acciones preventivas, acompañamiento oportuno y condiciones "
-        "académicas que favorezcan la estabilidad emocional. De esta manera, se contribuye no solo a mejorar el "
-        "desempeño académico, sino también a fomentar una formación integral que responda a las necesidades reales "
-        "de los estudiantes y fortalezca su permanencia y desarrollo personal."
-        )
-    ]),
-    html.Br(),
-    ])
-])
 
 # %% [markdown]
 # # Bloque 4 – Ejecutar la app localmente
@@ -821,8 +601,8 @@ dcc.Tab(label="7. Conclusiones y recomendaciones", children=[
 # =============================================================================
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8050))
+    # Procesos de los callbacks en fondo, antes de que el servidor cree hilos
+    # (con gunicorn los crea when_ready: ver gunicorn.conf.py y trabajos.py)
+    if gestor_trabajos is not None:
+        gestor_trabajos.iniciar()
     app.run(host="0.0.0.0", port=port, debug=False)
-
-
-
-
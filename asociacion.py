@@ -0,0 +1,168 @@
+# Asociación entre todas las variables categóricas (Pestaña 5)
+# DataFrame.corr() solo admite la edad y las banderas Sí/No; el género, el
+# programa, el año, el promedio y el estado civil quedan fuera. Aquí cada par
+# de variables se resume con su tabla de contingencia, la prueba chi-cuadrado
+# de independencia y la V de Cramér con corrección de sesgo (Bergsma, 2013).
+#
+# Las tablas de todos los pares salen de una sola pasada sobre los códigos ya
+# factorizados de TablaConteos: cada fila se codifica en one-hot (una columna
+# por categoría de cada variable, ninguna si el valor es nulo) y la matriz de
+# Burt X'WX suma a la vez todas las tablas cruzadas, cada par en su bloque.
+# Las filas se procesan por lotes para acotar la memoria; agregar una pregunta
+# a la encuesta agrega columnas a X, no otro recorrido de los datos.
+#
+# El valor p usa la función gamma incompleta regularizada implementada aquí
+# (serie y fracción continua, Numerical Recipes §6.2) para no depender de scipy.
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from agregados import BANDERAS, ESTADOS, NULO
+
+LOTE = 1 << 16
+
+# Tablas de resultados (DataFrames variables × variables) y tamaño de cada par
+Asociaciones = namedtuple("Asociaciones", "cramer p chi2 gl n")
+
+
+# %%
+# Códigos por variable
+def variables(tabla):
+    """[(nombre, códigos con -1 como nulo, número de categorías)] de las
+    dimensiones de `tabla` y de las banderas de síntomas y tratamiento."""
+    resultado = [
+        (dim, codigos, len(tabla.etiquetas[dim])) for dim, codigos in tabla.codigos.items()
+    ]
+    for i, flag in enumerate(BANDERAS):
+        estado = tabla.combo // ESTADOS ** (len(BANDERAS) - 1 - i) % ESTADOS
+        resultado.append((flag, np.where(estado == NULO, -1, estado), 2))
+    return resultado
+
+
+def tabla_burt(variables_tabla, pesos=None, mascara=None, lote=LOTE):
+    """Matriz de Burt (categorías × categorías) ponderada por `pesos`: el
+    bloque de dos variables es su tabla de contingencia sobre las filas donde
+    ambas tienen valor."""
+    sel = slice(None) if mascara is None else mascara
+    codigos = [c[sel] for _, c, _ in variables_tabla]
+    inicios = np.cumsum([0] + [k for _, _, k in variables_tabla])
+    w = None if pesos is None else pesos[sel]
+    n = len(codigos[0]) if codigos else 0
+
+    burt = np.zeros((inicios[-1], inicios[-1]))
+    for desde in range(0, n, lote):
+        hasta = min(desde + lote, n)
+        filas = np.arange(hasta - desde)
+        x = np.zeros((hasta - desde, inicios[-1]))
+        for c, inicio in zip(codigos, inicios):
+            trozo = c[desde:hasta]
+            validos = trozo >= 0
+            x[filas[validos], inicio + trozo[validos]] = 1.0
+        wx = x if w is None else x * w[desde:hasta, None]
+        burt += wx.T @ x
+    return burt, inicios
+
+
+# %%
+# Chi-cuadrado y V de Cramér
+def _gamma_p_serie(a, x):
+    """P(a, x) por su serie de potencias (converge rápido para x < a + 1)."""
+    termino = suma = 1.0 / a
+    ap = a
+    for _ in range(1000):
+        ap += 1
+        termino *= x / ap
+        suma += termino
+        if abs(termino) < abs(suma) * 1e-15:
+            break
+    return suma * math.exp(-x + a * math.log(x) - math.lgamma(a))
+
+
+def _gamma_q_fraccion(a, x):
+    """Q(a, x) por fracción continua (método de Lentz, para x >= a + 1)."""
+    minimo = 1e-300
+    b = x + 1 - a
+    c = 1 / minimo
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = minimo if abs(d) < minimo else d
+        c = b + an / c
+        c = minimo if abs(c) < minimo else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(-x + a * math.log(x) - math.lgamma(a)) * h
+
+
+def gamma_q(a, x):
+    """Función gamma incompleta superior regularizada Q(a, x) = Γ(a, x) / Γ(a)."""
+    if x <= 0:
+        return 1.0
+    if x < a + 1:
+        return max(0.0, 1.0 - _gamma_p_serie(a, x))
+    return _gamma_q_fraccion(a, x)
+
+
+def valor_p_chi2(chi2, gl):
+    """P(X >= chi2) para X ~ chi-cuadrado con `gl` grados de libertad."""
+    if gl <= 0 or not np.isfinite(chi2):
+        return np.nan
+    return gamma_q(gl / 2, chi2 / 2)
+
+
+def prueba_par(contingencia):
+    """(chi2, grados de libertad, n, V de Cramér corregida) de una tabla de
+    contingencia. Las filas y columnas vacías no cuentan como categorías."""
+    contingencia = contingencia[contingencia.sum(axis=1) > 0][:, contingencia.sum(axis=0) > 0]
+    n = contingencia.sum()
+    r, k = contingencia.shape
+    if n <= 1 or r < 2 or k < 2:
+        return np.nan, 0, n, np.nan
+
+    esperado = np.outer(contingencia.sum(axis=1), contingencia.sum(axis=0)) / n
+    chi2 = float(((contingencia - esperado) ** 2 / esperado).sum())
+
+    phi2 = max(0.0, chi2 / n - (k - 1) * (r - 1) / (n - 1))
+    r_corr = r - (r - 1) ** 2 / (n - 1)
+    k_corr = k - (k - 1) ** 2 / (n - 1)
+    denominador = min(k_corr - 1, r_corr - 1)
+    v = math.sqrt(phi2 / denominador) if denominador > 0 else np.nan
+    return chi2, (r - 1) * (k - 1), n, v
+
+
+def asociaciones(tabla, mascara=None, lote=LOTE):
+    """Chi-cuadrado, valor p y V de Cramér de todos los pares de variables
+    categóricas del subconjunto `mascara` de `tabla`."""
+    vars_tabla = variables(tabla)
+    burt, inicios = tabla_burt(vars_tabla, tabla.pesos, mascara, lote)
+    nombres = [nombre for nombre, _, _ in vars_tabla]
+    m = len(nombres)
+
+    cramer, p, chi2, gl, n = (np.full((m, m), np.nan) for _ in range(5))
+    for i in range(m):
+        for j in range(i, m):
+            bloque = burt[inicios[i]:inicios[i + 1], inicios[j]:inicios[j + 1]]
+            if i == j:
+                # Bloque diagonal: conteos por categoría; la variable consigo misma
+                n[i, i] = np.trace(bloque)
+                cramer[i, i] = 1.0 if (np.diag(bloque) > 0).sum() > 1 else np.nan
+                continue
+            c2, g, total, v = prueba_par(bloque)
+            chi2[i, j] = chi2[j, i] = c2
+            gl[i, j] = gl[j, i] = g
+            n[i, j] = n[j, i] = total
+            cramer[i, j] = cramer[j, i] = v
+            p[i, j] = p[j, i] = valor_p_chi2(c2, g)
+
+    def tabla_resultado(valores):
+        return pd.DataFrame(valores, index=nombres, columns=nombres)
+
+    return Asociaciones(*(tabla_resultado(v) for v in (cramer, p, chi2, gl, n)))
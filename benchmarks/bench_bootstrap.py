@@ -0,0 +1,74 @@
+# Intervalos bootstrap: remuestreo de filas frente a réplicas binomiales
+# Genera N filas con una columna de grupo y un indicador Sí/No y calcula el
+# intervalo percentil de la proporción de cada grupo de dos maneras: el ciclo
+# clásico (en cada réplica se remuestrean con reposición las filas de cada
+# grupo) y bootstrap.intervalos sobre los conteos (todas las réplicas en una
+# llamada a rng.binomial). Imprime el tiempo de cada uno y la diferencia
+# máxima entre los extremos, que solo debe ser ruido de Monte Carlo.
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_bootstrap.py                        # 100k filas, 5 grupos
+#   python benchmarks/bench_bootstrap.py --filas 1000000 --grupos 50 --replicas 2000
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bootstrap as bs  # noqa: E402
+
+
+def por_filas(grupos, valores, n_grupos, replicas, nivel, rng):
+    """Remuestreo de filas dentro de cada grupo, una réplica por vuelta."""
+    indices = [np.flatnonzero(grupos == g) for g in range(n_grupos)]
+    muestras = np.empty((n_grupos, replicas))
+    for b in range(replicas):
+        for g, filas in enumerate(indices):
+            muestras[g, b] = valores[rng.choice(filas, len(filas))].mean()
+    alfa = (1 - nivel) / 2
+    return np.quantile(muestras, [alfa, 1 - alfa], axis=1)
+
+
+def por_conteos(grupos, valores, n_grupos, replicas, nivel):
+    totales = np.bincount(grupos, minlength=n_grupos)
+    exitos = np.bincount(grupos, weights=valores, minlength=n_grupos).astype(np.int64)
+    return bs.intervalos(exitos, totales, replicas, nivel)
+
+
+def medir(nombre, fn):
+    t0 = time.perf_counter()
+    salida = fn()
+    segundos = time.perf_counter() - t0
+    print(f"{nombre:<24}{segundos * 1e3:12.1f} ms")
+    return salida, segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap de proporciones: filas frente a conteos")
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--grupos", type=int, default=5)
+    parser.add_argument("--replicas", type=int, default=bs.REPLICAS)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    grupos = rng.integers(0, args.grupos, args.filas)
+    valores = (rng.random(args.filas) < rng.uniform(0.1, 0.5, args.grupos)[grupos]).astype(float)
+    print(f"{args.filas:,} filas, {args.grupos} grupos, {args.replicas:,} réplicas, IC {bs.NIVEL:.0%}\n")
+
+    (bajo_f, alto_f), t_filas = medir(
+        "remuestreo de filas", lambda: por_filas(grupos, valores, args.grupos, args.replicas, bs.NIVEL, rng)
+    )
+    (bajo_c, alto_c), t_conteos = medir(
+        "binomial por conteos", lambda: por_conteos(grupos, valores, args.grupos, args.replicas, bs.NIVEL)
+    )
+    diferencia = max(np.abs(bajo_f - bajo_c).max(), np.abs(alto_f - alto_c).max())
+    print(f"\nAceleración: {t_filas / t_conteos:,.0f}x")
+    print(f"Diferencia máxima entre extremos: {diferencia:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# Micro-benchmarks por etapa: limpieza, agregación, figuras y layout
+# Cada etapa de app.py se mide por separado (tiempo mínimo y mediano de varias
+# repeticiones, y pico de memoria con tracemalloc en una corrida aparte para no
+# mezclar su sobrecosto con los tiempos) sobre CSV sintéticos de 10^2 a 10^7
+# filas generados con sintetico.py. Los resultados quedan en JSON y dos
+# corridas se pueden comparar para detectar regresiones antes de desplegar.
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_etapas.py                                   # 10^2 a 10^7 filas
+#   python benchmarks/bench_etapas.py --tamanos 100 10000 --salida base.json
+#   python benchmarks/bench_etapas.py --comparar base.json nuevo.json   # código 1 si hay regresiones
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.express as px
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import asociacion as asc  # noqa: E402
+import cubo as cb  # noqa: E402
+import distribuciones as ds  # noqa: E402
+import figuras  # noqa: E402
+import limpieza as lp  # noqa: E402
+from agregados import TablaConteos  # noqa: E402
+from cache_http import serializar  # noqa: E402
+from momentos import Momentos  # noqa: E402
+from pestanas import PESTANAS, pestana_exploracion  # noqa: E402
+from sintetico import generar  # noqa: E402
+
+TAMANOS = [10 ** k for k in range(2, 8)]
+RESULTADOS = RAIZ / "benchmarks" / "resultados"
+
+# Comparación: se marca regresión si el tiempo crece más que UMBRAL y la etapa
+# dura al menos MINIMO_SEGUNDOS en la corrida base (por debajo es ruido)
+UMBRAL = 1.25
+MINIMO_SEGUNDOS = 0.001
+
+
+# %%
+# Medición
+class Medidor:
+    """Acumula {etapa: {"segundos", "mediana", "pico_bytes"}} para un tamaño."""
+
+    def __init__(self, repeticiones, memoria=True):
+        self.repeticiones = repeticiones
+        self.memoria = memoria
+        self.resultados = {}
+
+    def etapa(self, nombre, fn, entrada=None):
+        """Mide `fn(entrada)` (o `fn()`) y devuelve su salida. La entrada se
+        copia en cada repetición porque varias etapas modifican el DataFrame."""
+        def llamar():
+            if entrada is None:
+                return fn()
+            return fn(entrada.copy() if isinstance(entrada, pd.DataFrame) else entrada)
+
+        tiempos = []
+        for _ in range(self.repeticiones):
+            gc.collect()
+            t0 = time.perf_counter()
+            salida = llamar()
+            tiempos.append(time.perf_counter() - t0)
+
+        pico = None
+        if self.memoria:
+            gc.collect()
+            tracemalloc.start()
+            llamar()
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self.registrar(nombre, tiempos, pico)
+        return salida
+
+    def registrar(self, nombre, tiempos, pico=None):
+        self.resultados[nombre] = {
+            "segundos": min(tiempos),
+            "mediana": statistics.median(tiempos),
+            "pico_bytes": pico,
+        }
+
+
+class CronometroFiguras:
+    """Envuelve px.pie / px.bar / px.imshow para medir cada figura que arma
+    `construir_figuras`, sin copiar su código."""
+
+    FUNCIONES = ("pie", "bar", "imshow")
+
+    def __init__(self):
+        self.tiempos = {}
+
+    def __enter__(self):
+        self.originales = {nombre: getattr(px, nombre) for nombre in self.FUNCIONES}
+        for nombre, original in self.originales.items():
+            setattr(px, nombre, self._envolver(original))
+        return self
+
+    def __exit__(self, *exc):
+        for nombre, original in self.originales.items():
+            setattr(px, nombre, original)
+
+    def _envolver(self, original):
+        def cronometrada(*args, **kwargs):
+            t0 = time.perf_counter()
+            fig = original(*args, **kwargs)
+            self.tiempos[id(fig)] = time.perf_counter() - t0
+            return fig
+        return cronometrada
+
+
+def medir_tamano(n, repeticiones, memoria=True, carpeta=None):
+    medidor = Medidor(repeticiones, memoria)
+    with tempfile.TemporaryDirectory(dir=carpeta) as tmp:
+        ruta = generar(Path(tmp) / f"sintetico-{n}.csv", n)
+
+        # Bloque 1: limpieza, una etapa por paso del pipeline
+        df = medidor.etapa("leer_csv", lambda: pd.read_csv(ruta))
+    df = medidor.etapa("estandarizar_columnas", lp.estandarizar_columnas, df)
+    df = medidor.etapa("tratar_nulos", lp.tratar_nulos, df)
+    df = medidor.etapa("drop_duplicates", lambda d: d.drop_duplicates().reset_index(drop=True), df)
+    df = medidor.etapa("normalizar_programa", lp.normalizar_programa, df)
+    df = medidor.etapa("normalizar_anio_cgpa", lp.normalizar_anio_cgpa, df)
+    df = medidor.etapa("mapear_si_no", lp.mapear_si_no, df)
+    df = medidor.etapa("to_datetime", lp.convertir_fechas, df)
+    df = medidor.etapa("edad_entera", lp.edad_entera, df)
+    df = medidor.etapa("traducir_columnas", lp.traducir_columnas, df)
+
+    # Bloque 2: cubo, códigos y agregados
+    cubo = medidor.etapa("construir_cubo", cb.construir_cubo, df)
+    tabla = medidor.etapa(
+        "tabla_conteos", lambda c: TablaConteos(c, pesos="n", numericas=figuras.numeric_cols), cubo
+    )
+    agg = medidor.etapa("agregados_bincount", lambda t: t.agregados(), tabla)
+    corr = medidor.etapa("correlacion_cubo", lambda t: t.correlacion(), tabla)
+    medidor.etapa("corr_pandas", lambda d: d[figuras.numeric_cols].corr(), df)
+    # Actualización incremental del mapa de calor: absorber 1000 respuestas nuevas
+    momentos = Momentos.desde_df(cubo, figuras.numeric_cols, pesos="n")
+    lote = df[figuras.numeric_cols].iloc[:1000].to_numpy(dtype=float)
+    medidor.etapa(
+        "momentos_lote_1000",
+        lambda m: m.combinar(Momentos.desde_lote(lote, columnas=m.columnas)).correlacion(),
+        momentos,
+    )
+    # Distribuciones binadas: el costo depende de las combinaciones del cubo
+    # temporal y la respuesta solo lleva los conteos de cada bin
+    tiempo = medidor.etapa("cubo_tiempo", lambda d: ds.tabla_tiempo(ds.construir_cubo_tiempo(d)), df)
+    medidor.etapa("histograma_edad", ds.histograma_edad, tabla)
+    medidor.etapa("linea_tiempo_hora", lambda t: ds.linea_tiempo(t, None, "hora"), tiempo)
+    # Asociación entre variables categóricas: matriz de Burt sobre los códigos
+    # frente a un pd.crosstab por par sobre df
+    asoc = medidor.etapa("asociacion_burt", asc.asociaciones, tabla)
+    pares = [(a, b) for i, (a, _, _) in enumerate(asc.variables(tabla))
+             for b, _, _ in asc.variables(tabla)[i + 1:]]
+    medidor.etapa(
+        "asociacion_crosstab",
+        lambda d: [asc.prueba_par(pd.crosstab(d[a], d[b]).to_numpy(dtype=float)) for a, b in pares],
+        df,
+    )
+    datos = medidor.etapa("datos_figuras", lambda a: figuras.datos_figuras(a, corr, asoc), agg)
+    # Intervalos bootstrap de todas las barras de proporciones (parte de datos_figuras)
+    medidor.etapa(
+        "intervalos_bootstrap",
+        lambda a: [figuras.series_proporciones(a, c) for c in list(figuras.PROPORCIONES) + ["help_data"]],
+        agg,
+    )
+
+    # Figuras: total y cada llamada a plotly express por separado
+    tiempos_figura = {}
+    for _ in range(repeticiones):
+        with CronometroFiguras() as crono:
+            t0 = time.perf_counter()
+            figs = figuras.construir_figuras(datos)
+            tiempos_figura.setdefault("construir_figuras", []).append(time.perf_counter() - t0)
+        vistas = set()
+        for nombre, fig in figs.items():
+            if id(fig) in crono.tiempos and id(fig) not in vistas:
+                vistas.add(id(fig))
+                tiempos_figura.setdefault(f"px:{nombre}", []).append(crono.tiempos[id(fig)])
+    for nombre, tiempos in tiempos_figura.items():
+        medidor.registrar(nombre, tiempos)
+    figs["fig_edad"] = medidor.etapa("figura_edad", lambda t: ds.figura_edad(*ds.histograma_edad(t)), tabla)
+    figs["fig_linea_tiempo"] = medidor.etapa(
+        "figura_linea_tiempo", lambda t: ds.figura_linea_tiempo(*ds.linea_tiempo(t)), tiempo
+    )
+
+    # Layout: contenido de todas las pestañas serializado a JSON
+    def serializar_pestanas(f):
+        contenido = [fn(f) for valor, _, fn in PESTANAS if valor != "exploracion"]
+        contenido.append(pestana_exploracion(list(df.columns)))
+        return serializar(contenido)
+
+    medidor.etapa("serializar_pestanas", serializar_pestanas, figs)
+    return medidor.resultados
+
+
+# %%
+# Resultados y comparación
+def metadatos(repeticiones):
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "repeticiones": repeticiones,
+    }
+
+
+def correr(tamanos, repeticiones, memoria, salida):
+    resultado = {"meta": metadatos(repeticiones), "tamanos": {}}
+    for n in tamanos:
+        print(f"\n== {n:,} filas ==")
+        etapas = medir_tamano(n, repeticiones, memoria)
+        resultado["tamanos"][str(n)] = etapas
+        for nombre, r in etapas.items():
+            pico = f"{r['pico_bytes'] / 2**20:10.1f} MiB" if r["pico_bytes"] is not None else ""
+            print(f"  {nombre:<32}{r['segundos'] * 1e3:12.2f} ms{pico}")
+        # Se guarda después de cada tamaño: una corrida larga interrumpida no se pierde
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_text(json.dumps(resultado, indent=2))
+    print(f"\nResultados en {salida}")
+
+
+def comparar(ruta_base, ruta_nueva, umbral=UMBRAL, minimo=MINIMO_SEGUNDOS):
+    """Imprime la razón nuevo/base por etapa y devuelve las regresiones."""
+    base = json.loads(Path(ruta_base).read_text())["tamanos"]
+    nueva = json.loads(Path(ruta_nueva).read_text())["tamanos"]
+    regresiones = []
+
+    for n in sorted(set(base) & set(nueva), key=int):
+        print(f"\n== {int(n):,} filas ==")
+        print(f"  {'etapa':<32}{'base ms':>12}{'nuevo ms':>12}{'razón':>9}")
+        for etapa in base[n]:
+            if etapa not in nueva[n]:
+                continue
+            antes, despues = base[n][etapa]["segundos"], nueva[n][etapa]["segundos"]
+            razon = despues / antes if antes else float("inf")
+            marca = ""
+            if razon > umbral and antes >= minimo:
+                marca = "  << regresión"
+                regresiones.append((int(n), etapa, razon))
+            print(f"  {etapa:<32}{antes * 1e3:12.2f}{despues * 1e3:12.2f}{razon:9.2f}{marca}")
+
+    print(f"\n{len(regresiones)} regresiones (umbral {umbral:.2f}x)")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks por etapa del tablero")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="no medir el pico de memoria (más rápido)")
+    parser.add_argument("--salida", type=Path,
+                        default=RESULTADOS / f"etapas-{datetime.now():%Y%m%d-%H%M%S}.json")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NUEVO"))
+    parser.add_argument("--umbral", type=float, default=UMBRAL)
+    args = parser.parse_args()
+
+    if args.comparar:
+        sys.exit(1 if comparar(*args.comparar, umbral=args.umbral) else 0)
+    correr(args.tamanos, args.repeticiones, not args.sin_memoria, args.salida)
+
+
+if __name__ == "__main__":
+    main()
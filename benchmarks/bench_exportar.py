@@ -0,0 +1,65 @@
+# Escalamiento de la exportación por lotes (exportar.py)
+# Genera varias cohortes sintéticas, las exporta con 1, 2, 4 y 8 procesos
+# (regenerando todo en cada medición) y reporta reportes por segundo y la
+# aceleración respecto a un proceso. Al final repite la corrida sin --forzar
+# para medir una exportación incremental sin cambios. Con más procesos que
+# núcleos la aceleración deja de crecer: se imprime cuántos núcleos hay.
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_exportar.py                              # 16 cohortes de 20k filas
+#   python benchmarks/bench_exportar.py --cohortes 64 --filas 100000 --por genero
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import exportar as ex  # noqa: E402
+import limpieza as lp  # noqa: E402
+from sintetico import generar  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aceleración de la exportación HTML por cohortes")
+    parser.add_argument("--cohortes", type=int, default=16)
+    parser.add_argument("--filas", type=int, default=20_000)
+    parser.add_argument("--procesos", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--por", action="append", default=[])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        # Snapshots de limpieza en la carpeta temporal (también en los procesos hijos)
+        os.environ["CACHE_DATOS"] = str(tmp / "cache")
+        lp.CACHE_DIR = tmp / "cache"
+        cohortes = {
+            f"cohorte-{k:03d}": str(generar(tmp / "csv" / f"cohorte-{k:03d}.csv", args.filas, semilla=k))
+            for k in range(args.cohortes)
+        }
+        # Los snapshots de limpieza quedan fuera de la medición: se limpian antes
+        for ruta in cohortes.values():
+            lp.load_clean_dataset(ruta)
+        print(f"{args.cohortes} cohortes de {args.filas:,} filas, {lp.procesos_disponibles()} núcleos disponibles\n")
+
+        print(f"{'procesos':<10}{'segundos':>10}{'reportes/s':>12}{'aceleración':>13}")
+        base = None
+        for procesos in args.procesos:
+            salida = tmp / "reportes"
+            t0 = time.perf_counter()
+            ex.exportar(cohortes, salida, args.por, procesos, forzar=True)
+            segundos = time.perf_counter() - t0
+            reportes = sum(len(e["archivos"]) for e in json.loads((salida / ex.MANIFIESTO).read_text()).values())
+            base = base or segundos
+            print(f"{procesos:<10}{segundos:10.2f}{reportes / segundos:12.1f}{base / segundos:13.2f}")
+
+        t0 = time.perf_counter()
+        _, saltadas = ex.exportar(cohortes, salida, args.por, args.procesos[-1])
+        print(f"\nIncremental sin cambios: {saltadas} cohortes saltadas en {time.perf_counter() - t0:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Parseo de fechas: pd.to_datetime sin formato frente a limpieza.parsear_fechas
+# Genera N marcas de tiempo con los dos formatos de la encuesta (sintetico.py)
+# y compara la llamada anterior del paso 5.5 con el parser nuevo (familia de
+# formatos detectada una vez, cada texto distinto parseado una sola vez). Para
+# cada uno imprime el tiempo, las filas por segundo y cuántas quedaron sin
+# fecha; el parser nuevo además cuenta los textos que no reconoce.
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_fechas.py                       # 10M filas
+#   python benchmarks/bench_fechas.py --filas 1000000 --dias 30
+import argparse
+import sys
+import time
+import warnings
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import limpieza as lp  # noqa: E402
+from sintetico import INICIO, ModeloEncuesta  # noqa: E402
+
+
+def medir(nombre, fn, n):
+    t0 = time.perf_counter()
+    fechas = fn()
+    segundos = time.perf_counter() - t0
+    print(f"{nombre:<34}{segundos:10.2f}{n / segundos:14,.0f}{int(fechas.isna().sum()):12,}")
+    return fechas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parseo de fechas: to_datetime frente a parsear_fechas")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--dias", type=int, default=365,
+                        help="días que abarcan las fechas (menos días, más textos repetidos)")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    modelo = ModeloEncuesta.desde_csv()
+    textos = modelo._fechas(args.filas, np.random.default_rng(args.semilla), INICIO, args.dias)
+    serie = pd.Series(textos.to_numpy(zero_copy_only=False), dtype=object)
+    del textos
+    print(f"{args.filas:,} filas, {serie.nunique():,} textos distintos, "
+          f"{modelo.p_segundos:.1%} con segundos\n")
+
+    print(f"{'método':<34}{'segundos':>10}{'filas/s':>14}{'sin fecha':>12}")
+    with warnings.catch_warnings():
+        # El formato inferido día/mes es justamente lo que se reemplaza
+        warnings.simplefilter("ignore", UserWarning)
+        antes = medir("pd.to_datetime(errors='coerce')", lambda: pd.to_datetime(serie, errors="coerce"),
+                      args.filas)
+    invalidas = Counter()
+    nuevo = medir("parsear_fechas", lambda: lp.parsear_fechas(serie, invalidas=invalidas), args.filas)
+
+    distintas = int((antes != nuevo).sum() - (antes.isna() & nuevo.isna()).sum())
+    print(f"\nFilas con fecha distinta entre ambos: {distintas:,} "
+          f"(el primero infiere el formato de la primera fila)")
+    print(f"Textos no reconocidos por parsear_fechas: {sum(invalidas.values()):,} filas")
+
+
+if __name__ == "__main__":
+    main()
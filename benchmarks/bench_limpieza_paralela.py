@@ -0,0 +1,94 @@
+# Escalamiento de la limpieza en paralelo (limpieza.limpiar_paralelo)
+# Genera un CSV sintético, lo limpia con el camino en serie
+# (limpiar_dataset sobre pd.read_csv) y en paralelo con 1, 2, 4 y 8 procesos,
+# verifica que el DataFrame resultante sea idéntico y reporta la aceleración
+# respecto a la serie. Si algún número de procesos da un resultado distinto
+# (filas, tipos o conteo de no resueltos) lo indica y termina con código 1.
+# Con más procesos que núcleos disponibles la aceleración deja de crecer: se
+# imprime cuántos núcleos tiene la máquina.
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_limpieza_paralela.py                  # 2M filas
+#   python benchmarks/bench_limpieza_paralela.py --filas 10000000 --procesos 1 2 4 8 16
+import argparse
+import sys
+import tempfile
+import time
+import warnings
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import limpieza as lp  # noqa: E402
+from sintetico import generar  # noqa: E402
+
+
+def medir(fn, repeticiones):
+    """(menor tiempo, salida de la última repetición)."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        salida = fn()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, salida
+
+
+def limpiar_serie(ruta):
+    conteo = Counter()
+    return lp.limpiar_dataset(pd.read_csv(ruta), no_resueltos=conteo), conteo
+
+
+def limpiar_en_paralelo(ruta, procesos):
+    conteo = Counter()
+    return lp.limpiar_paralelo(ruta, procesos, conteo), conteo
+
+
+def diferencias(df, conteo, esperado, conteo_serie):
+    """Qué partes del resultado en paralelo no coinciden con la serie."""
+    distinto = []
+    if not df.equals(esperado):
+        distinto.append("filas")
+    if not df.dtypes.equals(esperado.dtypes):
+        distinto.append("tipos")
+    if conteo != conteo_serie:
+        distinto.append("no resueltos")
+    return distinto
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aceleración de la limpieza en paralelo")
+    parser.add_argument("--filas", type=int, default=2_000_000)
+    parser.add_argument("--procesos", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    # Las advertencias de inferencia de fechas del camino en serie no aportan aquí
+    warnings.simplefilter("ignore", UserWarning)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = generar(Path(tmp) / "sintetico.csv", args.filas, args.semilla)
+        print(f"{args.filas:,} filas ({ruta.stat().st_size / 2**20:,.1f} MiB), "
+              f"{lp.procesos_disponibles()} núcleos disponibles\n")
+
+        serie, (esperado, conteo_serie) = medir(lambda: limpiar_serie(ruta), args.repeticiones)
+        print(f"{'modo':<14}{'segundos':>10}{'aceleración':>13}{'filas/s':>14}  idéntico")
+        print(f"{'serie':<14}{serie:10.2f}{1:13.2f}{len(esperado) / serie:14,.0f}")
+
+        fallos = []
+        for procesos in args.procesos:
+            segundos, (df, conteo) = medir(lambda: limpiar_en_paralelo(ruta, procesos), args.repeticiones)
+            distinto = diferencias(df, conteo, esperado, conteo_serie)
+            print(f"{f'{procesos} procesos':<14}{segundos:10.2f}{serie / segundos:13.2f}"
+                  f"{len(df) / segundos:14,.0f}  {'NO (' + ', '.join(distinto) + ')' if distinto else 'sí'}")
+            if distinto:
+                fallos.append(procesos)
+
+    if fallos:
+        sys.exit(f"\nEl resultado en paralelo difiere del de la serie con {fallos} procesos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Correlación por momentos combinables (momentos.py) frente a DataFrame.corr()
+# Genera columnas numéricas con nulos repartidos al azar, una columna constante
+# y otra que solo tiene valores en algunos lotes; las absorbe lote a lote (como
+# la ingesta en vivo) y también combinando acumuladores de mitades separadas
+# (como los chunks o los procesos). Compara ambas matrices con la de pandas
+# sobre todas las filas (ya centradas, ver main): misma posición de los NaN y diferencia máxima por
+# debajo de --tolerancia; si no, termina con código 1. Imprime además el tiempo
+# de DataFrame.corr() completo y el de absorber un lote nuevo.
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_momentos.py                     # 1M filas, 10 lotes
+#   python benchmarks/bench_momentos.py --filas 100000 --lotes 50 --nulos 0.3
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from momentos import Momentos  # noqa: E402
+
+
+def datos(filas, lotes, nulos, semilla):
+    """DataFrame con columnas correlacionadas, nulos, una constante y una
+    columna vacía en todos los lotes salvo el primero."""
+    rng = np.random.default_rng(semilla)
+    base = rng.normal(size=filas)
+    df = pd.DataFrame({
+        "edad": 18 + 6 * rng.random(filas) + base,
+        "cgpa": 3 + 0.5 * base + rng.normal(scale=0.3, size=filas),
+        "depresion": (base + rng.normal(size=filas) > 0.5).astype(float),
+        "ansiedad": (rng.random(filas) < 0.3).astype(float),
+        # Valores grandes y parecidos: pone a prueba la cancelación numérica
+        "registro": 1e9 + rng.normal(scale=10, size=filas),
+        "constante": np.full(filas, 7.0),
+        "parcial": rng.normal(size=filas),
+    })
+    for col in ["edad", "cgpa", "depresion", "ansiedad", "registro"]:
+        df.loc[rng.random(filas) < nulos, col] = np.nan
+    df.loc[filas // lotes:, "parcial"] = np.nan
+    return df
+
+
+def comparar(nombre, obtenida, esperada, tolerancia):
+    """Imprime la diferencia con pandas y devuelve si está dentro de la tolerancia."""
+    nan_iguales = np.array_equal(np.isnan(obtenida), np.isnan(esperada))
+    diferencia = np.nanmax(np.abs(obtenida - esperada))
+    ok = nan_iguales and diferencia <= tolerancia
+    print(f"{nombre:<32}{diferencia:14.2e}{'sí' if nan_iguales else 'NO':>12}{'ok' if ok else 'FALLA':>8}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Momentos combinables frente a DataFrame.corr()")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--lotes", type=int, default=10)
+    parser.add_argument("--nulos", type=float, default=0.1, help="fracción de nulos por columna")
+    parser.add_argument("--tolerancia", type=float, default=1e-9)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    df = datos(args.filas, args.lotes, args.nulos, args.semilla)
+    columnas = list(df.columns)
+    partes = np.array_split(np.arange(len(df)), args.lotes)
+
+    t0 = time.perf_counter()
+    df.corr()
+    t_pandas = time.perf_counter() - t0
+    # Referencia sobre columnas centradas: la correlación no cambia al
+    # desplazar, pero DataFrame.corr() sobre "registro" (1e9 ± 10) pierde
+    # ~1e-9 por cancelación y taparía los errores propios de Momentos
+    esperada = (df - df.mean()).corr().to_numpy()
+
+    # Lote a lote, como IngestaViva
+    en_linea = Momentos(columnas)
+    for filas in partes:
+        t0 = time.perf_counter()
+        en_linea.agregar(df.iloc[filas].to_numpy())
+        t_lote = time.perf_counter() - t0
+
+    # Dos mitades acumuladas por separado y luego combinadas, como los chunks
+    mitad = len(partes) // 2
+    izquierda = sum((Momentos.desde_df(df.iloc[f], columnas) for f in partes[:mitad]), Momentos(columnas))
+    derecha = sum((Momentos.desde_df(df.iloc[f], columnas) for f in partes[mitad:]), Momentos(columnas))
+
+    print(f"{args.filas:,} filas en {args.lotes} lotes, {args.nulos:.0%} de nulos\n")
+    print(f"{'acumulador':<32}{'dif. máxima':>14}{'mismos NaN':>12}{'':>8}")
+    ok = comparar("lote a lote (agregar)", en_linea.correlacion().to_numpy(), esperada, args.tolerancia)
+    ok &= comparar("mitades combinadas (combinar)", (izquierda + derecha).correlacion().to_numpy(),
+                   esperada, args.tolerancia)
+    print(f"\nDataFrame.corr() completo: {t_pandas * 1000:.1f} ms; "
+          f"absorber un lote de {len(partes[-1]):,} filas: {t_lote * 1000:.1f} ms")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Callbacks pesados en segundo plano (trabajos.py) frente al hilo de la petición
+# Arranca app.py sobre un CSV sintético, con y sin TRABAJOS_FONDO, y mide:
+#   - la latencia de un callback barato (resumen de filtros) mientras varios
+#     hilos piden a la vez el callback pesado de la pestaña Insight con filtros
+#     distintos: en modo síncrono compiten por el GIL del proceso web; en
+#     fondo el cálculo corre en el pool y el hilo solo sondea SQLite
+#   - cuántos cálculos se hacen cuando llegan juntas peticiones idénticas
+#     (en fondo se deduplican en un solo trabajo)
+# Cada modo corre en su propio proceso porque app.py lee la configuración al
+# importarse. Con un solo núcleo el pool no puede correr en paralelo con el
+# servidor y la mejora de latencia se reduce: se imprime cuántos hay.
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_trabajos.py                          # 200k filas
+#   python benchmarks/bench_trabajos.py --filas 1000000 --hilos 8 --procesos 4
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+
+def cuerpo(app, salida, nombres, filtros, estados=()):
+    """Petición de _dash-update-component como la arma el navegador."""
+    return {
+        "output": ".." + "...".join(f"{n}.{salida}" for n in nombres) + "..",
+        "outputs": [{"id": n, "property": salida} for n in nombres],
+        "inputs": [{"id": id_filtro, "property": "value", "value": filtros.get(id_filtro, [])}
+                   for id_filtro, _, _ in app.FILTROS]
+        + [{"id": "version-datos", "property": "data", "value": 0},
+           {"id": "cohorte", "property": "value", "value": app.COHORTE_INICIAL}],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in estados],
+        "changedPropIds": ["filtro-genero.value"],
+    }
+
+
+def pedir(app, cliente, datos):
+    """Hace el callback y, si es un trabajo en fondo, sondea hasta el resultado."""
+    respuesta = cliente.post("/_dash-update-component", json=datos).get_json()
+    if "cacheKey" not in respuesta:
+        return respuesta
+    consulta = f"?cacheKey={respuesta['cacheKey']}&job={respuesta['job']}"
+    while True:
+        r = cliente.post("/_dash-update-component" + consulta, json=datos)
+        if r.status_code == 200 and "response" in (r.get_json() or {}):
+            return r.get_json()
+        time.sleep(app.TRABAJOS_INTERVALO_MS / 1000)
+
+
+def medir(hilos, repeticiones):
+    """Corre dentro del proceso hijo: imprime un JSON con los resultados."""
+    import app
+    import asociacion
+
+    # Importar app no crea los procesos de trabajo (ver trabajos.py)
+    if app.gestor_trabajos is not None:
+        app.gestor_trabajos.iniciar()
+    cliente = app.server.test_client()
+    nombres = app.FIGURAS_POR_PESTANA["insight"]
+    estados = [("pestanas", "value", "insight")] if app.gestor_trabajos is not None else []
+    programas = [o["value"] for o in app.opciones_filtro(app.tabla, "programa_academico")]
+
+    # Cálculos de asociaciones hechos en este proceso (en fondo corren en el pool)
+    calculos = [0]
+    original = asociacion.asociaciones
+
+    def contar(*args, **kwargs):
+        calculos[0] += 1
+        return original(*args, **kwargs)
+    app.asociaciones = contar
+
+    # 1. Latencia del callback barato con el pesado en curso
+    barato = cuerpo(app, "children", ["resumen-filtros"], {})
+    barato["output"], barato["outputs"] = "resumen-filtros.children", barato["outputs"][0]
+    pesados = [cuerpo(app, "figure", nombres, {"filtro-programa": [p]}, estados) for p in programas]
+    activo = threading.Event()
+    activo.set()
+
+    def cargar(k):
+        i = k
+        while activo.is_set():
+            pedir(app, app.server.test_client(), pesados[i % len(pesados)])
+            i += hilos
+
+    trabajadores = [threading.Thread(target=cargar, args=(k,)) for k in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    time.sleep(0.5)
+    latencias = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        cliente.post("/_dash-update-component", json=barato)
+        latencias.append(time.perf_counter() - t0)
+        time.sleep(0.02)
+    activo.clear()
+    for t in trabajadores:
+        t.join()
+
+    # 2. Peticiones idénticas simultáneas: en fondo, un trabajo nuevo por cálculo
+    def trabajos():
+        return sum(app.gestor_trabajos.estadisticas().values()) if app.gestor_trabajos is not None else 0
+    calculos[0], antes = 0, trabajos()
+    identica = cuerpo(app, "figure", nombres, {"filtro-genero": ["Male"]}, estados)
+    simultaneas = [threading.Thread(target=pedir, args=(app, app.server.test_client(), identica))
+                   for _ in range(hilos)]
+    for t in simultaneas:
+        t.start()
+    for t in simultaneas:
+        t.join()
+    print(json.dumps({
+        "p50": statistics.median(latencias),
+        "p95": statistics.quantiles(latencias, n=20)[-1],
+        "calculos": calculos[0] + trabajos() - antes,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia con callbacks pesados en fondo o en el hilo web")
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--hilos", type=int, default=4)
+    parser.add_argument("--procesos", type=int, default=2)
+    parser.add_argument("--repeticiones", type=int, default=40)
+    parser.add_argument("--medir", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.medir:
+        medir(args.hilos, args.repeticiones)
+        return
+
+    from limpieza import procesos_disponibles
+    from sintetico import generar
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        ruta = generar(tmp / "encuesta.csv", args.filas)
+        print(f"{args.filas:,} filas, {args.hilos} hilos pesados, {procesos_disponibles()} núcleos disponibles\n")
+        print(f"{'modo':<12}{'p50 ms':>10}{'p95 ms':>10}{'cálculos':>10}")
+        for modo, fondo in (("síncrono", "0"), ("fondo", "1")):
+            entorno = {
+                **os.environ, "RUTA_DATOS": str(ruta), "CACHE_DATOS": str(tmp / "cache"),
+                "TRABAJOS_FONDO": fondo, "TRABAJOS_DB": str(tmp / f"trabajos-{fondo}.sqlite"),
+                "TRABAJOS_PROCESOS": str(args.procesos), "TRABAJOS_INTERVALO_MS": "20",
+            }
+            salida = subprocess.run(
+                [sys.executable, __file__, "--medir", "--hilos", str(args.hilos),
+                 "--repeticiones", str(args.repeticiones)],
+                cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(salida.strip().splitlines()[-1])
+            print(f"{modo:<12}{r['p50'] * 1000:10.1f}{r['p95'] * 1000:10.1f}{r['calculos']:10d}")
+
+
+if __name__ == "__main__":
+    main()
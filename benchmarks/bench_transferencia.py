@@ -0,0 +1,100 @@
+# Tamaños de transferencia de la app antes y después de la compresión HTTP
+# Pide con el cliente de pruebas de Flask la página inicial, cada paquete JS/CSS
+# que enlaza, el layout y un callback de filtros, sin Accept-Encoding (lo que
+# recibía un visitante antes) y con gzip y brotli. Incluye los paquetes que se
+# cargan bajo demanda (plotly.js, gráficos, dropdown, tabla). Verifica además
+# que los paquetes con huella salgan con Cache-Control inmutable.
+#
+# Uso (desde la raíz del repo):  python benchmarks/bench_transferencia.py
+import contextlib
+import io
+import os
+import re
+import sys
+from pathlib import Path
+
+from dash.fingerprint import build_fingerprint
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app as tablero
+
+CODIFICACIONES = ["identity", "gzip", "br"]
+
+
+def medir(cliente, metodo, ruta, **kwargs):
+    fila = {}
+    for codificacion in CODIFICACIONES:
+        respuesta = getattr(cliente, metodo)(ruta, headers={"Accept-Encoding": codificacion}, **kwargs)
+        assert respuesta.status_code == 200, (ruta, respuesta.status_code)
+        fila[codificacion] = len(respuesta.get_data())
+        fila["cache"] = respuesta.headers.get("Cache-Control", "")
+    return fila
+
+
+def cuerpo_callback():
+    """Petición de _dash-update-component como la que manda el navegador al
+    elegir un género en el filtro. Los Inputs y States salen del callback
+    registrado, así la petición sigue su firma aunque cambie."""
+    nombres = tablero.FIGURAS_POR_PESTANA["contexto"]
+    salida = ".." + "...".join(f"{n}.figure" for n in nombres) + ".."
+    callback = tablero.app.callback_map[salida]
+    # Valores que tendría el navegador; los demás filtros, vacíos
+    valores = {"filtro-genero": ["Female"], "version-datos": 0,
+               "cohorte": tablero.COHORTE_INICIAL, "pestanas": "contexto"}
+    return {
+        "output": salida,
+        "outputs": [{"id": n, "property": "figure"} for n in nombres],
+        "inputs": [{**e, "value": valores.get(e["id"], [])} for e in callback["inputs"]],
+        "changedPropIds": ["filtro-genero.value"],
+        "state": [{**e, "value": valores.get(e["id"])} for e in callback["state"]],
+    }
+
+
+def paquetes_diferidos(app, prefijo, enlazados):
+    """URLs con huella de los paquetes que el navegador pide después (chunks
+    async de dcc y plotly.js), construidas igual que las arma Dash."""
+    urls = []
+    for paquete, rutas in app.registered_paths.items():
+        modulo = sys.modules[paquete]
+        base = os.path.dirname(modulo.__file__)
+        for ruta in sorted(rutas):
+            if not ruta.endswith(".js") or "worker" in ruta:
+                continue
+            modificado = int(os.stat(os.path.join(base, ruta)).st_mtime)
+            url = f"{prefijo}_dash-component-suites/{paquete}/{build_fingerprint(ruta, modulo.__version__, modificado)}"
+            if url not in enlazados:
+                urls.append(url)
+    return urls
+
+
+def main():
+    cliente = tablero.app.server.test_client()
+    prefijo = tablero.app.config.requests_pathname_prefix
+    html = cliente.get(prefijo).get_data(as_text=True)
+    paquetes = re.findall(r'(?:src|href)="(' + re.escape(prefijo) + r'_dash-component-suites/[^"]+)"', html)
+    paquetes += paquetes_diferidos(tablero.app, prefijo, paquetes)
+
+    filas = [("página inicial", medir(cliente, "get", prefijo))]
+    filas += [(ruta.rsplit("/", 1)[-1], medir(cliente, "get", ruta)) for ruta in paquetes]
+    filas.append(("_dash-layout", medir(cliente, "get", prefijo + "_dash-layout")))
+    filas.append(("callback filtros", medir(cliente, "post", prefijo + "_dash-update-component",
+                                            json=cuerpo_callback())))
+
+    print(f"{'recurso':<45}{'sin comprimir':>14}{'gzip':>11}{'brotli':>11}  Cache-Control")
+    totales = dict.fromkeys(CODIFICACIONES, 0)
+    for nombre, fila in filas:
+        for codificacion in CODIFICACIONES:
+            totales[codificacion] += fila[codificacion]
+        print(f"{nombre[:44]:<45}{fila['identity']:>14,}{fila['gzip']:>11,}{fila['br']:>11,}  {fila['cache']}")
+    print(f"{'TOTAL (todos los paquetes)':<45}{totales['identity']:>14,}{totales['gzip']:>11,}{totales['br']:>11,}")
+    print(f"Ahorro con brotli: {1 - totales['br'] / totales['identity']:.1%}")
+
+    if tablero.compresion is not None:
+        inmutables = [n for n, f in filas[1:-2] if "immutable" in f["cache"]]
+        print(f"Paquetes con caché inmutable: {len(inmutables)} de {len(paquetes)}")
+
+
+if __name__ == "__main__":
+    main()
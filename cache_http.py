@@ -0,0 +1,215 @@
+# Respuestas HTTP pre-serializadas y pre-comprimidas
+# El layout de Dash (encabezado, filtros y barra de pestañas) no cambia entre
+# despliegues, así que se serializa a JSON una sola vez, se comprime una sola
+# vez en gzip y brotli, y se sirve con ETag fuerte. Un navegador que ya lo
+# tiene recibe 304 sin cuerpo.
+import gzip
+import hashlib
+import re
+import threading
+
+from flask import Response, request
+from plotly.io.json import to_json_plotly
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+try:
+    import orjson  # noqa: F401
+    MOTOR_JSON = "orjson"
+except ImportError:
+    MOTOR_JSON = "json"
+
+# Se revalida en cada visita (barato gracias al 304) para que un despliegue
+# nuevo se vea de inmediato
+CACHE_CONTROL = "no-cache"
+
+
+def serializar(valor):
+    """JSON de un componente o figura con el motor rápido de plotly."""
+    return to_json_plotly(valor, engine=MOTOR_JSON).encode("utf-8")
+
+
+class RespuestaPrecomprimida:
+    """Un cuerpo JSON con sus variantes comprimidas y sus ETags."""
+
+    def __init__(self, cuerpo, mimetype="application/json"):
+        self.mimetype = mimetype
+        digest = hashlib.sha256(cuerpo).hexdigest()[:32]
+        self.variantes = {"identity": (cuerpo, f'"{digest}"')}
+        self.variantes["gzip"] = (gzip.compress(cuerpo, compresslevel=9), f'"{digest}-gz"')
+        if brotli is not None:
+            self.variantes["br"] = (brotli.compress(cuerpo, quality=11), f'"{digest}-br"')
+        self.etags = {etag for _, etag in self.variantes.values()}
+
+    def tamanos(self):
+        return {codificacion: len(cuerpo) for codificacion, (cuerpo, _) in self.variantes.items()}
+
+    def elegir(self):
+        """Mejor codificación disponible según Accept-Encoding."""
+        aceptadas = request.accept_encodings
+        for codificacion in ("br", "gzip"):
+            if codificacion in self.variantes and aceptadas[codificacion]:
+                return codificacion
+        return "identity"
+
+    def responder(self):
+        codificacion = self.elegir()
+        cuerpo, etag = self.variantes[codificacion]
+        cabeceras = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        # El contenido es el mismo en todas las codificaciones: cualquiera de
+        # nuestras ETags en If-None-Match vale como "ya lo tengo"
+        enviadas = {e.strip() for e in request.headers.get("If-None-Match", "").split(",")}
+        if enviadas & self.etags or "*" in enviadas:
+            return Response(status=304, headers=cabeceras)
+
+        if codificacion != "identity":
+            cabeceras["Content-Encoding"] = codificacion
+        return Response(cuerpo, mimetype=self.mimetype, headers=cabeceras)
+
+
+class CacheRespuestas:
+    """Intercepta rutas GET del servidor Flask y las responde desde memoria.
+
+    `registrar(ruta, generador)` asocia una ruta con una función que devuelve
+    los bytes del cuerpo; se llama una vez (o tras `invalidar`) y el resultado
+    queda comprimido para todas las peticiones siguientes.
+    """
+
+    def __init__(self, server):
+        self.generadores = {}
+        self.respuestas = {}
+        self.lock = threading.Lock()
+        server.before_request(self._interceptar)
+
+    def registrar(self, ruta, generador, precalcular=True):
+        self.generadores[ruta] = generador
+        if precalcular:
+            self.obtener(ruta)
+
+    def obtener(self, ruta):
+        respuesta = self.respuestas.get(ruta)
+        if respuesta is None:
+            with self.lock:
+                respuesta = self.respuestas.get(ruta)
+                if respuesta is None:
+                    respuesta = RespuestaPrecomprimida(self.generadores[ruta]())
+                    self.respuestas[ruta] = respuesta
+        return respuesta
+
+    def invalidar(self, ruta=None):
+        with self.lock:
+            if ruta is None:
+                self.respuestas.clear()
+            else:
+                self.respuestas.pop(ruta, None)
+
+    def _interceptar(self):
+        if request.method == "GET" and request.path in self.generadores:
+            return self.obtener(request.path).responder()
+        return None
+
+
+# %%
+# Compresión del resto de respuestas y caché inmutable de los paquetes de Dash
+# Los paquetes JS/CSS (dash, react, plotly.js) llevan huella de versión en la
+# URL, así que su contenido nunca cambia: se comprimen una vez por proceso con
+# nivel alto y se marcan como inmutables. Las respuestas de los callbacks
+# cambian en cada petición y se comprimen al vuelo con un nivel rápido.
+MIMETYPES_COMPRIMIBLES = {
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/css",
+    "text/html",
+    "text/plain",
+    "image/svg+xml",
+}
+
+# (gzip, brotli) para contenido estático y para contenido dinámico
+NIVELES_ESTATICOS = (9, 9)
+NIVELES_DINAMICOS = (6, 4)
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+
+
+class CompresionHTTP:
+    """Hook after_request que comprime según Accept-Encoding.
+
+    `minimo` es el tamaño en bytes por debajo del cual no vale la pena
+    comprimir y `algoritmos` el orden de preferencia ("br", "gzip").
+    Las rutas bajo `prefijo_estatico` (paquetes con huella) se guardan ya
+    comprimidas en `estaticos` y reciben Cache-Control inmutable.
+    """
+
+    def __init__(self, server, prefijo_estatico, minimo=1024, algoritmos=("br", "gzip")):
+        self.prefijo_estatico = prefijo_estatico
+        self.minimo = minimo
+        self.algoritmos = [a for a in algoritmos if a != "br" or brotli is not None]
+        self.estaticos = {}
+        self.lock = threading.Lock()
+        server.after_request(self._comprimir)
+
+    @staticmethod
+    def _codificar(cuerpo, codificacion, niveles):
+        if codificacion == "br":
+            return brotli.compress(cuerpo, quality=niveles[1])
+        return gzip.compress(cuerpo, compresslevel=niveles[0])
+
+    def _elegir(self):
+        aceptadas = request.accept_encodings
+        for codificacion in self.algoritmos:
+            if aceptadas[codificacion]:
+                return codificacion
+        return None
+
+    def _comprimir(self, respuesta):
+        estatico = request.path.startswith(self.prefijo_estatico)
+        # Dash solo pone max-age a los paquetes con huella; se agrega immutable
+        # para que el navegador no los revalide ni al recargar
+        if estatico and respuesta.cache_control.max_age:
+            respuesta.headers["Cache-Control"] = CACHE_INMUTABLE
+
+        if (
+            respuesta.status_code != 200
+            or respuesta.direct_passthrough
+            or "Content-Encoding" in respuesta.headers
+            or respuesta.mimetype not in MIMETYPES_COMPRIMIBLES
+        ):
+            return respuesta
+
+        respuesta.vary.add("Accept-Encoding")
+        codificacion = self._elegir()
+        cuerpo = respuesta.get_data()
+        if codificacion is None or len(cuerpo) < self.minimo:
+            return respuesta
+
+        if estatico:
+            clave = (request.path, codificacion)
+            comprimido = self.estaticos.get(clave)
+            if comprimido is None:
+                with self.lock:
+                    comprimido = self.estaticos.get(clave)
+                    if comprimido is None:
+                        comprimido = self._codificar(cuerpo, codificacion, NIVELES_ESTATICOS)
+                        self.estaticos[clave] = comprimido
+        else:
+            comprimido = self._codificar(cuerpo, codificacion, NIVELES_DINAMICOS)
+
+        respuesta.set_data(comprimido)
+        respuesta.headers["Content-Encoding"] = codificacion
+        return respuesta
+
+    def precalentar(self, server, ruta_inicio="/"):
+        """Pide la página inicial y cada paquete que enlaza para dejarlos
+        comprimidos en memoria (con preload, antes del fork de los workers)."""
+        cliente = server.test_client()
+        html = cliente.get(ruta_inicio).get_data(as_text=True)
+        rutas = re.findall(r'(?:src|href)="(' + re.escape(self.prefijo_estatico) + r'[^"]+)"', html)
+        for ruta in rutas:
+            for codificacion in self.algoritmos:
+                cliente.get(ruta, headers={"Accept-Encoding": codificacion})
+        return len(rutas)
@@ -0,0 +1,196 @@
+# Varias cohortes (universidades, semestres) servidas por la misma app
+# Cada cohorte es un CSV de la encuesta; su nombre es el del archivo sin
+# extensión. La app elige la cohorte por la URL (?cohorte=...) o con el
+# selector del encabezado y todos los callbacks leen de ella.
+#
+# Preparar una cohorte (limpieza, cubo, agregados y figuras) es caro, así que
+# las ya preparadas se guardan en CacheCohortes, un LRU acotado por memoria:
+# cada entrada estima sus bytes (DataFrame limpio, arreglos de la TablaConteos
+# y del índice, JSON de las figuras y de las pestañas ya armadas; en modo vivo
+# los datos se vuelven a medir con cada lote ingerido). El tamaño de cada
+# entrada se guarda y solo se revisa el límite cuando entra una cohorte o una
+# crece (arma una pestaña o ingiere un lote), no en cada acierto: al pasarlo se
+# desalojan las menos usadas recientemente. Si varias peticiones piden a la vez
+# una cohorte que no está, solo la primera la prepara y las demás esperan su
+# resultado (single-flight), así el mismo archivo no se limpia dos veces.
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache_http import serializar
+from pestanas import PESTANAS, CachePestanas, pestana_exploracion
+
+
+def descubrir_cohortes(carpeta):
+    """{nombre: ruta} de los CSV de `carpeta` (vacío si no existe)."""
+    if not carpeta or not Path(carpeta).is_dir():
+        return {}
+    return {ruta.stem: str(ruta) for ruta in sorted(Path(carpeta).glob("*.csv"))}
+
+
+def bytes_objeto(obj, vistos=None):
+    """Memoria aproximada de los arreglos y DataFrames alcanzables desde `obj`
+    (atributos, tuplas, listas y diccionarios); el resto no se cuenta."""
+    vistos = set() if vistos is None else vistos
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum()) if isinstance(uso, pd.Series) else int(uso)
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, dict):
+        return sum(bytes_objeto(v, vistos) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(bytes_objeto(v, vistos) for v in obj)
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return bytes_objeto(vars(obj), vistos)
+    return 0
+
+
+class Cohorte:
+    """Lo que la app sirve de un conjunto de datos: el estado que leen los
+    callbacks (o la ingesta en vivo que lo mantiene), las figuras completas y
+    el contenido serializado de sus pestañas."""
+
+    def __init__(self, nombre, ruta, estado, figs, columnas_casos, ingesta=None, precargar=False):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.estado_inicial = estado
+        self.figs = figs
+        self.ingesta = ingesta
+        # Lo asigna CacheCohortes: se llama con el nombre cuando la cohorte crece
+        self.al_crecer = None
+        constructores = {valor: (lambda f=fn: f(figs)) for valor, _, fn in PESTANAS}
+        constructores["exploracion"] = lambda: pestana_exploracion(columnas_casos)
+        self.pestanas = CachePestanas(constructores, precargar=precargar, al_armar=self._crecio)
+        # Las figuras completas no cambian: se miden una vez, por su JSON
+        self.bytes_figuras = sum(len(serializar(fig)) for fig in figs.values())
+        self.bytes_datos = bytes_objeto(estado)
+        if ingesta is not None:
+            ingesta.al_publicar = self._datos_nuevos
+
+    @property
+    def estado(self):
+        return self.ingesta.estado if self.ingesta is not None else self.estado_inicial
+
+    def _datos_nuevos(self, estado):
+        """La ingesta en vivo publicó un lote: se vuelven a medir los datos."""
+        self.bytes_datos = bytes_objeto(estado)
+        self._crecio()
+
+    def _crecio(self):
+        if self.al_crecer is not None:
+            self.al_crecer(self.nombre)
+
+    def tamano(self):
+        """Bytes estimados, con las medidas ya guardadas (no recorre los datos)."""
+        return self.bytes_datos + self.bytes_figuras + self.pestanas.tamano()
+
+
+class _Carga:
+    """Una preparación en curso que otras peticiones pueden esperar."""
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class CacheCohortes:
+    """LRU de cohortes preparadas con límite de memoria.
+
+    `rutas` asocia cada nombre con su CSV y `cargar(nombre, ruta)` devuelve
+    la Cohorte. Las cohortes de `fijas` nunca se desalojan (la inicial, que
+    la app ya tiene en memoria). Si una sola cohorte pasa del límite se
+    conserva igual: es la que se está sirviendo.
+    """
+
+    def __init__(self, rutas, cargar, limite_bytes, fijas=()):
+        self.rutas = dict(rutas)
+        self.cargar = cargar
+        self.limite_bytes = limite_bytes
+        self.fijas = set(fijas)
+        self.entradas = OrderedDict()
+        self.cargas = {}
+        self.lock = threading.Lock()
+        self.aciertos = self.fallos = self.esperas = self.desalojos = 0
+
+    def __contains__(self, nombre):
+        return isinstance(nombre, str) and nombre in self.rutas
+
+    def obtener(self, nombre):
+        with self.lock:
+            cohorte = self.entradas.get(nombre)
+            if cohorte is not None:
+                self.entradas.move_to_end(nombre)
+                self.aciertos += 1
+                return cohorte
+            carga = self.cargas.get(nombre)
+            propia = carga is None
+            if propia:
+                self.fallos += 1
+                carga = self.cargas[nombre] = _Carga()
+            else:
+                # Otra petición ya la está preparando: se espera su resultado
+                self.esperas += 1
+
+        if propia:
+            try:
+                carga.resultado = self.cargar(nombre, self.rutas[nombre])
+            except Exception as exc:
+                carga.error = exc
+            with self.lock:
+                del self.cargas[nombre]
+                if carga.error is None:
+                    self.entradas[nombre] = carga.resultado
+                    carga.resultado.al_crecer = self._crecio
+                    self._desalojar(conservar=nombre)
+            carga.listo.set()
+        else:
+            carga.listo.wait()
+
+        if carga.error is not None:
+            raise carga.error
+        return carga.resultado
+
+    def tamano(self):
+        return sum(c.tamano() for c in self.entradas.values())
+
+    def _crecio(self, nombre):
+        """Una cohorte en caché ocupa más memoria: se revisa el límite."""
+        with self.lock:
+            if nombre in self.entradas:
+                self._desalojar(conservar=nombre)
+
+    def _desalojar(self, conservar):
+        """Saca las menos usadas hasta volver al límite (con el lock tomado)."""
+        tamanos = {nombre: c.tamano() for nombre, c in self.entradas.items()}
+        total = sum(tamanos.values())
+        for nombre in list(self.entradas):
+            if total <= self.limite_bytes:
+                break
+            if nombre == conservar or nombre in self.fijas:
+                continue
+            del self.entradas[nombre]
+            total -= tamanos[nombre]
+            self.desalojos += 1
+            print(f"Cohorte {nombre} desalojada ({tamanos[nombre] / 2**20:.1f} MiB)")
+
+    def estadisticas(self):
+        with self.lock:
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "esperas": self.esperas,
+                "desalojos": self.desalojos,
+                "cohortes": len(self.entradas),
+                "bytes": self.tamano(),
+                "limite_bytes": self.limite_bytes,
+            }
@@ -0,0 +1,97 @@
+# Cubo de frecuencias: una fila por combinación distinta de las variables que
+# usa el tablero y una columna `n` con cuántos estudiantes la comparten.
+# Todas las cifras del Bloque 2 (conteos, sumas, proporciones y correlaciones)
+# se pueden obtener del cubo con pesos, así que sirve tanto para el DataFrame
+# completo en memoria como para la ingesta por partes de archivos enormes.
+from collections import Counter
+
+import pandas as pd
+
+from limpieza import limpiar_por_chunks, ruta_reporte_fechas, ruta_reporte_programas
+from momentos import Momentos
+from programas import escribir_reporte_no_resueltos
+
+SINTOMAS = ["tiene_depresion", "tiene_ansiedad", "tiene_ataques_panico"]
+TRATAMIENTO = "busco_tratamiento_especialista"
+
+COLUMNAS_CUBO = [
+    "genero",
+    "edad",
+    "programa_academico",
+    "año_estudio",
+    "Promedio_de_calificaciones",
+    "estado_civil",
+] + SINTOMAS + [TRATAMIENTO]
+
+
+def construir_cubo(df):
+    """Cubo de frecuencias de un DataFrame limpio."""
+    return (
+        df.groupby(COLUMNAS_CUBO, dropna=False, observed=True)
+        .size()
+        .rename("n")
+        .reset_index()
+    )
+
+
+def sumar_cubos(a, b, columnas=COLUMNAS_CUBO):
+    """Une dos cubos sumando las frecuencias de las combinaciones comunes."""
+    if a is None:
+        return b
+    return (
+        pd.concat([a, b], ignore_index=True)
+        .groupby(columnas, dropna=False, observed=True)["n"]
+        .sum()
+        .reset_index()
+    )
+
+
+def cubos_desde_csv(path, constructores, chunksize=200_000, deduplicar=True):
+    """Ingesta por partes: limpia cada chunk y lo acumula en uno o más cubos.
+
+    `constructores` asocia un nombre con la función que arma el cubo de un
+    chunk limpio (p. ej. construir_cubo); todos se llenan en la misma pasada
+    sobre el archivo. La memoria máxima depende de `chunksize` y del número
+    de combinaciones distintas de cada cubo, no del número de filas.
+    """
+    cubos = dict.fromkeys(constructores)
+    filas = 0
+    no_resueltos, fechas_invalidas = Counter(), Counter()
+    for chunk in limpiar_por_chunks(path, chunksize, deduplicar, no_resueltos, fechas_invalidas):
+        filas += len(chunk)
+        for nombre, construir in constructores.items():
+            parcial = construir(chunk)
+            cubos[nombre] = sumar_cubos(cubos[nombre], parcial, [c for c in parcial.columns if c != "n"])
+    escribir_reporte_no_resueltos(no_resueltos, ruta_reporte_programas(path))
+    escribir_reporte_no_resueltos(fechas_invalidas, ruta_reporte_fechas(path))
+    if filas == 0:
+        vacio = pd.DataFrame(columns=COLUMNAS_CUBO).assign(fecha_registro=pd.NaT)
+        cubos = {nombre: constructores[nombre](vacio) for nombre in cubos}
+    print(f"Ingesta por partes: {filas} filas, "
+          + ", ".join(f"{len(c)} combinaciones ({nombre})" for nombre, c in cubos.items())
+          + (f", {sum(fechas_invalidas.values())} fechas inválidas" if fechas_invalidas else ""))
+    return cubos
+
+
+def cubo_desde_csv(path, chunksize=200_000, deduplicar=True):
+    """Cubo de frecuencias de un CSV leído por partes."""
+    return cubos_desde_csv(path, {"cubo": construir_cubo}, chunksize, deduplicar)["cubo"]
+
+
+# %%
+# Estadísticos ponderados sobre el cubo (los conteos viven en agregados.py)
+def total_filas(cubo):
+    return int(cubo["n"].sum())
+
+
+def correlacion_ponderada(matriz, w, cols):
+    """Correlación de Pearson ponderada de las columnas de `matriz`, con
+    eliminación por pares de nulos igual que DataFrame.corr()."""
+    return Momentos.desde_lote(matriz, w, cols).correlacion()
+
+
+def correlacion(cubo, cols):
+    """Correlación de Pearson ponderada por `n` (equivale a df[cols].corr())."""
+    return correlacion_ponderada(
+        cubo[cols].to_numpy(dtype=float), cubo["n"].to_numpy(dtype=float), cols
+    )
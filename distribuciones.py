@@ -0,0 +1,169 @@
+# Distribuciones binadas en el servidor: edad y volumen de respuestas en el tiempo
+# Un histograma con una traza por fila (px.histogram sobre df) enviaría todas
+# las filas al navegador. Aquí los bins se cuentan con np.bincount sobre el cubo
+# (ponderado por `n`) y solo viajan los conteos: el tamaño de la respuesta y el
+# tiempo de dibujo dependen del número de bins, no del número de filas.
+#
+# La línea de tiempo usa un segundo cubo con la hora de registro como una
+# columna más (horas desde 1970 como número). Solo lleva las dimensiones de los
+# filtros del tablero, sin edad ni banderas de síntomas: su tamaño es el número
+# de horas con respuestas por combinación de filtros, no el de filas. Sobre él
+# se arma una TablaConteos con esas dimensiones, así los filtros se aplican con
+# la misma máscara y las respuestas nuevas del modo vivo se suman con
+# `con_filas`. En modo streaming la hora se redondea al día
+# (RESOLUCION_STREAMING): el cubo queda acotado por días × combinaciones de
+# filtros aunque el archivo crezca, y la vista por hora se muestra por día.
+# Las series se envían espaciadas de forma regular (x0 + dx),
+# sin una fecha por punto, y pasan a WebGL cuando superan UMBRAL_WEBGL puntos.
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from dash import Patch
+
+from agregados import DIMENSIONES, TablaConteos
+
+COLUMNA_HORA = "hora_registro"
+EPOCA = pd.Timestamp("1970-01-01")
+
+# Tamaño de bin en horas. Las semanas empiezan el lunes (el 1/1/1970 fue jueves)
+GRANULARIDADES = {"hora": 1, "dia": 24, "semana": 24 * 7}
+DESFASE_SEMANA = 24 * 3
+ETIQUETAS_GRANULARIDAD = {"hora": "Por hora", "dia": "Por día", "semana": "Por semana"}
+
+# Horas por bin del cubo temporal cuando solo se conserva el cubo
+RESOLUCION_STREAMING = 24
+
+ANCHO_EDAD = 1
+GRANULARIDAD_INICIAL = "dia"
+# Desde este número de puntos la serie se dibuja con scattergl (WebGL)
+UMBRAL_WEBGL = 2000
+
+
+# %%
+# Cubo temporal
+def horas_desde_epoca(fechas):
+    """Horas enteras desde 1970 como float (NaN donde no hay fecha)."""
+    return ((fechas - EPOCA) // pd.Timedelta(hours=1)).astype("float64")
+
+
+def construir_cubo_tiempo(df, resolucion=1):
+    """Cubo de frecuencias de la hora de registro por dimensión de filtro,
+    con la hora redondeada hacia abajo a múltiplos de `resolucion` horas."""
+    horas = horas_desde_epoca(df["fecha_registro"])
+    return (
+        df[DIMENSIONES]
+        .assign(**{COLUMNA_HORA: horas // resolucion * resolucion})
+        .groupby(DIMENSIONES + [COLUMNA_HORA], dropna=False, observed=True)
+        .size()
+        .rename("n")
+        .reset_index()
+    )
+
+
+def tabla_tiempo(cubo_tiempo):
+    return TablaConteos(cubo_tiempo, pesos="n", numericas=[COLUMNA_HORA], banderas=[])
+
+
+# %%
+# Kernels de binning
+def contar_bins(valores, pesos, inicio, ancho, n_bins):
+    """Suma de `pesos` en n_bins bins regulares [inicio + k·ancho, ...).
+    Los valores nulos o fuera de rango no cuentan."""
+    validos = ~np.isnan(valores)
+    posiciones = np.floor((valores[validos] - inicio) / ancho).astype(np.int64)
+    w = pesos[validos]
+    dentro = (posiciones >= 0) & (posiciones < n_bins)
+    conteos = np.bincount(posiciones[dentro], weights=w[dentro], minlength=n_bins)
+    return np.rint(conteos).astype(np.int64)
+
+
+def _columna(tabla, col, mascara):
+    sel = slice(None) if mascara is None else mascara
+    valores = tabla.matriz[sel, tabla.numericas.index(col)]
+    pesos = np.ones(len(valores)) if tabla.pesos is None else tabla.pesos[sel]
+    return valores, pesos
+
+
+def rango_edades(tabla):
+    """Bins de edad fijos para toda la sesión (del total, no de la selección),
+    para que el eje no salte al filtrar."""
+    edades = tabla.matriz[:, tabla.numericas.index("edad")]
+    if np.isnan(edades).all():
+        return 0, 0
+    inicio = np.floor(np.nanmin(edades) / ANCHO_EDAD) * ANCHO_EDAD
+    return inicio, int((np.nanmax(edades) - inicio) // ANCHO_EDAD) + 1
+
+
+def histograma_edad(tabla, mascara=None):
+    """(inicio de cada bin, conteo) de la edad en la selección."""
+    inicio, n_bins = rango_edades(tabla)
+    valores, pesos = _columna(tabla, "edad", mascara)
+    conteos = contar_bins(valores, pesos, inicio, ANCHO_EDAD, n_bins)
+    return int(inicio) + ANCHO_EDAD * np.arange(n_bins), conteos
+
+
+def linea_tiempo(tabla, mascara=None, granularidad=GRANULARIDAD_INICIAL, resolucion=1):
+    """(fecha del primer bin, tamaño del bin en horas, conteos por bin) de las
+    respuestas de la selección, sin huecos entre el primer y el último bin.
+    `resolucion` es la del cubo: no hay bins más finos que ella."""
+    paso = max(GRANULARIDADES[granularidad], resolucion)
+    desfase = DESFASE_SEMANA if granularidad == "semana" else 0
+    horas, pesos = _columna(tabla, COLUMNA_HORA, mascara)
+    con_fecha = ~np.isnan(horas) & (pesos > 0)
+    if not con_fecha.any():
+        return None, paso, np.zeros(0, dtype=np.int64)
+
+    bins = np.floor((horas[con_fecha] + desfase) / paso)
+    primero = bins.min()
+    conteos = contar_bins(bins, pesos[con_fecha], primero, 1, int(bins.max() - primero) + 1)
+    return EPOCA + pd.Timedelta(hours=primero * paso - desfase), paso, conteos
+
+
+# %%
+# Figuras y parches
+def _traza_tiempo(inicio, paso, conteos):
+    """Propiedades de la traza de la serie: tipo según el número de puntos y
+    eje x regular (x0 y dx en milisegundos) en lugar de una fecha por punto."""
+    return {
+        "type": "scattergl" if len(conteos) >= UMBRAL_WEBGL else "scatter",
+        "x0": None if inicio is None else inicio.isoformat(),
+        "dx": paso * 3_600_000,
+        "y": conteos.tolist(),
+    }
+
+
+def figura_edad(edades, conteos):
+    fig = px.bar(
+        x=edades,
+        y=conteos,
+        labels={"x": "Edad", "y": "Estudiantes"},
+        title="Distribución de edades",
+    )
+    fig.update_layout(bargap=0.05)
+    return fig
+
+
+def figura_linea_tiempo(inicio, paso, conteos):
+    traza = _traza_tiempo(inicio, paso, conteos)
+    fig = go.Figure(data=[{"type": traza.pop("type"), "mode": "lines", **traza}])
+    fig.update_layout(
+        title="Respuestas recibidas en el tiempo",
+        xaxis={"type": "date", "title": "Fecha de registro"},
+        yaxis={"title": "Respuestas"},
+    )
+    return fig
+
+
+def parche_edad(edades, conteos):
+    p = Patch()
+    p["data"][0]["x"] = edades.tolist()
+    p["data"][0]["y"] = conteos.tolist()
+    return p
+
+
+def parche_linea_tiempo(inicio, paso, conteos):
+    p = Patch()
+    for clave, valor in _traza_tiempo(inicio, paso, conteos).items():
+        p["data"][0][clave] = valor
+    return p
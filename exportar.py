@@ -0,0 +1,306 @@
+# Exportación por lotes del storytelling a HTML estático
+# Un reporte por cohorte (y opcionalmente por cada combinación de valores de
+# las dimensiones de --por) con las siete pestañas narrativas: el mismo texto
+# de pestanas.py y las figuras de plotly con los datos de esa selección. Los
+# controles interactivos (filtros, selector de granularidad, exploración de
+# casos) no tienen sentido sin servidor y se omiten.
+#
+# - plotly.js se escribe una sola vez en la carpeta de salida y cada reporte lo
+#   enlaza con una ruta relativa en lugar de incrustar ~4 MB por archivo.
+# - El trabajo se reparte en un ProcessPoolExecutor en dos pasos: una tarea
+#   por cohorte la limpia (deja su snapshot Feather) y lista sus selecciones
+#   no vacías, y después una tarea por (cohorte, selección) escribe cada
+#   reporte. Así el rendimiento crece con los núcleos también cuando se exporta
+#   una sola cohorte con muchas selecciones. Cada proceso guarda las tablas de
+#   las últimas cohortes que usó para no recargarlas en cada selección.
+# - Las corridas son incrementales: un manifiesto guarda la huella de cada
+#   cohorte (contenido del CSV, dimensiones pedidas, código que arma el reporte
+#   y versión de plotly.js) y la cohorte se salta si no cambió y sus archivos
+#   siguen ahí.
+#
+# Uso (desde la raíz del repo):
+#   python exportar.py data/Student_Mental_health.csv --salida reportes
+#   python exportar.py --carpeta data/cohortes --por genero --por año_estudio --procesos 8
+import argparse
+import hashlib
+import html
+import itertools
+import json
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+
+import plotly
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+import cubo as cb
+from agregados import DIMENSIONES, TablaConteos
+from asociacion import asociaciones
+from cohortes import descubrir_cohortes
+from distribuciones import (
+    construir_cubo_tiempo, figura_edad, figura_linea_tiempo, histograma_edad, linea_tiempo,
+    tabla_tiempo,
+)
+from figuras import construir_figuras, datos_figuras, numeric_cols
+from limpieza import PIPELINE_VERSION, hash_archivo, load_clean_dataset, procesos_disponibles
+from pestanas import PESTANAS
+
+RAIZ = Path(__file__).resolve().parent
+MANIFIESTO = "manifiesto.json"
+TITULO = "Storytelling: Salud Mental en Estudiantes Universitarios"
+
+# Módulos cuyo código cambia el contenido de los reportes
+MODULOS_REPORTE = [
+    "exportar.py", "pestanas.py", "figuras.py", "bootstrap.py", "asociacion.py",
+    "distribuciones.py", "agregados.py", "cubo.py", "limpieza.py", "programas.py",
+]
+
+ESTILO = """
+body { font-family: sans-serif; max-width: 1100px; margin: 0 auto; padding: 0 16px; }
+nav { position: sticky; top: 0; background: white; padding: 8px 0; border-bottom: 1px solid #ddd; }
+nav a { margin-right: 14px; }
+section { padding-top: 16px; border-bottom: 1px solid #eee; }
+"""
+
+
+# %%
+# Huellas para la exportación incremental
+def nombre_bundle():
+    return f"plotly-{get_plotlyjs_version()}.min.js"
+
+
+def huella_codigo():
+    h = hashlib.sha256()
+    for modulo in MODULOS_REPORTE:
+        h.update((RAIZ / modulo).read_bytes())
+    return h.hexdigest()
+
+
+def huella_cohorte(ruta, dimensiones, codigo):
+    partes = [hash_archivo(ruta), json.dumps(dimensiones), codigo, nombre_bundle(),
+              plotly.__version__, str(PIPELINE_VERSION)]
+    return hashlib.sha256("\n".join(partes).encode("utf-8")).hexdigest()
+
+
+def leer_manifiesto(salida):
+    ruta = Path(salida) / MANIFIESTO
+    return json.loads(ruta.read_text()) if ruta.exists() else {}
+
+
+def vigente(entrada, huella, salida):
+    """La cohorte ya tiene reportes de esta huella y siguen en disco."""
+    return (
+        entrada is not None
+        and entrada["huella"] == huella
+        and all((Path(salida) / archivo).exists() for archivo in entrada["archivos"])
+    )
+
+
+# %%
+# Componentes de Dash → HTML estático
+def _estilo_css(estilo):
+    return "; ".join(
+        f"{re.sub(r'([A-Z])', lambda m: '-' + m.group(1).lower(), clave)}: {valor}"
+        for clave, valor in (estilo or {}).items()
+    )
+
+
+def html_componente(componente):
+    """HTML de un árbol de componentes de dash.html con sus dcc.Graph; el
+    resto de componentes interactivos se omite."""
+    if componente is None:
+        return ""
+    if isinstance(componente, (list, tuple)):
+        return "".join(html_componente(c) for c in componente)
+    if isinstance(componente, (str, int, float)):
+        return html.escape(str(componente))
+
+    datos = componente.to_plotly_json()
+    props = datos["props"]
+    if datos["type"] == "Graph":
+        return pio.to_html(props["figure"], full_html=False, include_plotlyjs=False,
+                           config={"displaylogo": False})
+    if datos["namespace"] != "dash_html_components":
+        return ""
+    etiqueta = datos["type"].lower()
+    estilo = _estilo_css(props.get("style"))
+    atributo = f' style="{html.escape(estilo)}"' if estilo else ""
+    if etiqueta == "br":
+        return "<br>"
+    return f"<{etiqueta}{atributo}>{html_componente(props.get('children'))}</{etiqueta}>"
+
+
+def pagina(titulo, figs, bundle):
+    pestanas = [(valor, etiqueta, fn) for valor, etiqueta, fn in PESTANAS if valor != "exploracion"]
+    navegacion = "".join(f'<a href="#{valor}">{html.escape(etiqueta)}</a>' for valor, etiqueta, _ in pestanas)
+    secciones = "".join(
+        f'<section id="{valor}"><h1>{html.escape(etiqueta)}</h1>{html_componente(fn(figs))}</section>'
+        for valor, etiqueta, fn in pestanas
+    )
+    return (
+        f'<!DOCTYPE html><html lang="es"><head><meta charset="utf-8">'
+        f"<title>{html.escape(titulo)}</title><style>{ESTILO}</style>"
+        f'<script src="{bundle}"></script></head><body>'
+        f"<h1>{html.escape(TITULO)}</h1><p><strong>{html.escape(titulo)}</strong></p>"
+        f"<nav>{navegacion}</nav>{secciones}</body></html>"
+    )
+
+
+# %%
+# Reportes de una cohorte
+def _slug(texto):
+    return re.sub(r"[^\w.-]+", "-", str(texto)).strip("-")
+
+
+def selecciones(tabla, dimensiones):
+    """[(nombre de archivo, descripción, {dim: [valor]})]: el reporte completo
+    y uno por combinación de valores de `dimensiones`."""
+    resultado = [("index.html", "Todos los estudiantes", {})]
+    etiquetas = [list(tabla.etiquetas[dim]) for dim in dimensiones]
+    for valores in itertools.product(*etiquetas):
+        filtro = {dim: [v.item() if hasattr(v, "item") else v] for dim, v in zip(dimensiones, valores)}
+        nombre = "__".join(f"{_slug(dim)}={_slug(v)}" for dim, v in zip(dimensiones, valores))
+        descripcion = ", ".join(f"{dim} = {v}" for dim, v in zip(dimensiones, valores))
+        resultado.append((f"{nombre}.html", descripcion, filtro))
+    return resultado
+
+
+def figuras_seleccion(tabla, tiempo, seleccion):
+    """Figuras de todas las pestañas con los datos de la selección."""
+    mascara = tabla.mascara(seleccion)
+    datos = datos_figuras(
+        tabla.agregados(mascara), tabla.correlacion(mascara), asociaciones(tabla, mascara)
+    )
+    figs = construir_figuras(datos)
+    figs["fig_edad"] = figura_edad(*histograma_edad(tabla, mascara))
+    figs["fig_linea_tiempo"] = figura_linea_tiempo(*linea_tiempo(tiempo, tiempo.mascara(seleccion)))
+    return figs
+
+
+@lru_cache(maxsize=2)
+def datos_cohorte(ruta):
+    """(tabla de conteos, tabla temporal) de una cohorte, una vez por proceso."""
+    df = load_clean_dataset(ruta)
+    return (TablaConteos(cb.construir_cubo(df), pesos="n", numericas=numeric_cols),
+            tabla_tiempo(construir_cubo_tiempo(df)))
+
+
+def selecciones_cohorte(ruta, dimensiones):
+    """Selecciones de la cohorte con al menos un estudiante."""
+    tabla, _ = datos_cohorte(ruta)
+    return [s for s in selecciones(tabla, dimensiones)
+            if not s[2] or tabla.total(tabla.mascara(s[2])) > 0]
+
+
+def exportar_seleccion(nombre, ruta, archivo, descripcion, seleccion, salida):
+    """Escribe un reporte en salida/nombre/archivo y lo devuelve relativo a `salida`."""
+    tabla, tiempo = datos_cohorte(ruta)
+    carpeta = Path(salida) / nombre
+    carpeta.mkdir(parents=True, exist_ok=True)
+    figs = figuras_seleccion(tabla, tiempo, seleccion)
+    contenido = pagina(f"Cohorte {nombre} – {descripcion}", figs, f"../{nombre_bundle()}")
+    (carpeta / archivo).write_text(contenido, encoding="utf-8")
+    return f"{nombre}/{archivo}"
+
+
+# %%
+# Lote completo
+def escribir_bundle(salida):
+    destino = Path(salida) / nombre_bundle()
+    if not destino.exists():
+        destino.write_text(get_plotlyjs(), encoding="utf-8")
+    return destino
+
+
+def escribir_indice(salida, manifiesto):
+    enlaces = "".join(
+        f'<li><a href="{html.escape(archivo)}">{html.escape(archivo)}</a></li>'
+        for nombre in sorted(manifiesto) for archivo in manifiesto[nombre]["archivos"]
+    )
+    (Path(salida) / "index.html").write_text(
+        f'<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"><title>{TITULO}</title>'
+        f"<style>{ESTILO}</style></head><body><h1>{TITULO}</h1><ul>{enlaces}</ul></body></html>",
+        encoding="utf-8",
+    )
+
+
+def exportar(cohortes, salida, dimensiones=(), procesos=1, forzar=False):
+    """Exporta {nombre: ruta} en paralelo y devuelve (exportadas, saltadas)."""
+    salida = Path(salida)
+    salida.mkdir(parents=True, exist_ok=True)
+    dimensiones = list(dimensiones)
+    escribir_bundle(salida)
+
+    manifiesto = leer_manifiesto(salida)
+    codigo = huella_codigo()
+    pendientes = {}
+    for nombre, ruta in cohortes.items():
+        huella = huella_cohorte(ruta, dimensiones, codigo)
+        if forzar or not vigente(manifiesto.get(nombre), huella, salida):
+            pendientes[nombre] = huella
+
+    with ProcessPoolExecutor(procesos) as pool:
+        # {futuro: (nombre, None)} al listar las selecciones y
+        # {futuro: (nombre, archivo)} al escribir cada reporte
+        futuros = {
+            pool.submit(selecciones_cohorte, cohortes[nombre], dimensiones): (nombre, None)
+            for nombre in pendientes
+        }
+        faltan, archivos = {}, {}
+        while futuros:
+            listos, _ = wait(futuros, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                nombre, archivo = futuros.pop(futuro)
+                if archivo is None:
+                    lista = futuro.result()
+                    archivos[nombre] = [f"{nombre}/{a}" for a, _, _ in lista]
+                    faltan[nombre] = len(lista)
+                    for a, descripcion, seleccion in lista:
+                        tarea = pool.submit(exportar_seleccion, nombre, cohortes[nombre], a, descripcion,
+                                            seleccion, salida)
+                        futuros[tarea] = (nombre, a)
+                else:
+                    futuro.result()
+                    faltan[nombre] -= 1
+                if faltan[nombre] == 0:
+                    del faltan[nombre]
+                    terminados = archivos.pop(nombre)
+                    # Reportes de la corrida anterior que ya no corresponden (p. ej. un valor que desapareció)
+                    for viejo in set(manifiesto.get(nombre, {}).get("archivos", [])) - set(terminados):
+                        (salida / viejo).unlink(missing_ok=True)
+                    manifiesto[nombre] = {"huella": pendientes[nombre], "archivos": terminados}
+                    # Se guarda tras cada cohorte: una corrida interrumpida no repite lo hecho
+                    (salida / MANIFIESTO).write_text(json.dumps(manifiesto, indent=2, ensure_ascii=False))
+                    print(f"  {nombre}: {len(terminados)} reportes")
+
+    escribir_indice(salida, {n: manifiesto[n] for n in cohortes if n in manifiesto})
+    return len(pendientes), len(cohortes) - len(pendientes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta el storytelling a HTML estático por cohorte")
+    parser.add_argument("csv", nargs="*", type=Path, help="CSV de cohortes (nombre = archivo sin extensión)")
+    parser.add_argument("--carpeta", help="exportar además todos los CSV de esta carpeta")
+    parser.add_argument("--salida", type=Path, default=Path("reportes"))
+    parser.add_argument("--por", action="append", default=[], choices=DIMENSIONES,
+                        help="un reporte por valor de esta dimensión (se combinan si se repite)")
+    parser.add_argument("--procesos", type=int, default=0, help="0 = todos los núcleos")
+    parser.add_argument("--forzar", action="store_true", help="regenerar aunque nada haya cambiado")
+    args = parser.parse_args()
+
+    cohortes = {**descubrir_cohortes(args.carpeta), **{ruta.stem: str(ruta) for ruta in args.csv}}
+    if not cohortes:
+        parser.error("indique al menos un CSV o una carpeta con CSV")
+
+    procesos = args.procesos or procesos_disponibles()
+    t0 = time.perf_counter()
+    exportadas, saltadas = exportar(cohortes, args.salida, args.por, procesos, args.forzar)
+    print(f"{exportadas} cohortes exportadas y {saltadas} sin cambios en "
+          f"{time.perf_counter() - t0:.1f} s con {procesos} procesos → {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+# Bloque 2 – Figuras del storytelling a partir de los agregados
+# `datos_figuras` calcula las series que alimentan cada gráfico,
+# `construir_figuras` arma las figuras completas de plotly (arranque de la app)
+# y `parches_figuras` devuelve solo los datos que cambian al filtrar, como
+# dash.Patch, para que los callbacks no reconstruyan las figuras con plotly
+# express ni reenvíen el layout completo de cada una. Las barras de
+# proporciones llevan además el intervalo bootstrap de cada barra (bootstrap.py)
+# como barra de error y en el tooltip, y se recalcula con cada filtro.
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from dash import Patch
+
+from bootstrap import NIVEL, intervalos
+
+NOMBRES_SINTOMAS = {
+    "tiene_depresion": "Depresión",
+    "tiene_ansiedad": "Ansiedad",
+    "tiene_ataques_panico": "Ataques de pánico",
+}
+
+# Etiquetas de los ejes del mapa de asociación (asociacion.py)
+NOMBRES_VARIABLES = {
+    "programa_academico": "Programa académico",
+    "Promedio_de_calificaciones": "Promedio (CGPA)",
+    "año_estudio": "Año de estudio",
+    "genero": "Género",
+    "estado_civil": "Casado(a)",
+    **NOMBRES_SINTOMAS,
+    "busco_tratamiento_especialista": "Buscó tratamiento",
+}
+
+yn_cols_esp = [
+    "tiene_depresion",
+    "tiene_ansiedad",
+    "tiene_ataques_panico",
+    "busco_tratamiento_especialista"
+]
+numeric_cols = ["edad"] + yn_cols_esp
+
+# Figuras que se muestran en el layout (fig_insight es la misma fig_help_symptoms)
+FIGURAS_LAYOUT = [
+    "fig_resumen_sintomas",
+    "fig_dep",
+    "fig_ans",
+    "fig_panic",
+    "fig_programa_dep",
+    "fig_cgpa_dep",
+    "fig_anio_symptoms",
+    "fig_genero_panic",
+    "fig_insight",
+    "fig_corr",
+    "fig_asociacion",
+]
+
+# Barras de proporciones con intervalo: (dimensión, flag) de cada traza.
+# La de ayuda profesional (help_data) usa las proporciones condicionales.
+PROPORCIONES = {
+    "anio_symptoms": [("año_estudio", "tiene_ansiedad"), ("año_estudio", "tiene_depresion")],
+    "panic_por_genero": [("genero", "tiene_ataques_panico")],
+    "ans_por_estado": [("estado_civil", "tiene_ansiedad")],
+}
+
+
+def _texto_conteos(counts, percent):
+    return [f"{v} ({p}%)" for v, p in zip(counts.values, percent.values)]
+
+
+def datos_figuras(agg, corr, asoc):
+    """Series y tablas de cada figura (mismos cálculos del Bloque 2 original).
+    `asoc` son las Asociaciones de asociacion.py para el mapa de la V de Cramér."""
+    d = {}
+
+    # 2.1 Conteos Sí/No de cada síntoma y porcentajes
+    for clave, col in [("dep", "tiene_depresion"), ("ans", "tiene_ansiedad"),
+                       ("panic", "tiene_ataques_panico")]:
+        counts = agg.conteos(col)
+        d[f"counts_{clave}"] = counts
+        d[f"percent_{clave}"] = (counts / counts.sum() * 100).round(1)
+
+    # Total de casos por síntoma
+    d["counts_symptoms"] = pd.Series({nombre: agg.suma(col) for col, nombre in NOMBRES_SINTOMAS.items()})
+
+    # 2.2.1 Programa académico vs Depresión (solo programas con al menos un caso)
+    program_dep = (
+        agg.suma_por("programa_academico", "tiene_depresion")
+        .sort_values(ascending=False, kind="stable")
+    )
+    d["program_dep"] = program_dep.loc[program_dep > 0]
+
+    # 2.2.2 Promedio de calificaciones vs Depresión
+    dep_por_cgpa = agg.suma_por("Promedio_de_calificaciones", "tiene_depresion").sort_index()
+    d["dep_por_cgpa"] = dep_por_cgpa[dep_por_cgpa > 0]
+
+    # 2.2.3 Año de estudio vs Ansiedad y Depresión
+    d["anio_symptoms"] = (
+        agg.media_por("año_estudio", ["tiene_ansiedad", "tiene_depresion"])
+        .reset_index()
+    )
+
+    # 2.3.1 Género vs Ataques de pánico / 2.3.2 Estado civil vs Ansiedad
+    d["panic_por_genero"] = agg.media_por("genero", ["tiene_ataques_panico"]).reset_index()
+    d["ans_por_estado"] = agg.media_por("estado_civil", ["tiene_ansiedad"]).reset_index()
+
+    # 2.3.3 Correlaciones y asociación entre variables categóricas
+    d["corr"] = corr
+    d["asociacion"] = asoc
+
+    # 2.4 Proporción que busca tratamiento entre quienes SÍ tienen cada síntoma
+    d["help_data"] = pd.DataFrame({
+        "Síntoma": list(NOMBRES_SINTOMAS.values()),
+        "Proporción_que_busca_tratamiento": [
+            agg.proporcion_condicional(col, "busco_tratamiento_especialista")
+            for col in NOMBRES_SINTOMAS
+        ]
+    })
+
+    # Intervalos bootstrap (bajo, alto) de cada traza de proporciones
+    d["intervalos"] = {
+        clave: [serie[2:] for serie in series_proporciones(agg, clave)]
+        for clave in list(PROPORCIONES) + ["help_data"]
+    }
+    return d
+
+
+# %%
+# Proporciones con intervalo de confianza
+def _conteos_proporcion(agg, dim, flag):
+    """(etiquetas, casos con flag=1, casos con flag no nulo) por valor presente de `dim`."""
+    marg = agg.marginal(dim, flag)
+    presentes = agg.presentes(dim)
+    return (_lista(agg.etiquetas[dim][presentes]), marg[presentes, 1],
+            marg[presentes, 0] + marg[presentes, 1])
+
+
+def _conteos_ayuda(agg):
+    """Lo mismo para la búsqueda de tratamiento entre quienes tienen cada síntoma."""
+    exitos, totales = zip(*(
+        agg.conteo_condicional(col, "busco_tratamiento_especialista") for col in NOMBRES_SINTOMAS
+    ))
+    return list(NOMBRES_SINTOMAS.values()), np.array(exitos), np.array(totales)
+
+
+def series_proporciones(agg, clave):
+    """[(x, proporciones, bajo, alto)] por traza de la figura `clave` de
+    PROPORCIONES (o "help_data"). Un grupo sin filas da proporción 0 (como
+    proporcion_condicional) e intervalo NaN."""
+    conteos = ([_conteos_ayuda(agg)] if clave == "help_data"
+               else [_conteos_proporcion(agg, dim, flag) for dim, flag in PROPORCIONES[clave]])
+    series = []
+    for x, exitos, totales in conteos:
+        prop = np.divide(exitos, totales, out=np.zeros(len(totales)), where=totales > 0)
+        series.append((x, prop, *intervalos(exitos, totales)))
+    return series
+
+
+def _nulos(valores):
+    """Lista JSON con None en lugar de NaN."""
+    return [None if np.isnan(v) else v for v in np.asarray(valores, dtype=float).tolist()]
+
+
+def _matriz_json(tabla):
+    """Filas de un DataFrame como listas con None en lugar de NaN."""
+    return [_nulos(fila) for fila in tabla.to_numpy()]
+
+
+def _error_ic(y, bajo, alto):
+    """Barra de error asimétrica hasta los extremos del intervalo y los
+    extremos como customdata para el tooltip."""
+    y = np.asarray(y, dtype=float)
+    return {
+        "error_y": {"type": "data", "symmetric": False,
+                    "array": _nulos(alto - y), "arrayminus": _nulos(y - bajo)},
+        "customdata": [[b, a] for b, a in zip(_nulos(bajo), _nulos(alto))],
+    }
+
+
+def _con_intervalos(fig, intervalos_trazas, formato=".2f"):
+    """Agrega barra de error e intervalo en el tooltip a cada traza de `fig`."""
+    linea = (f"<br>IC {NIVEL:.0%}: [%{{customdata[0]:{formato}}}, "
+             f"%{{customdata[1]:{formato}}}]<extra></extra>")
+    for traza, (bajo, alto) in zip(fig.data, intervalos_trazas):
+        traza.update(**_error_ic(traza.y, bajo, alto))
+        traza.hovertemplate = traza.hovertemplate.replace("<extra></extra>", linea)
+    return fig
+
+
+# %%
+# Figuras completas
+def _pie_sintoma(counts, percent, titulo):
+    # Un subconjunto puede no tener una de las dos respuestas: se envían ambas
+    counts = counts.reindex([0, 1], fill_value=0)
+    percent = percent.reindex([0, 1], fill_value=0.0)
+    fig = px.pie(
+        names=["No (0)", "Sí (1)"],
+        values=counts.values,
+        title=titulo
+    )
+    fig.update_traces(
+        text=_texto_conteos(counts, percent),
+        textinfo="text+percent",  # Muestra tanto el texto personalizado como el %
+        textposition="inside"
+    )
+    return fig
+
+
+def construir_figuras(d):
+    """Arma todas las figuras del storytelling a partir de `datos_figuras`."""
+    f = {}
+
+    # Pestaña 1 Contexto: distribución de cada síntoma (Pie)
+    f["fig_dep"] = _pie_sintoma(d["counts_dep"], d["percent_dep"],
+                                "Distribución de estudiantes con síntomas de depresión")
+    f["fig_ans"] = _pie_sintoma(d["counts_ans"], d["percent_ans"],
+                                "Distribución de estudiantes con síntomas de ansiedad")
+    f["fig_panic"] = _pie_sintoma(d["counts_panic"], d["percent_panic"],
+                                  "Distribución de estudiantes con ataques de pánico")
+
+    # Pestaña 1 Contexto: distribución de estudiantes por síntoma emocional
+    counts_symptoms = d["counts_symptoms"]
+    fig_resumen_sintomas = px.pie(
+        names=counts_symptoms.index,
+        values=counts_symptoms.values,
+        title="Distribución de estudiantes por síntoma emocional",
+        hole=0,        # Si quieres tipo doughnut, cambia a 0.4
+    )
+    # Mostrar valores y porcentajes dentro o fuera del pie
+    fig_resumen_sintomas.update_traces(
+        textinfo="label+value+percent",
+        textposition="inside"   # Usa "outside" si prefieres afuera
+    )
+    fig_resumen_sintomas.update_layout(title_x=0.5)
+    f["fig_resumen_sintomas"] = fig_resumen_sintomas
+
+    # Pestaña 2 Estudiantes con depresión por programa académico
+    program_dep = d["program_dep"]
+    # Las series van como DataFrame: px.bar no acepta x e y como listas vacías
+    fig_programa_dep = px.bar(
+        program_dep.rename_axis("x").reset_index(name="y"),
+        x="x",
+        y="y",
+        labels={"x": "Programa académico", "y": "Estudiantes con depresión"},
+        title="Estudiantes con depresión por programa académico"
+    )
+    fig_programa_dep.update_layout(xaxis=dict(tickangle=75))
+    f["fig_programa_dep"] = fig_programa_dep
+
+    # Pestaña 2 Promedio de calificaciones vs Depresión
+    dep_por_cgpa = d["dep_por_cgpa"]
+    f["fig_cgpa_dep"] = px.bar(
+        dep_por_cgpa.rename_axis("x").reset_index(name="y"),
+        x="x",
+        y="y",
+        labels={"x": "Promedio de calificaciones (CGPA)", "y": "Estudiantes con depresión"},
+        title="Relación entre CGPA y depresión"
+    )
+
+    # Pestaña 2 Año de estudio vs Ansiedad y Depresión
+    fig_anio_symptoms = px.bar(
+        d["anio_symptoms"],
+        x="año_estudio",
+        y=["tiene_ansiedad", "tiene_depresion"],
+        barmode="group",
+        labels={
+            "value": "Proporción de estudiantes",
+            "año_estudio": "Año de estudio",
+            "variable": "Síntoma"
+        },
+        title="Proporción de ansiedad y depresión por año de estudio"
+    )
+    # Etiquetas dentro de las barras
+    fig_anio_symptoms.update_traces(
+        texttemplate='%{y:.2f}',
+        textposition='inside'
+    )
+    f["fig_anio_symptoms"] = _con_intervalos(fig_anio_symptoms, d["intervalos"]["anio_symptoms"])
+
+    # Pestaña 3 Género vs Ataques de pánico
+    f["fig_genero_panic"] = _con_intervalos(px.bar(
+        d["panic_por_genero"],
+        x="genero",
+        y="tiene_ataques_panico",
+        labels={"genero": "Género", "tiene_ataques_panico": "Proporción con ataques de pánico"},
+        title="Proporción de estudiantes con ataques de pánico por género"
+    ), d["intervalos"]["panic_por_genero"])
+
+    # Pestaña 3 Estado civil vs Ansiedad
+    f["fig_estado_ans"] = _con_intervalos(px.bar(
+        d["ans_por_estado"],
+        x="estado_civil",
+        y="tiene_ansiedad",
+        labels={"estado_civil": "Estado civil", "tiene_ansiedad": "Proporción con ansiedad"},
+        title="Proporción de estudiantes con ansiedad por estado civil"
+    ), d["intervalos"]["ans_por_estado"])
+
+    # Pestaña 5 Mapa de calor de correlaciones
+    fig_corr = px.imshow(
+        d["corr"],
+        text_auto=".2f",               # Muestra los valores con 2 decimales
+        color_continuous_scale="RdBu", # Colores rojo-azul para positiva/negativa
+        title="Mapa de calor de correlaciones: edad, síntomas y búsqueda de tratamiento",
+        width=700,
+        height=600,
+        aspect="auto"                  # Ajusta proporción de celdas
+    )
+    # Ajustes de estilo
+    fig_corr.update_layout(
+        title_x=0.5,                   # Centrar el título
+        coloraxis_colorbar=dict(
+            title="Correlación",
+            tickvals=[-1, -0.5, 0, 0.5, 1],
+            ticktext=["-1", "-0.5", "0", "0.5", "1"]
+        )
+    )
+    # Rotar etiquetas si es necesario
+    fig_corr.update_xaxes(tickangle=45)
+    fig_corr.update_yaxes(tickangle=0)
+    f["fig_corr"] = fig_corr
+
+    # Pestaña 5 Asociación entre todas las variables (V de Cramér y valor p)
+    asoc = d["asociacion"]
+    fig_asociacion = px.imshow(
+        asoc.cramer.rename(index=NOMBRES_VARIABLES, columns=NOMBRES_VARIABLES),
+        text_auto=".2f",
+        color_continuous_scale="Blues",
+        zmin=0,
+        zmax=1,
+        title="Asociación entre variables: V de Cramér (con corrección de sesgo)",
+        width=800,
+        height=700,
+        aspect="auto"
+    )
+    fig_asociacion.update_traces(
+        customdata=_matriz_json(asoc.p),
+        hovertemplate="%{y} × %{x}<br>V de Cramér: %{z:.2f}"
+                      "<br>Valor p (chi-cuadrado): %{customdata:.3g}<extra></extra>"
+    )
+    fig_asociacion.update_layout(title_x=0.5, coloraxis_colorbar=dict(title="V de Cramér"))
+    fig_asociacion.update_xaxes(tickangle=45)
+    f["fig_asociacion"] = fig_asociacion
+
+    # Pestaña 4 Acceso a ayuda profesional
+    fig_help_symptoms = px.bar(
+        d["help_data"],
+        x="Síntoma",
+        y="Proporción_que_busca_tratamiento",
+        labels={"Proporción_que_busca_tratamiento": "Proporción que busca tratamiento"},
+        title="Proporción de estudiantes con síntomas que buscan tratamiento especializado"
+    )
+    fig_help_symptoms.update_yaxes(tickformat=".0%")
+    _con_intervalos(fig_help_symptoms, d["intervalos"]["help_data"], formato=".1%")
+    f["fig_help_symptoms"] = fig_help_symptoms
+
+    # 2.5 Insight principal (Clímax): la misma figura con título más narrativo
+    f["fig_insight"] = fig_help_symptoms.update_layout(
+        title="Brecha entre padecer síntomas y buscar ayuda profesional"
+    )
+    return f
+
+
+# %%
+# Actualizaciones parciales para los callbacks de filtros
+# Se trabaja directo sobre los arreglos de Agregados (sin Series de pandas)
+# porque este camino se ejecuta en cada cambio de filtro.
+def _lista(valores):
+    return [v.item() if hasattr(v, "item") else v for v in valores]
+
+
+def _parche_proporciones(parche, series, con_x=True):
+    """Datos, barras de error y tooltip de cada traza de proporciones."""
+    for i, (x, y, bajo, alto) in enumerate(series):
+        if con_x:
+            parche["data"][i]["x"] = x
+        parche["data"][i]["y"] = y.tolist()
+        for clave, valor in _error_ic(y, bajo, alto).items():
+            parche["data"][i][clave] = valor
+
+
+def parches_figuras(agg, corr, nombres=FIGURAS_LAYOUT, asoc=None):
+    """Dash Patch por figura del layout con los datos del subconjunto filtrado.
+    Solo se calculan las figuras de `nombres` (`corr` y `asoc` pueden ser None
+    si no se piden fig_corr ni fig_asociacion)."""
+    p = {nombre: Patch() for nombre in nombres}
+
+    # Pies Sí/No: con filtros puede faltar una categoría, se envían ambas
+    for col, nombre in [("tiene_depresion", "fig_dep"), ("tiene_ansiedad", "fig_ans"),
+                        ("tiene_ataques_panico", "fig_panic")]:
+        if nombre not in p:
+            continue
+        counts = agg.estados(col)[:2]
+        total = counts.sum()
+        percent = np.round(counts / total * 100, 1) if total else np.zeros(2)
+        p[nombre]["data"][0]["values"] = counts.tolist()
+        p[nombre]["data"][0]["text"] = [f"{v} ({pc}%)" for v, pc in zip(counts.tolist(), percent.tolist())]
+
+    if "fig_resumen_sintomas" in p:
+        p["fig_resumen_sintomas"]["data"][0]["values"] = [
+            int(agg.estados(col)[1]) for col in NOMBRES_SINTOMAS
+        ]
+
+    # Barras de depresión: solo categorías con casos (como en datos_figuras)
+    for nombre, dim, descendente in [("fig_programa_dep", "programa_academico", True),
+                                     ("fig_cgpa_dep", "Promedio_de_calificaciones", False)]:
+        if nombre not in p:
+            continue
+        casos = agg.marginal(dim, "tiene_depresion")[:, 1]
+        orden = np.argsort(-casos, kind="stable") if descendente else np.arange(len(casos))
+        orden = orden[casos[orden] > 0]
+        p[nombre]["data"][0]["x"] = _lista(agg.etiquetas[dim][orden])
+        p[nombre]["data"][0]["y"] = casos[orden].tolist()
+
+    # Barras de proporciones con su intervalo bootstrap
+    for nombre, clave in [("fig_anio_symptoms", "anio_symptoms"), ("fig_genero_panic", "panic_por_genero")]:
+        if nombre in p:
+            _parche_proporciones(p[nombre], series_proporciones(agg, clave))
+
+    if "fig_insight" in p:
+        _parche_proporciones(p["fig_insight"], series_proporciones(agg, "help_data"), con_x=False)
+
+    if "fig_corr" in p:
+        # NaN no es JSON válido: las correlaciones indefinidas se envían como null
+        z = corr.to_numpy()
+        p["fig_corr"]["data"][0]["z"] = [[None if np.isnan(v) else v for v in fila] for fila in z.tolist()]
+
+    if "fig_asociacion" in p:
+        p["fig_asociacion"]["data"][0]["z"] = _matriz_json(asoc.cramer)
+        p["fig_asociacion"]["data"][0]["customdata"] = _matriz_json(asoc.p)
+    return p
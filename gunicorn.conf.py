@@ -0,0 +1,53 @@
+# Configuración de gunicorn para producción (render.yaml: gunicorn -c gunicorn.conf.py app:server)
+# preload_app carga app.py una sola vez en el proceso maestro: la limpieza, el
+# cubo, los códigos de TablaConteos, el índice de bits y el layout comprimido
+# quedan en memoria antes del fork y los workers los comparten por
+# copy-on-write en vez de tener una copia cada uno.
+import gc
+import os
+
+
+def _cpus():
+    # En contenedores el número de CPUs asignadas puede ser menor que el del host
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8050)}"
+preload_app = True
+
+# Un worker por CPU (los callbacks son cálculo numpy) y varios hilos por worker
+# para atender en paralelo las peticiones de espera (assets, layout, 304)
+workers = int(os.environ.get("WEB_CONCURRENCY", _cpus()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+timeout = 60
+keepalive = 5
+accesslog = "-"
+
+
+def when_ready(server):
+    # Con TRABAJOS_FONDO=1, los procesos de trabajo de los callbacks en fondo
+    # (ver trabajos.py) se crean aquí: en el maestro, con la app ya cargada y
+    # antes de crear los workers, así los comparten todos
+    import app
+
+    if app.gestor_trabajos is not None:
+        app.gestor_trabajos.iniciar()
+
+
+def on_exit(server):
+    import app
+
+    if app.gestor_trabajos is not None:
+        app.gestor_trabajos.detener()
+
+
+def pre_fork(server, worker):
+    # Congelar los objetos ya creados: el recolector de basura de cada worker
+    # no los recorre ni toca sus cabeceras, así sus páginas no se copian
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,163 @@
+# Índice de mapas de bits para consultas ad hoc y exploración de filas
+# Para cada valor de cada columna categórica, de cada bandera y de cada rango
+# de edad se guarda un arreglo de bits empaquetado (1 bit por fila, en
+# palabras de 64 bits). Una consulta conjuntiva/disyuntiva se resuelve con
+# AND/OR/NOT bit a bit y el número de coincidencias con popcount, sin recorrer
+# ni copiar el DataFrame. Las filas que coinciden se decodifican por páginas.
+import numpy as np
+import pandas as pd
+
+COLUMNAS_INDICE = [
+    "genero",
+    "programa_academico",
+    "año_estudio",
+    "Promedio_de_calificaciones",
+    "estado_civil",
+    "tiene_depresion",
+    "tiene_ansiedad",
+    "tiene_ataques_panico",
+    "busco_tratamiento_especialista",
+]
+
+# Rangos de edad (inclusive) indexados en la columna virtual "rango_edad"
+RANGOS_EDAD = [
+    ("18 o menos", 0, 18),
+    ("19-21", 19, 21),
+    ("22-24", 22, 24),
+    ("25 o más", 25, 255),
+]
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(palabras):
+        return np.bitwise_count(palabras)
+else:  # numpy < 2.0: tabla de 256 entradas sobre la vista en bytes
+    _BITS_POR_BYTE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(palabras):
+        return _BITS_POR_BYTE[palabras.view(np.uint8)].reshape(len(palabras), 8).sum(axis=1)
+
+
+class IndiceBitmap:
+    """Mapas de bits por valor sobre las filas de un DataFrame limpio."""
+
+    def __init__(self, df, columnas=COLUMNAS_INDICE):
+        self.n = len(df)
+        self.palabras = (self.n + 63) // 64
+        self.columnas = columnas
+        self.bitmaps = {
+            col: {valor: self._empaquetar(mascara) for valor, mascara in mascaras.items()}
+            for col, mascaras in self._mascaras(df).items()
+        }
+        # Bits válidos (la última palabra puede tener relleno)
+        self.todos = self._empaquetar(np.ones(self.n, dtype=bool))
+
+    def _mascaras(self, df):
+        """{columna: {valor: máscara booleana de filas}} de las filas de `df`."""
+        mascaras = {}
+        for col in self.columnas:
+            codigos, valores = pd.factorize(df[col], sort=True)
+            mascaras[col] = {
+                (v.item() if hasattr(v, "item") else v): codigos == k
+                for k, v in enumerate(valores)
+            }
+        edad = df["edad"].to_numpy()
+        mascaras["rango_edad"] = {
+            nombre: (edad >= desde) & (edad <= hasta) for nombre, desde, hasta in RANGOS_EDAD
+        }
+        return mascaras
+
+    def _empaquetar(self, mascara):
+        bytes_ = np.packbits(mascara, bitorder="little")
+        relleno = self.palabras * 8 - len(bytes_)
+        return np.concatenate([bytes_, np.zeros(relleno, dtype=np.uint8)]).view(np.uint64)
+
+    def con_filas(self, df):
+        """Nuevo índice con las filas de `df` añadidas al final. Solo se
+        empaquetan los bits nuevos; los mapas existentes se copian (el índice
+        actual no cambia mientras otros hilos lo consultan)."""
+        nuevo = object.__new__(IndiceBitmap)
+        nuevo.n = self.n + len(df)
+        nuevo.palabras = (nuevo.n + 63) // 64
+        nuevo.columnas = self.columnas
+
+        # Los bits nuevos empiezan en la palabra n // 64, desplazados n % 64
+        inicio, desplazamiento = divmod(self.n, 64)
+
+        def extender(viejo, mascara):
+            resultado = np.zeros(nuevo.palabras, dtype=np.uint64)
+            resultado[:len(viejo)] = viejo
+            if mascara is not None and mascara.any():
+                bits = np.concatenate([np.zeros(desplazamiento, dtype=bool), mascara])
+                parte = np.packbits(bits, bitorder="little")
+                parte = np.concatenate(
+                    [parte, np.zeros((nuevo.palabras - inicio) * 8 - len(parte), dtype=np.uint8)]
+                ).view(np.uint64)
+                resultado[inicio:] |= parte
+            return resultado
+
+        vacio = np.zeros(0, dtype=np.uint64)
+        nuevo.bitmaps = {}
+        for col, mascaras in self._mascaras(df).items():
+            previos = self.bitmaps[col]
+            nuevo.bitmaps[col] = {
+                valor: extender(previos.get(valor, vacio), mascaras.get(valor))
+                for valor in previos.keys() | mascaras.keys()
+            }
+        nuevo.todos = extender(self.todos, np.ones(len(df), dtype=bool))
+        return nuevo
+
+    def nbytes(self):
+        return sum(b.nbytes for valores in self.bitmaps.values() for b in valores.values())
+
+    # Álgebra de conjuntos
+    def bits(self, col, valores):
+        """OR de los mapas de `valores` en `col` (lista vacía → sin restricción)."""
+        if not valores:
+            return self.todos
+        resultado = np.zeros(self.palabras, dtype=np.uint64)
+        for v in valores:
+            mapa = self.bitmaps[col].get(v)
+            if mapa is not None:
+                resultado |= mapa
+        return resultado
+
+    def y(self, *conjuntos):
+        resultado = self.todos.copy()
+        for c in conjuntos:
+            resultado &= c
+        return resultado
+
+    def o(self, *conjuntos):
+        resultado = np.zeros(self.palabras, dtype=np.uint64)
+        for c in conjuntos:
+            resultado |= c
+        return resultado
+
+    def negar(self, conjunto):
+        return ~conjunto & self.todos
+
+    def consulta(self, condiciones):
+        """AND entre columnas y OR dentro de cada columna:
+        {"genero": ["Female"], "rango_edad": ["19-21"], "busco_tratamiento_especialista": [0]}"""
+        return self.y(*(self.bits(col, valores) for col, valores in condiciones.items()))
+
+    # Resultados
+    def contar(self, conjunto):
+        return int(_popcount(conjunto).sum())
+
+    def filas(self, conjunto, inicio=0, cantidad=20):
+        """Posiciones de las filas número `inicio` a `inicio + cantidad` del
+        conjunto, decodificando solo las palabras necesarias."""
+        acumulado = np.cumsum(_popcount(conjunto), dtype=np.int64)
+        total = int(acumulado[-1]) if len(acumulado) else 0
+        if inicio >= total or cantidad <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        desde = int(np.searchsorted(acumulado, inicio, side="right"))
+        hasta = int(np.searchsorted(acumulado, min(inicio + cantidad, total) - 1, side="right")) + 1
+        previos = int(acumulado[desde - 1]) if desde else 0
+
+        bits = np.unpackbits(conjunto[desde:hasta].view(np.uint8), bitorder="little")
+        posiciones = np.flatnonzero(bits) + desde * 64
+        salto = inicio - previos
+        return posiciones[salto:salto + cantidad]
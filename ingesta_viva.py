@@ -0,0 +1,184 @@
+# Ingesta en vivo de respuestas nuevas de la encuesta
+# La encuesta sigue recibiendo respuestas y el CSV crece por el final. En vez
+# de releerlo completo, se recuerda hasta qué byte ya se procesó y en cada
+# revisión se leen solo las líneas completas agregadas después. Esas filas
+# pasan por el mismo pipeline de limpieza (con la mediana de edad del arranque
+# y descartando duplicados por hash) y se suman a lo ya calculado:
+# el cubo/TablaConteos (y el cubo temporal) reciben las filas nuevas, los
+# Agregados y los Momentos se combinan con los del lote y el índice de bits
+# crece por el final.
+#
+# Cada actualización arma un EstadoDatos nuevo y lo publica reemplazando una
+# sola referencia: los callbacks toman el estado una vez al empezar y nunca ven
+# una mezcla de datos viejos y nuevos. La versión es el número de bytes
+# ingeridos desde el arranque, igual en todos los workers de gunicorn, así que
+# el navegador puede preguntar a cualquiera de ellos.
+import io
+import os
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+import cubo as cb
+from distribuciones import construir_cubo_tiempo
+from limpieza import LimpiadorIncremental, formatos_fecha_archivo, mediana_global
+from momentos import Momentos
+
+# Todo lo que leen los callbacks; se reemplaza entero en cada actualización
+EstadoDatos = namedtuple("EstadoDatos", "version tabla agg momentos indice filas tiempo")
+
+
+class FilasPorPartes:
+    """Filas limpias guardadas como lista de DataFrames (el inicial más uno por
+    lote) para no copiar todo el DataFrame en cada actualización."""
+
+    def __init__(self, partes):
+        self.partes = [p for p in partes if p is not None]
+        self.inicios = np.cumsum([0] + [len(p) for p in self.partes])
+
+    def __len__(self):
+        return int(self.inicios[-1])
+
+    @property
+    def columnas(self):
+        return list(self.partes[0].columns) if self.partes else []
+
+    def con_parte(self, parte):
+        return FilasPorPartes(self.partes + [parte])
+
+    def tomar(self, posiciones):
+        """Equivale a df.iloc[posiciones] sobre la concatenación de las partes."""
+        posiciones = np.asarray(posiciones, dtype=np.int64)
+        if not len(posiciones):
+            return self.partes[0].iloc[:0]
+        cual = np.searchsorted(self.inicios, posiciones, side="right") - 1
+        trozos = [
+            self.partes[k].iloc[posiciones[cual == k] - self.inicios[k]]
+            for k in np.unique(cual)
+        ]
+        return pd.concat(trozos) if len(trozos) > 1 else trozos[0]
+
+
+class SeguidorCSV:
+    """Lee las líneas completas que se agregan al final de un CSV."""
+
+    def __init__(self, path, bloque=1 << 20):
+        self.path = path
+        self.bloque = bloque
+        with open(path, "rb") as f:
+            self.cabecera = f.readline()
+        self.tamano = os.path.getsize(path)
+        self.offset = self._ultimo_salto(self.tamano)
+
+    def _ultimo_salto(self, hasta):
+        """Posición después del último salto de línea antes de `hasta`."""
+        with open(self.path, "rb") as f:
+            pos = hasta
+            while pos > len(self.cabecera):
+                desde = max(len(self.cabecera), pos - self.bloque)
+                f.seek(desde)
+                i = f.read(pos - desde).rfind(b"\n")
+                if i >= 0:
+                    return desde + i + 1
+                pos = desde
+        return len(self.cabecera)
+
+    def hay_cambios(self):
+        return os.path.getsize(self.path) != self.tamano
+
+    def leer_nuevas(self):
+        """(DataFrame de texto con las líneas nuevas o None, bytes leídos)."""
+        tamano = self.tamano = os.path.getsize(self.path)
+        if tamano < self.offset:
+            # Archivo truncado o reemplazado: no se puede seguir por offset
+            print(f"{self.path} se acortó ({tamano} < {self.offset} bytes); "
+                  "reinicie la app para recargarlo completo")
+            self.offset = self._ultimo_salto(tamano)
+            return None, 0
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            datos = f.read(tamano - self.offset)
+        fin = datos.rfind(b"\n") + 1  # una línea a medio escribir queda para la próxima
+        if fin == 0:
+            return None, 0
+        self.offset += fin
+        nuevas = pd.read_csv(io.BytesIO(self.cabecera + datos[:fin]), dtype=str)
+        return (nuevas if len(nuevas) else None), fin
+
+    def partes_iniciales(self, chunksize=200_000):
+        """Lo que ya estaba en el archivo al arrancar, por partes de texto."""
+        with open(self.path, "rb") as f:
+            contenido = io.BytesIO(f.read(self.offset))
+        return pd.read_csv(contenido, chunksize=chunksize, dtype=str)
+
+
+class IngestaViva:
+    """Mantiene `estado` al día con las filas que se agregan a `path`."""
+
+    def __init__(self, path, estado, numericas, compactar=None, resolucion_tiempo=1):
+        self.seguidor = SeguidorCSV(path)
+        self.numericas = numericas
+        self.compactar = compactar
+        # Misma resolución que el cubo temporal inicial (ver distribuciones.py)
+        self.resolucion_tiempo = resolucion_tiempo
+        self.no_resueltos = Counter()
+        self.fechas_invalidas = Counter()
+        self.lock = threading.Lock()
+        self.bytes_inicio = self.seguidor.offset
+        # Se llama con el estado nuevo tras cada lote con filas (ver cohortes.py)
+        self.al_publicar = None
+
+        # Mismas reglas que la carga inicial: mediana de edad y formato de
+        # fechas del archivo y hashes de las filas ya cargadas para descartar
+        # duplicados
+        self.limpiador = LimpiadorIncremental(
+            {"age": mediana_global(path)}, formatos_fecha=formatos_fecha_archivo(path)
+        )
+        for parte in self.seguidor.partes_iniciales():
+            self.limpiador.registrar(parte)
+        self.estado = estado._replace(version=0)
+
+    def revisar(self):
+        """Ingiere lo nuevo si el archivo cambió y devuelve la versión actual.
+        Es barato cuando no hay cambios (un stat) y nunca bloquea: si otro
+        hilo ya está ingiriendo, devuelve la versión publicada."""
+        if not self.seguidor.hay_cambios() or not self.lock.acquire(blocking=False):
+            return self.estado.version
+        limpias = None
+        try:
+            crudas, _ = self.seguidor.leer_nuevas()
+            if crudas is not None:
+                limpias = self.limpiador.limpiar(crudas, self.no_resueltos, self.fechas_invalidas)
+                if limpias is not None:
+                    self.estado = self._aplicar(self.estado, limpias)
+            # La versión avanza aunque todo fuera duplicado: son bytes procesados
+            self.estado = self.estado._replace(version=self.seguidor.offset - self.bytes_inicio)
+        finally:
+            self.lock.release()
+        estado = self.estado
+        if limpias is not None and self.al_publicar is not None:
+            self.al_publicar(estado)
+        return estado.version
+
+    def _aplicar(self, estado, limpias):
+        """Nuevo EstadoDatos con el lote `limpias` sumado."""
+        if self.compactar is not None:
+            limpias = self.compactar(limpias)
+        delta = cb.construir_cubo(limpias)
+
+        tabla = estado.tabla.con_filas(delta)
+        if tabla.etiquetas_nuevas:
+            # Apareció un valor nuevo (p. ej. un programa): se recalculan los
+            # agregados, que recorren el cubo y no las filas
+            agg = tabla.agregados()
+        else:
+            agg = estado.agg + tabla.agregados(slice(estado.tabla.n, None))
+
+        momentos = estado.momentos.combinar(Momentos.desde_df(delta, self.numericas, pesos="n"))
+        indice = estado.indice.con_filas(limpias) if estado.indice is not None else None
+        filas = estado.filas.con_parte(limpias) if estado.filas is not None else None
+        tiempo = estado.tiempo.con_filas(construir_cubo_tiempo(limpias, self.resolucion_tiempo))
+        return EstadoDatos(estado.version, tabla, agg, momentos, indice, filas, tiempo)
@@ -0,0 +1,622 @@
+# Bloque 1 – Pipeline de limpieza del conjunto de datos
+# Las mismas transformaciones que antes vivían en app.py, pero empaquetadas en
+# funciones reutilizables y con una copia en disco (snapshot columnar) para no
+# repetir la limpieza en cada arranque de los workers.
+import hashlib
+import io
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from programas import escribir_reporte_no_resueltos, normalizar_programas
+
+# Versión del pipeline: subirla cada vez que cambie cualquier paso de limpieza
+# para que los snapshots anteriores dejen de ser válidos.
+PIPELINE_VERSION = 3
+
+# Carpeta donde se guardan los snapshots (se puede cambiar con CACHE_DATOS)
+CACHE_DIR = Path(os.environ.get("CACHE_DATOS", ".cache/datos"))
+
+# 5.1 Normalizar curso (alias exactos; ver programas.py para prefijos y erratas)
+course_map = {
+    "bcs": "Computer Science",
+    "bit": "Information Technology",
+    "engine": "Engineering",
+    "engin": "Engineering",
+    "engineering": "Engineering",
+    "mhsc": "Health Sciences",
+    "biomedical science": "Biomedical Science",
+    "koe": "Education",
+    "koe ": "Education",
+    "benl": "English",
+    "ala": "Arts and Letters",
+    "psychology": "Psychology",
+    "irkhs": "Islamic Studies",
+    "kirkhs": "Islamic Studies",
+    "kirkhs ": "Islamic Studies",
+    "islamic education": "Islamic Education",
+    "pendidikan islam": "Islamic Education",
+    "fiqh": "Islamic Jurisprudence",
+    "fiqh fatwa": "Islamic Jurisprudence",
+    "nursing": "Nursing",
+    "diploma nursing": "Nursing",
+    "marine science": "Marine Science",
+    "banking studies": "Banking Studies",
+    "mathemathics": "Mathematics",
+    "communication": "Communication",
+    "cts": "Computer Technology",
+}
+
+# 5.2 Año de estudio
+year_map = {"1": "Año 1", "2": "Año 2", "3": "Año 3", "4": "Año 4"}
+
+# 5.3 CGPA
+cgpa_map = {
+    "3.50 - 4.00": "3.50 - 4.00",
+    "3.50-4.00": "3.50 - 4.00"
+}
+
+# 5.4 Columnas Yes/No a 1/0
+yn_cols = [
+    "marital_status",
+    "do_you_have_depression?",
+    "do_you_have_anxiety?",
+    "do_you_have_panic_attack?",
+    "did_you_seek_any_specialist_for_a_treatment?"
+]
+
+# 6. Traducción de nombres de columnas al español
+column_translate = {
+    "timestamp": "fecha_registro",
+    "choose_your_gender": "genero",
+    "age": "edad",
+    "what_is_your_course?": "programa_academico",
+    "your_current_year_of_study": "año_estudio",
+    "what_is_your_cgpa?": "Promedio_de_calificaciones",
+    "marital_status": "estado_civil",
+    "do_you_have_depression?": "tiene_depresion",
+    "do_you_have_anxiety?": "tiene_ansiedad",
+    "do_you_have_panic_attack?": "tiene_ataques_panico",
+    "did_you_seek_any_specialist_for_a_treatment?": "busco_tratamiento_especialista"
+}
+
+
+# %%
+# 2. Estandarizar nombres de columnas cambiar _ por espacios y pasar a minúsculas
+def estandarizar_columnas(df):
+    df.columns = (
+        df.columns
+        .str.strip()
+        .str.lower()
+        .str.replace(" ", "_")
+        .str.replace("-", "_")
+    )
+    return df
+
+
+# 3. Tratamiento simple de valores nulos
+def tratar_nulos(df, medianas=None):
+    """Rellena nulos; `medianas` permite usar medianas globales por columna
+    (necesario cuando se limpia por partes y no se ve el archivo completo)."""
+    medianas = medianas or {}
+    for col in df.columns:
+        if df[col].dtype.name == "category":
+            df[col] = df[col].cat.add_categories("Desconocido").fillna("Desconocido")
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].fillna(medianas.get(col, df[col].median()))
+        else:
+            df[col] = df[col].fillna("Nulo")
+    return df
+
+
+# 5. Normalizaciones específicas (5.1 a 5.6), fila a fila y sin estado global
+# Cada paso es una función aparte para poder medirlo por separado
+# (benchmarks/bench_etapas.py); normalizar_valores los aplica en orden.
+def normalizar_programa(df, no_resueltos=None):
+    df["what_is_your_course?"] = normalizar_programas(
+        df["what_is_your_course?"], course_map, no_resueltos
+    )
+    return df
+
+
+def normalizar_anio_cgpa(df):
+    df["your_current_year_of_study"] = (
+        df["your_current_year_of_study"]
+        .astype(str)
+        .str.lower()
+        .str.replace("year", "")
+        .str.strip()
+        .replace(year_map)
+    )
+
+    df["what_is_your_cgpa?"] = df["what_is_your_cgpa?"].astype(str).str.strip()
+    df["what_is_your_cgpa?"] = df["what_is_your_cgpa?"].replace(cgpa_map)
+    return df
+
+
+def mapear_si_no(df):
+    for col in yn_cols:
+        if col in df.columns:
+            df[col] = df[col].map({"Yes": 1, "No": 0})
+    return df
+
+
+# 5.5 Fechas. La encuesta exporta día primero y en dos formatos ("8/7/2020 12:02"
+# y "13/07/2020 21:22:56"); pd.to_datetime sin formato infería el de la primera
+# fila y anulaba las del otro. Ahora la familia de formatos se detecta una vez,
+# cada texto distinto se parsea una sola vez (con strptime de Arrow) y el
+# resultado se reparte a las filas por su código de factorize. Los textos que
+# no coinciden con ningún formato se cuentan en lugar de perderse en silencio.
+FAMILIAS_FECHA = {
+    "dia_primero": ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"),
+    "mes_primero": ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y"),
+    "iso": ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"),
+}
+# Filas (desde el inicio del archivo) que se miran para elegir la familia
+MUESTRA_FECHAS = 10_000
+# Valores que ya representan "sin fecha" (tratar_nulos rellena con "Nulo")
+NULOS_FECHA = ["Nulo"]
+
+
+def _patron_mes(formato):
+    """Regex que captura el mes de un texto con `formato`."""
+    partes = re.split(r"(%[a-zA-Z])", formato)
+    return r"^\s*" + "".join(
+        r"(?P<mes>\d+)" if p == "%m" else r"\d+" if re.fullmatch(r"%[a-zA-Z]", p) else re.escape(p)
+        for p in partes
+    )
+
+
+def _parsear_textos(textos, formato):
+    """datetime64[ns] de cada texto (arreglo de Arrow) con `formato`; NaT si no coincide."""
+    fechas = pc.strptime(textos, format=formato, unit="ns", error_is_null=True)
+    if "%m" in formato:
+        # strptime de Arrow lleva las fechas imposibles al mes siguiente
+        # (31/02 → 02/03): se anulan las que no conservan el mes escrito
+        mes = pc.struct_field(pc.extract_regex(textos, _patron_mes(formato)), "mes")
+        fechas = pc.if_else(pc.equal(pc.month(fechas), pc.cast(mes, pa.int64())), fechas, None)
+    return fechas.to_numpy(zero_copy_only=False)
+
+
+def _textos_unicos(serie):
+    codigos, unicos = pd.factorize(serie)
+    return codigos, pa.array(pd.Series(unicos, dtype=object).astype(str), type=pa.string())
+
+
+def detectar_formatos_fecha(valores):
+    """Familia de formatos (de FAMILIAS_FECHA) que reconoce más valores
+    distintos de la muestra; ante empate gana la primera (día primero)."""
+    _, textos = _textos_unicos(pd.Series(valores, dtype=object))
+    mejor, reconocidos = FAMILIAS_FECHA["dia_primero"], 0
+    for formatos in FAMILIAS_FECHA.values():
+        ok = np.zeros(len(textos), dtype=bool)
+        for formato in formatos:
+            ok |= ~np.isnat(_parsear_textos(textos, formato))
+        if ok.sum() > reconocidos:
+            mejor, reconocidos = formatos, ok.sum()
+    return mejor
+
+
+def parsear_fechas(serie, formatos=None, invalidas=None):
+    """Convierte textos a datetime64[ns] parseando cada valor distinto una vez.
+
+    `formatos` es un formato o una lista que se prueba en orden (None: se
+    detecta con las primeras MUESTRA_FECHAS filas). `invalidas` (Counter
+    opcional) acumula los textos que no coincidieron, con su número de filas.
+    """
+    if formatos is None:
+        formatos = detectar_formatos_fecha(serie.iloc[:MUESTRA_FECHAS])
+    elif isinstance(formatos, str):
+        formatos = [formatos]
+
+    codigos, textos = _textos_unicos(serie)
+    fechas = np.full(len(textos), np.datetime64("NaT", "ns"))
+    for formato in formatos:
+        pendientes = np.flatnonzero(np.isnat(fechas))
+        if not len(pendientes):
+            break
+        fechas[pendientes] = _parsear_textos(textos.take(pendientes), formato)
+
+    if invalidas is not None:
+        fallidos = np.isnat(fechas) & ~pc.is_in(textos, pa.array(NULOS_FECHA)).to_numpy(zero_copy_only=False)
+        frecuencias = np.bincount(codigos[codigos >= 0], minlength=len(textos))
+        for i in np.flatnonzero(fallidos):
+            invalidas[textos[i].as_py()] += int(frecuencias[i])
+
+    # Código -1 (nulo) → la última posición, NaT
+    return pd.Series(np.append(fechas, np.datetime64("NaT", "ns"))[codigos], index=serie.index, name=serie.name)
+
+
+def fechas_fallidas(crudas, fechas):
+    """Filas con texto de fecha que no se pudo convertir."""
+    return (fechas.isna() & crudas.notna() & ~crudas.isin(NULOS_FECHA)).to_numpy()
+
+
+def formatos_fecha_archivo(path):
+    """Familia de formatos de fecha de un CSV, elegida con sus primeras
+    MUESTRA_FECHAS filas (las mismas que mira limpiar_dataset)."""
+    muestra = pd.read_csv(path, nrows=MUESTRA_FECHAS, dtype=str,
+                          usecols=lambda c: c.strip().lower() == "timestamp")
+    return detectar_formatos_fecha(muestra.iloc[:, 0]) if muestra.shape[1] else None
+
+
+def convertir_fechas(df, formatos=None, invalidas=None):
+    if "timestamp" in df.columns:
+        df["timestamp"] = parsear_fechas(df["timestamp"], formatos, invalidas)
+    return df
+
+
+def edad_entera(df):
+    df["age"] = df["age"].astype(float).astype(int)
+    return df
+
+
+def normalizar_valores(df, no_resueltos=None, formatos_fecha=None, fechas_invalidas=None):
+    df = normalizar_programa(df, no_resueltos)
+    df = normalizar_anio_cgpa(df)
+    df = mapear_si_no(df)
+    df = convertir_fechas(df, formatos_fecha, fechas_invalidas)
+    return edad_entera(df)
+
+
+# 6. Traducción de nombres de columnas al español
+def traducir_columnas(df):
+    return df.rename(columns=column_translate)
+
+
+# 7. Representación compacta (opcional): categorías, banderas int8 y edad uint8
+COLUMNAS_CATEGORICAS = [
+    "genero",
+    "programa_academico",
+    "año_estudio",
+    "Promedio_de_calificaciones",
+]
+COLUMNAS_BANDERA = [column_translate[c] for c in yn_cols]
+
+
+def compactar_tipos(df, reportar=False):
+    """Convierte el DataFrame limpio a tipos compactos.
+
+    Texto repetido → `category`, banderas 0/1 → `int8` (`float32` si quedó
+    algún nulo tras el .map de Yes/No) y edad → `uint8`. Con `reportar=True`
+    imprime el uso de memoria antes y después por columna.
+    """
+    antes = df.memory_usage(deep=True)
+    df = df.copy()
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in COLUMNAS_BANDERA:
+        if col in df.columns:
+            df[col] = df[col].astype("float32" if df[col].isna().any() else "int8")
+    if "edad" in df.columns:
+        df["edad"] = df["edad"].astype("uint8" if df["edad"].between(0, 255).all() else "uint16")
+
+    if reportar:
+        despues = df.memory_usage(deep=True)
+        reporte = pd.DataFrame({"antes_bytes": antes, "despues_bytes": despues})
+        reporte["factor"] = (reporte["antes_bytes"] / reporte["despues_bytes"]).round(1)
+        print("\nUso de memoria (deep=True) antes y después de compactar tipos:")
+        print(reporte)
+        print(f"Total: {antes.sum():,} → {despues.sum():,} bytes "
+              f"({antes.sum() / despues.sum():.1f}x)")
+    return df
+
+
+def limpiar_dataset(df, verbose=False, no_resueltos=None, fechas_invalidas=None):
+    """Aplica el pipeline completo del Bloque 1 a un DataFrame crudo."""
+    df = estandarizar_columnas(df)
+    # Formato de fechas elegido con las primeras filas, antes de quitar
+    # duplicados (así coincide con la limpieza por partes y en paralelo)
+    formatos = (
+        detectar_formatos_fecha(df["timestamp"].iloc[:MUESTRA_FECHAS]) if "timestamp" in df.columns else None
+    )
+    if verbose:
+        print("\nTipos de datos:")
+        df.info()
+        print("\nValores nulos por columna:")
+        print(df.isnull().sum())
+
+    df = tratar_nulos(df)
+
+    # 4. Eliminar duplicados
+    if verbose:
+        print("Duplicados encontrados:", df.duplicated().sum())
+    df = df.drop_duplicates().reset_index(drop=True)
+
+    df = normalizar_valores(df, no_resueltos, formatos, fechas_invalidas)
+    if verbose and fechas_invalidas:
+        print("Fechas que no coinciden con el formato:", sum(fechas_invalidas.values()), "filas")
+    return traducir_columnas(df)
+
+
+# %%
+# Snapshot en disco del DataFrame limpio
+def hash_archivo(path, bloque=1 << 20):
+    """Hash SHA-256 del contenido del archivo, leído por bloques."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for parte in iter(lambda: f.read(bloque), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def ruta_reporte_programas(path, cache_dir=None):
+    return Path(cache_dir or CACHE_DIR) / f"{Path(path).stem}-programas_no_resueltos.csv"
+
+
+def ruta_reporte_fechas(path, cache_dir=None):
+    return Path(cache_dir or CACHE_DIR) / f"{Path(path).stem}-fechas_invalidas.csv"
+
+
+def ruta_snapshot(path, cache_dir=None, compacto=False):
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    clave = hash_archivo(path)[:16]
+    sufijo = "-compacto" if compacto else ""
+    return cache_dir / f"{Path(path).stem}-{clave}-v{PIPELINE_VERSION}{sufijo}.feather"
+
+
+def limpiar_archivo(path, verbose=False, no_resueltos=None, procesos=1, fechas_invalidas=None):
+    """Lee y limpia el CSV completo; con `procesos` > 1 en paralelo."""
+    if procesos > 1:
+        df = limpiar_paralelo(path, procesos, no_resueltos, fechas_invalidas)
+        if verbose:
+            print(f"Limpieza en paralelo ({procesos} procesos): {len(df)} filas")
+        return df
+    return limpiar_dataset(pd.read_csv(path), verbose=verbose, no_resueltos=no_resueltos,
+                           fechas_invalidas=fechas_invalidas)
+
+
+def load_clean_dataset(path, cache_dir=None, usar_cache=True, verbose=False, compacto=False,
+                       procesos=1):
+    """Devuelve el DataFrame limpio de `path`.
+
+    Si existe un snapshot Feather con el mismo hash de contenido y la misma
+    versión del pipeline se carga directamente; si no, se limpia el CSV y se
+    guarda el snapshot para el siguiente arranque. Con `compacto=True` se
+    guarda y devuelve la versión con tipos compactos (ver `compactar_tipos`).
+    `procesos` > 1 reparte la limpieza entre procesos (ver `limpiar_paralelo`).
+    """
+    if not usar_cache:
+        df = limpiar_archivo(path, verbose=verbose, procesos=procesos)
+        return compactar_tipos(df, reportar=verbose) if compacto else df
+
+    destino = ruta_snapshot(path, cache_dir, compacto)
+    if destino.exists():
+        try:
+            return pd.read_feather(destino)
+        except Exception as exc:  # snapshot corrupto o de otra versión de pyarrow
+            print(f"Snapshot inválido ({destino.name}): {exc}; se regenera")
+
+    no_resueltos, fechas_invalidas = Counter(), Counter()
+    df = limpiar_archivo(path, verbose=verbose, no_resueltos=no_resueltos, procesos=procesos,
+                         fechas_invalidas=fechas_invalidas)
+    escribir_reporte_no_resueltos(no_resueltos, ruta_reporte_programas(path, cache_dir))
+    escribir_reporte_no_resueltos(fechas_invalidas, ruta_reporte_fechas(path, cache_dir))
+    if verbose and no_resueltos:
+        print("Programas sin alias conocido:", dict(no_resueltos.most_common(10)))
+    if compacto:
+        df = compactar_tipos(df, reportar=verbose)
+
+    # Escritura atómica: otro worker puede estar leyendo la misma ruta
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_suffix(f".{os.getpid()}.tmp")
+    df.to_feather(tmp)
+    os.replace(tmp, destino)
+
+    # Eliminar snapshots viejos del mismo archivo. El nombre debe tener la
+    # forma exacta de ruta_snapshot: un glob por prefijo también tomaría los
+    # de otros archivos cuyo nombre empieza igual (cohorte "X" y "X-2024")
+    sufijo = "-compacto" if compacto else ""
+    propio = re.compile(rf"{re.escape(Path(path).stem)}-[0-9a-f]{{16}}-v\d+{sufijo}\.feather")
+    for viejo in destino.parent.glob(f"{Path(path).stem}-*.feather"):
+        if viejo != destino and propio.fullmatch(viejo.name):
+            viejo.unlink(missing_ok=True)
+    return df
+
+
+# %%
+# Ingesta por partes (chunks) para archivos que no caben en memoria
+def mediana_global(path, columna="age", chunksize=500_000):
+    """Mediana exacta de una columna numérica leyendo solo esa columna por
+    partes: se acumula el histograma de valores (las edades son pocas)."""
+    conteos = None
+    lector = pd.read_csv(
+        path,
+        usecols=lambda c: c.strip().lower() == columna,
+        chunksize=chunksize,
+    )
+    for chunk in lector:
+        vc = pd.to_numeric(chunk.iloc[:, 0], errors="coerce").value_counts()
+        conteos = vc if conteos is None else conteos.add(vc, fill_value=0)
+
+    if conteos is None or conteos.sum() == 0:
+        return float("nan")
+    conteos = conteos.sort_index()
+    acumulado = conteos.cumsum().to_numpy()
+    total = acumulado[-1]
+    valores = conteos.index.to_numpy(dtype=float)
+    # Igual que Series.median(): promedio de los dos centrales si el total es par
+    bajo = valores[acumulado.searchsorted((total - 1) // 2, side="right")]
+    alto = valores[acumulado.searchsorted(total // 2, side="right")]
+    return (bajo + alto) / 2
+
+
+def preparar_parte(chunk, medianas):
+    """Pasos 2 y 3 sobre una parte leída como texto (`dtype=str`)."""
+    # Todo como texto salvo la edad: así una parte sin datos en una columna
+    # no cambia de tipo respecto a la lectura completa. La edad siempre como
+    # float64 para que el hash de una fila no dependa de si su parte tenía nulos
+    chunk = estandarizar_columnas(chunk)
+    chunk["age"] = pd.to_numeric(chunk["age"]).astype("float64")
+    return tratar_nulos(chunk, medianas)
+
+
+def hash_filas(chunk):
+    """Hash de 64 bits de cada fila, para detectar duplicados entre partes."""
+    return pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+
+
+class LimpiadorIncremental:
+    """Limpia partes de un CSV leídas como texto (`dtype=str`) con las mismas
+    reglas que `limpiar_dataset`, recordando un hash de 64 bits por fila ya
+    vista (8 bytes por fila distinta) para descartar duplicados entre partes.
+
+    `medianas` fija el relleno de nulos numéricos y `formatos_fecha` el formato
+    de las fechas para todas las partes; la usan tanto la lectura por partes
+    como la ingesta en vivo (ingesta_viva.py).
+    """
+
+    def __init__(self, medianas, deduplicar=True, formatos_fecha=None):
+        self.medianas = medianas
+        self.deduplicar = deduplicar
+        self.formatos_fecha = formatos_fecha
+        self.vistos = np.empty(0, dtype=np.uint64)
+
+    def preparar(self, chunk):
+        return preparar_parte(chunk, self.medianas)
+
+    def _nuevas(self, chunk):
+        h = hash_filas(chunk)
+        nuevas = ~pd.Series(h).duplicated().to_numpy() & ~np.isin(h, self.vistos)
+        self.vistos = np.union1d(self.vistos, h[nuevas])
+        return nuevas
+
+    def registrar(self, chunk):
+        """Marca como vistas las filas de `chunk` sin limpiarlas."""
+        if self.deduplicar:
+            self._nuevas(self.preparar(chunk))
+
+    def limpiar(self, chunk, no_resueltos=None, fechas_invalidas=None):
+        """Parte limpia (columnas en español) o None si no quedó ninguna fila."""
+        chunk = self.preparar(chunk)
+        if self.deduplicar:
+            # Copia: las normalizaciones asignan columnas sobre la parte filtrada
+            chunk = chunk.loc[self._nuevas(chunk)].copy()
+        if not len(chunk):
+            return None
+        return traducir_columnas(
+            normalizar_valores(chunk, no_resueltos, self.formatos_fecha, fechas_invalidas)
+        )
+
+
+def limpiar_por_chunks(path, chunksize=200_000, deduplicar=True, no_resueltos=None,
+                       fechas_invalidas=None):
+    """Generador de partes limpias del CSV, con la memoria acotada por `chunksize`.
+
+    Produce los mismos valores que `limpiar_dataset`: la mediana de la edad se
+    calcula antes sobre todo el archivo, el formato de fechas con sus primeras
+    filas y los duplicados se detectan entre partes con un hash de 64 bits por
+    fila (ver LimpiadorIncremental).
+    """
+    limpiador = LimpiadorIncremental(
+        {"age": mediana_global(path)}, deduplicar, formatos_fecha_archivo(path)
+    )
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=str):
+        limpio = limpiador.limpiar(chunk, no_resueltos, fechas_invalidas)
+        if limpio is not None:
+            yield limpio
+
+
+# %%
+# Limpieza en paralelo por rangos de bytes
+# El pipeline es trabajo de texto de pandas que ocupa un solo núcleo. Con
+# limpiar_paralelo el CSV se parte en rangos de bytes que empiezan y terminan
+# en un salto de línea (como en la ingesta por partes, se asume que ningún
+# campo lleva saltos de línea entre comillas) y cada proceso lee, limpia y
+# normaliza su rango. El resultado es idéntico al de limpiar_dataset:
+# - la mediana de la edad y el formato de las fechas se fijan antes, sobre el
+#   archivo completo, y son los mismos para todas las partes;
+# - cada parte descarta sus duplicados internos y devuelve el hash de las filas
+#   que quedan; el proceso principal recorre las partes en orden y descarta las
+#   filas ya vistas en una parte anterior (se conserva la primera aparición);
+# - los programas sin alias y las fechas inválidas se cuentan al final, sobre
+#   las filas que quedaron.
+BYTES_POR_PARTE = 32 << 20
+
+
+def procesos_disponibles():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        return os.cpu_count() or 1
+
+
+def rangos_de_bytes(path, partes):
+    """(cabecera, [(inicio, fin), ...]) con `partes` rangos de líneas completas."""
+    tamano = os.path.getsize(path)
+    with open(path, "rb") as f:
+        cabecera = f.readline()
+        limites = [f.tell()]
+        for k in range(1, partes):
+            f.seek(max(limites[-1], tamano * k // partes))
+            f.readline()  # se avanza hasta el inicio de la línea siguiente
+            limites.append(min(f.tell(), tamano))
+    limites.append(tamano)
+    return cabecera, [(a, b) for a, b in zip(limites[:-1], limites[1:]) if b > a]
+
+
+def _limpiar_rango(path, cabecera, inicio, fin, medianas, formatos_fecha):
+    """Trabajo de cada proceso: (parte limpia, hashes de sus filas, programa
+    sin normalizar de cada fila, textos de fecha inválidos por fila) o None si
+    el rango no tenía filas."""
+    with open(path, "rb") as f:
+        f.seek(inicio)
+        datos = f.read(fin - inicio)
+    parte = preparar_parte(pd.read_csv(io.BytesIO(cabecera + datos), dtype=str), medianas)
+    if parte.empty:
+        return None
+
+    h = hash_filas(parte)
+    unicas = ~pd.Series(h).duplicated().to_numpy()
+    parte = parte.loc[unicas].reset_index(drop=True)
+    programas = parte["what_is_your_course?"].astype("category")
+    crudas = parte["timestamp"]
+    limpia = traducir_columnas(normalizar_valores(parte, formatos_fecha=formatos_fecha))
+    invalidas = crudas[fechas_fallidas(crudas, limpia["fecha_registro"])]
+    return limpia, h[unicas], programas, invalidas
+
+
+def limpiar_paralelo(path, procesos=None, no_resueltos=None, fechas_invalidas=None,
+                     bytes_por_parte=BYTES_POR_PARTE):
+    """Mismo resultado que limpiar_dataset(pd.read_csv(path)) repartiendo la
+    limpieza entre `procesos` procesos (por defecto, los núcleos disponibles)."""
+    procesos = procesos or procesos_disponibles()
+    partes = max(procesos, -(-os.path.getsize(path) // bytes_por_parte))
+    cabecera, rangos = rangos_de_bytes(path, partes)
+    medianas = {"age": mediana_global(path)}
+    formatos = formatos_fecha_archivo(path)
+
+    with ProcessPoolExecutor(procesos) as pool:
+        resultados = [
+            r for r in pool.map(_limpiar_rango, repeat(path), repeat(cabecera),
+                                [a for a, _ in rangos], [b for _, b in rangos],
+                                repeat(medianas), repeat(formatos))
+            if r is not None
+        ]
+    if not resultados:
+        return limpiar_dataset(pd.read_csv(path), no_resueltos=no_resueltos,
+                               fechas_invalidas=fechas_invalidas)
+
+    # Duplicados entre partes: en el orden del archivo, solo la primera aparición
+    hashes = np.concatenate([r[1] for r in resultados])
+    nuevas = ~pd.Series(hashes).duplicated().to_numpy()
+    cortes = np.cumsum([len(r[1]) for r in resultados])[:-1]
+    limpias, programas = [], []
+    for (limpia, _, programa, invalidas), quedan in zip(resultados, np.split(nuevas, cortes)):
+        limpias.append(limpia.loc[quedan])
+        programas.append(programa[quedan])
+        if fechas_invalidas is not None:
+            fechas_invalidas.update(invalidas[quedan[invalidas.index]].tolist())
+
+    if no_resueltos is not None:
+        normalizar_programas(pd.concat(programas, ignore_index=True), course_map, no_resueltos)
+    return pd.concat(limpias, ignore_index=True)
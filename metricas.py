@@ -0,0 +1,243 @@
+# Métricas de la app en formato de texto de Prometheus (/metrics)
+# Al arrancar se mide cada etapa de los Bloques 1 a 3 (carga y limpieza,
+# cada agregado y grupo de figuras, armado y serialización del layout): su
+# tiempo de reloj y cuánto creció la memoria residente del proceso (RSS). Las
+# cohortes que se preparan más tarde registran sus etapas igual, con su nombre.
+#
+# En cada petición, un par de hooks de Flask mide la latencia y el tamaño de
+# la respuesta ya comprimida. Los callbacks de Dash llegan todos a la misma
+# ruta (_dash-update-component), así que se distinguen por sus Outputs. Las
+# latencias se acumulan en histogramas de buckets fijos, como los de
+# prometheus_client pero sin depender de él.
+#
+# Con gunicorn cada worker tiene su propio registro: las etapas de arranque se
+# heredan del maestro (preload_app), pero las latencias son las del worker que
+# responde a cada scrape.
+import math
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+PREFIJO = "visualizacion"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Segundos; los mismos límites por defecto de los clientes de Prometheus
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# Bytes de las respuestas: de 1 KiB a 16 MiB en potencias de 4
+BUCKETS_BYTES = tuple(4 ** k * 1024 for k in range(8))
+
+
+def memoria_residente():
+    """RSS actual del proceso en bytes (pico de RSS si no hay /proc)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss viene en KiB en Linux y en bytes en macOS
+        return pico if sys.platform == "darwin" else pico * 1024
+
+
+# %%
+# Registro
+class Histograma:
+    """Conteos acumulados por bucket, por combinación de etiquetas."""
+
+    def __init__(self, nombre, ayuda, etiquetas, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = buckets
+        # {valores de etiquetas: [conteo por bucket..., +Inf, suma]}
+        self.series = defaultdict(lambda: [0] * (len(buckets) + 1) + [0.0])
+        self.lock = threading.Lock()
+
+    def observar(self, valor, *etiquetas):
+        with self.lock:
+            serie = self.series[etiquetas]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+            serie[-2] += 1
+            serie[-1] += valor
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self.lock:
+            series = {k: list(v) for k, v in self.series.items()}
+        for valores, serie in sorted(series.items()):
+            base = _etiquetas(zip(self.etiquetas, valores))
+            for limite, conteo in zip(self.buckets + ("+Inf",), serie[:-1]):
+                le = _etiquetas([("le", limite if limite == "+Inf" else repr(float(limite)))])
+                lineas.append(f"{self.nombre}_bucket{_unir(base, le)} {conteo}")
+            lineas.append(f"{self.nombre}_count{_unir(base, '')} {serie[-2]}")
+            lineas.append(f"{self.nombre}_sum{_unir(base, '')} {_numero(serie[-1])}")
+        return lineas
+
+
+def _numero(valor):
+    """Valor en la sintaxis de Prometheus (acepta escalares de numpy)."""
+    valor = float(valor)
+    if math.isnan(valor):
+        return "NaN"
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return str(int(valor)) if valor.is_integer() and abs(valor) < 2 ** 53 else repr(valor)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _etiquetas(pares):
+    pares = list(pares)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _unir(a, b):
+    """Junta dos bloques de etiquetas {..} en uno solo."""
+    if not a or not b:
+        return a or b
+    return a[:-1] + "," + b[1:]
+
+
+class Metricas:
+    """Etapas de arranque, histogramas de peticiones y medidas instantáneas.
+
+    `medidas` son funciones sin argumentos que se evalúan en cada scrape y
+    devuelven [(nombre, tipo, ayuda, [(etiquetas, valor)])]; así el tamaño de
+    las cohortes o de las pestañas se lee al momento, no cuando se registró.
+    """
+
+    def __init__(self, prefijo=PREFIJO):
+        self.prefijo = prefijo
+        self.inicio = time.time()
+        # {(cohorte, etapa): (segundos, bytes de RSS agregados)}
+        self.etapas = {}
+        self.medidas = []
+        self.lock = threading.Lock()
+        self.latencia = Histograma(
+            f"{prefijo}_peticion_segundos", "Latencia de las peticiones HTTP por ruta",
+            ("ruta", "metodo", "codigo"), BUCKETS_LATENCIA,
+        )
+        self.bytes_respuesta = Histograma(
+            f"{prefijo}_respuesta_bytes", "Bytes enviados (ya comprimidos) por ruta",
+            ("ruta",), BUCKETS_BYTES,
+        )
+        self.latencia_callback = Histograma(
+            f"{prefijo}_callback_segundos", "Latencia de los callbacks de Dash por Outputs",
+            ("callback",), BUCKETS_LATENCIA,
+        )
+        self.bytes_callback = Histograma(
+            f"{prefijo}_callback_bytes", "Bytes enviados por los callbacks de Dash",
+            ("callback",), BUCKETS_BYTES,
+        )
+
+    def iniciar_etapa(self, nombre, cohorte=""):
+        """Empieza a medir una etapa; devuelve la función que la cierra (para
+        bloques de nivel de módulo que no conviene meter en un `with`)."""
+        rss = memoria_residente()
+        t0 = time.perf_counter()
+
+        def terminar():
+            segundos = time.perf_counter() - t0
+            with self.lock:
+                self.etapas[(cohorte, nombre)] = (segundos, memoria_residente() - rss)
+        return terminar
+
+    @contextmanager
+    def etapa(self, nombre, cohorte=""):
+        """Mide el bloque `with` como una etapa (se guarda también si falla)."""
+        terminar = self.iniciar_etapa(nombre, cohorte)
+        try:
+            yield
+        finally:
+            terminar()
+
+    def resumen(self, cohorte=None):
+        """Tabla de texto de las etapas (de una cohorte o todas) para el log."""
+        with self.lock:
+            etapas = [(c, e, s, b) for (c, e), (s, b) in self.etapas.items() if cohorte in (None, c)]
+        lineas = [f"{'etapa':<34}{'segundos':>10}{'Δ RSS MiB':>12}"]
+        lineas += [f"{(c + '/' if c and cohorte is None else '') + e:<34}{s:10.3f}{b / 2**20:12.1f}"
+                   for c, e, s, b in etapas]
+        return "\n".join(lineas)
+
+    # Peticiones
+    def instrumentar(self, server, ruta="/metrics"):
+        """Registra los hooks de latencia y la ruta de exposición. Debe
+        llamarse antes de otros before_request que puedan responder solos
+        (cache_http) para que esas respuestas también se midan, y sus
+        after_request corren al final, sobre el cuerpo ya comprimido."""
+        server.before_request(self._antes)
+        server.after_request(self._despues)
+        server.add_url_rule(ruta, "metricas", lambda: Response(self.exponer(), content_type=CONTENT_TYPE))
+
+    @staticmethod
+    def _antes():
+        g.inicio_metricas = time.perf_counter()
+
+    def _despues(self, respuesta):
+        inicio = g.pop("inicio_metricas", None)
+        if inicio is None:
+            return respuesta
+        segundos = time.perf_counter() - inicio
+        # La regla de Flask (no la URL) acota las etiquetas: los paquetes con
+        # huella de versión comparten una sola
+        ruta = request.url_rule.rule if request.url_rule is not None else "desconocida"
+        tamano = None if respuesta.direct_passthrough else respuesta.calculate_content_length()
+
+        self.latencia.observar(segundos, ruta, request.method, str(respuesta.status_code))
+        if tamano is not None:
+            self.bytes_respuesta.observar(tamano, ruta)
+        if ruta.endswith("_dash-update-component"):
+            cuerpo = request.get_json(silent=True) or {}
+            callback = cuerpo.get("output", "desconocido")
+            self.latencia_callback.observar(segundos, callback)
+            if tamano is not None:
+                self.bytes_callback.observar(tamano, callback)
+        return respuesta
+
+    # Exposición
+    def exponer(self):
+        p = self.prefijo
+        with self.lock:
+            etapas = sorted(self.etapas.items())
+        lineas = [
+            f"# HELP {p}_etapa_segundos Duración de cada etapa de preparación",
+            f"# TYPE {p}_etapa_segundos gauge",
+        ]
+        lineas += [f"{p}_etapa_segundos{_etiquetas([('cohorte', c), ('etapa', e)])} {_numero(s)}"
+                   for (c, e), (s, _) in etapas]
+        lineas += [
+            f"# HELP {p}_etapa_memoria_bytes RSS agregado durante cada etapa de preparación",
+            f"# TYPE {p}_etapa_memoria_bytes gauge",
+        ]
+        lineas += [f"{p}_etapa_memoria_bytes{_etiquetas([('cohorte', c), ('etapa', e)])} {b}"
+                   for (c, e), (_, b) in etapas]
+        lineas += [
+            f"# HELP {p}_proceso_memoria_bytes Memoria residente del proceso",
+            f"# TYPE {p}_proceso_memoria_bytes gauge",
+            f"{p}_proceso_memoria_bytes {memoria_residente()}",
+            f"# HELP {p}_proceso_inicio_segundos Hora de arranque (epoch)",
+            f"# TYPE {p}_proceso_inicio_segundos gauge",
+            f"{p}_proceso_inicio_segundos {_numero(self.inicio)}",
+        ]
+        for medida in self.medidas:
+            for nombre, tipo, ayuda, valores in medida():
+                lineas += [f"# HELP {p}_{nombre} {ayuda}", f"# TYPE {p}_{nombre} {tipo}"]
+                lineas += [f"{p}_{nombre}{_etiquetas(et)} {_numero(v)}" for et, v in valores]
+        for histograma in (self.latencia, self.bytes_respuesta, self.latencia_callback, self.bytes_callback):
+            lineas += histograma.exponer()
+        return "\n".join(lineas) + "\n"
+
+
+# Registro del proceso: app.py mide sus etapas aquí
+metricas = Metricas()
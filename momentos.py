@@ -0,0 +1,99 @@
+# Momentos combinables para la correlación del mapa de calor (Pestaña 5)
+# En lugar de recorrer todas las filas cada vez, se guardan por cada par de
+# columnas (i, j) el peso de las filas donde ambas tienen valor, la media de
+# cada una sobre esas filas y sus sumas de productos centradas. Un lote nuevo
+# se resume con unas pocas multiplicaciones de matrices y se combina con lo
+# acumulado mediante la fórmula de Chan et al. (la versión por lotes de
+# Welford), así que absorber un lote cuesta O(lote) y dos acumuladores de
+# partes distintas (chunks, procesos) se suman sin perder precisión.
+# La eliminación de nulos es por pares, igual que DataFrame.corr().
+import numpy as np
+import pandas as pd
+
+
+class Momentos:
+    """Momentos de primer y segundo orden por pares de columnas.
+
+    Para cada par (i, j), sobre las filas con i y j no nulos:
+    `peso[i, j]` suma de pesos, `media[i, j]` media de la columna i,
+    `comomento[i, j]` suma de (x_i - media_i)(x_j - media_j) y
+    `cuadrados[i, j]` suma de (x_i - media_i)^2. Las medias y cuadrados
+    de la columna j en el par son las traspuestas.
+    """
+
+    def __init__(self, columnas):
+        self.columnas = list(columnas)
+        k = len(self.columnas)
+        self.peso = np.zeros((k, k))
+        self.media = np.zeros((k, k))
+        self.comomento = np.zeros((k, k))
+        self.cuadrados = np.zeros((k, k))
+
+    @classmethod
+    def desde_lote(cls, matriz, pesos=None, columnas=None):
+        """Momentos de un solo lote (matriz filas × columnas, con NaN como nulo)."""
+        matriz = np.asarray(matriz, dtype=np.float64)
+        m = cls(columnas if columnas is not None else range(matriz.shape[1]))
+        w = np.ones(len(matriz)) if pesos is None else np.asarray(pesos, dtype=np.float64)
+        validos = ~np.isnan(matriz)
+
+        # Se desplaza cada columna por su media en el lote antes de multiplicar
+        # para no restar números grandes y parecidos (cancelación)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            desplazamiento = np.nansum(matriz * w[:, None], axis=0) / (validos * w[:, None]).sum(axis=0)
+        desplazamiento = np.nan_to_num(desplazamiento)
+        x = np.where(validos, matriz - desplazamiento, 0.0)
+        v = validos.astype(np.float64)
+        wx, wv = x * w[:, None], v * w[:, None]
+
+        m.peso = wv.T @ v
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = np.where(m.peso > 0, (wx.T @ v) / m.peso, 0.0)
+        m.comomento = wx.T @ x - m.peso * media * media.T
+        m.cuadrados = (wx * x).T @ v - m.peso * media * media
+        m.media = media + desplazamiento[:, None]
+        return m
+
+    @classmethod
+    def desde_df(cls, df, columnas, pesos=None):
+        w = None if pesos is None else df[pesos].to_numpy(dtype=np.float64)
+        return cls.desde_lote(df[columnas].to_numpy(dtype=np.float64), w, columnas)
+
+    def combinar(self, otro):
+        """Nuevo acumulador con las filas de ambos (fórmula de Chan por par)."""
+        if self.columnas != otro.columnas:
+            raise ValueError("Los momentos a combinar deben tener las mismas columnas")
+        r = Momentos(self.columnas)
+        r.peso = self.peso + otro.peso
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraccion = np.where(r.peso > 0, otro.peso / r.peso, 0.0)
+        delta = otro.media - self.media
+        r.media = self.media + delta * fraccion
+        factor = self.peso * fraccion  # na * nb / n
+        r.comomento = self.comomento + otro.comomento + delta * delta.T * factor
+        r.cuadrados = self.cuadrados + otro.cuadrados + delta * delta * factor
+        return r
+
+    __add__ = combinar
+
+    def agregar(self, matriz, pesos=None):
+        """Absorbe un lote nuevo en este acumulador y lo devuelve."""
+        nuevo = self.combinar(Momentos.desde_lote(matriz, pesos, self.columnas))
+        self.peso, self.media = nuevo.peso, nuevo.media
+        self.comomento, self.cuadrados = nuevo.comomento, nuevo.cuadrados
+        return self
+
+    def n_filas(self):
+        return float(np.diag(self.peso).max()) if len(self.columnas) else 0.0
+
+    def correlacion(self):
+        """Matriz de correlación de Pearson como DataFrame (diagonal 1, NaN
+        donde alguna columna no varía o no hay filas en común, también en la
+        diagonal de una columna constante, como DataFrame.corr)."""
+        var = self.cuadrados * self.cuadrados.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mat = np.clip(self.comomento / np.sqrt(var), -1, 1)
+        mat[(var <= 0) | (self.peso <= 0)] = np.nan
+        diagonal = np.diag_indices_from(mat)
+        mat[diagonal] = np.where((var[diagonal] > 0) & (self.peso[diagonal] > 0), 1.0, np.nan)
+        return pd.DataFrame(mat, index=self.columnas, columns=self.columnas)
@@ -0,0 +1,197 @@
+# Perfiles de peticiones individuales en producción
+# Con PERFILES=1 se puede perfilar una petición de Dash concreta (el layout o
+# un _dash-update-component) para ver por qué una pestaña o un callback es
+# lento. Solo se perfilan las peticiones que traen el secreto:
+#   - en la cabecera X-Perfil (para repetir un callback con curl), o
+#   - como ?perfil=<secreto> en la URL de la página: el navegador la manda en
+#     el Referer de cada callback, así que se perfila todo lo que haga esa
+#     pestaña del navegador
+# y de esas solo una fracción PERFILES_TASA, para poder dejarlo activo con carga.
+#
+# Dos modos:
+#   - "muestreo" (por defecto): un hilo aparte toma la pila del hilo de la
+#     petición cada PERFILES_INTERVALO_MS y guarda pilas colapsadas (.folded,
+#     una línea "a;b;c muestras"), que leen flamegraph.pl, inferno y speedscope.
+#     Su costo sobre la petición es mínimo.
+#   - "determinista": cProfile sobre la petición y un .prof de pstats (snakeviz,
+#     flameprof, gprof2dot). Mide cada llamada pero la hace más lenta, y el
+#     intérprete admite un solo cProfile a la vez: si hay otro, no se perfila.
+#
+# Los archivos van a PERFILES_DIR y solo se conservan los PERFILES_MAX más
+# recientes. Con PERFILES=0 no se registra ningún hook: el costo es cero.
+import cProfile
+import hmac
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from flask import g, request
+
+CABECERA = "X-Perfil"
+PARAMETRO = "perfil"
+MODOS = ("muestreo", "determinista")
+
+
+# %%
+# Muestreo de pilas
+def _nombre_marco(marco):
+    codigo = marco.f_code
+    return f"{codigo.co_name} ({Path(codigo.co_filename).name}:{codigo.co_firstlineno})"
+
+
+def pila_colapsada(marco):
+    """'externa;...;interna' de la pila que termina en `marco` (None si está
+    dentro de este módulo, es decir, cerrando el perfil)."""
+    nombres = []
+    while marco is not None:
+        if marco.f_code.co_filename == __file__:
+            return None
+        nombres.append(_nombre_marco(marco))
+        marco = marco.f_back
+    return ";".join(reversed(nombres))
+
+
+class Muestreador:
+    """Toma la pila de un hilo cada `intervalo` segundos hasta `detener()`.
+
+    El hilo de muestreo necesita el GIL para leer la pila, y el intérprete
+    solo lo cede cada sys.getswitchinterval() (5 ms): mientras haya algún
+    muestreo activo se baja a `intervalo` para no perder muestras.
+    """
+
+    lock = threading.Lock()
+    activos = 0
+    intervalo_original = None
+
+    def __init__(self, hilo, intervalo):
+        self.hilo = hilo
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self.alto = threading.Event()
+        self.trabajador = threading.Thread(target=self._muestrear, daemon=True)
+
+    def iniciar(self):
+        with Muestreador.lock:
+            if Muestreador.activos == 0:
+                Muestreador.intervalo_original = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.intervalo, Muestreador.intervalo_original))
+            Muestreador.activos += 1
+        self.trabajador.start()
+
+    def _muestrear(self):
+        while not self.alto.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo)
+            pila = pila_colapsada(marco) if marco is not None else None
+            if pila is not None:
+                self.pilas[pila] += 1
+
+    def detener(self):
+        self.alto.set()
+        self.trabajador.join()
+        with Muestreador.lock:
+            Muestreador.activos -= 1
+            if Muestreador.activos == 0:
+                sys.setswitchinterval(Muestreador.intervalo_original)
+
+    def guardar(self, ruta):
+        ruta.write_text("".join(f"{pila} {n}\n" for pila, n in self.pilas.most_common()))
+
+
+class Determinista:
+    """cProfile con la misma interfaz que Muestreador."""
+
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.perfil = cProfile.Profile()
+
+    def iniciar(self):
+        # Un solo cProfile activo por proceso: si otro hilo lo tiene, se salta
+        if not Determinista.lock.acquire(blocking=False):
+            raise RuntimeError("ya hay otra petición perfilándose")
+        self.perfil.enable()
+
+    def detener(self):
+        self.perfil.disable()
+        Determinista.lock.release()
+
+    def guardar(self, ruta):
+        self.perfil.dump_stats(ruta)
+
+
+# %%
+# Hooks de Flask
+def _slug(texto, largo=60):
+    return re.sub(r"[^\w.-]+", "_", texto).strip("_")[:largo] or "raiz"
+
+
+class PerfilesPeticion:
+    """Perfila las peticiones a `rutas` que traen `secreto` (ver arriba).
+
+    `tasa` es la fracción de esas peticiones que se perfila, `intervalo` el
+    periodo de muestreo en segundos y `maximo` cuántos perfiles se conservan
+    en `carpeta`.
+    """
+
+    def __init__(self, server, rutas, secreto, carpeta, modo="muestreo", tasa=1.0,
+                 intervalo=0.001, maximo=100):
+        if not secreto:
+            raise RuntimeError("PERFILES=1 requiere PERFILES_SECRETO")
+        if modo not in MODOS:
+            raise ValueError(f"Modo de perfil desconocido: {modo!r} (opciones: {', '.join(MODOS)})")
+        self.rutas = set(rutas)
+        self.secreto = secreto.encode()
+        self.carpeta = Path(carpeta)
+        self.modo = modo
+        self.tasa = tasa
+        self.intervalo = intervalo
+        self.maximo = maximo
+        self.lock = threading.Lock()
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        server.before_request(self._antes)
+        server.teardown_request(self._despues)
+
+    def _autorizada(self):
+        enviado = request.headers.get(CABECERA) or request.args.get(PARAMETRO)
+        if enviado is None:
+            enviado = parse_qs(urlsplit(request.referrer or "").query).get(PARAMETRO, [None])[0]
+        return enviado is not None and hmac.compare_digest(enviado.encode(), self.secreto)
+
+    def _antes(self):
+        if request.path not in self.rutas or not self._autorizada() or random.random() >= self.tasa:
+            return
+        perfil = (Muestreador(threading.get_ident(), self.intervalo) if self.modo == "muestreo"
+                  else Determinista())
+        try:
+            perfil.iniciar()
+        except RuntimeError:
+            return
+        g.perfil = (perfil, time.perf_counter())
+
+    def _despues(self, _exc=None):
+        perfil, inicio = g.pop("perfil", (None, None))
+        if perfil is None:
+            return
+        perfil.detener()
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        # Los callbacks se distinguen por sus Outputs, como en metricas.py
+        cuerpo = request.get_json(silent=True) if request.method == "POST" else None
+        objetivo = (cuerpo or {}).get("output", request.path)
+        segundos, nanos = divmod(time.time_ns(), 10**9)
+        fecha = time.strftime("%Y%m%d-%H%M%S", time.localtime(segundos))
+        extension = "folded" if self.modo == "muestreo" else "prof"
+        perfil.guardar(self.carpeta / f"{fecha}-{nanos:09d}-{_slug(objetivo)}-{milisegundos:.0f}ms.{extension}")
+        self._rotar()
+
+    def _rotar(self):
+        """Borra los perfiles más antiguos por encima de `maximo`."""
+        with self.lock:
+            # El nombre empieza con la fecha: el orden alfabético es el cronológico
+            archivos = sorted(r for r in self.carpeta.iterdir() if r.suffix in (".folded", ".prof"))
+            for ruta in archivos[:max(0, len(archivos) - self.maximo)]:
+                ruta.unlink(missing_ok=True)
@@ -0,0 +1,464 @@
+# Bloque 3 – Contenido de cada pestaña del storytelling
+# Cada pestaña se arma con una función que recibe las figuras ya construidas,
+# así el layout inicial solo lleva la barra de pestañas y el contenido se pide
+# bajo demanda (ver CachePestanas y el callback de app.py).
+import json
+import threading
+
+from dash import dcc, html, dash_table
+
+from cache_http import serializar
+from distribuciones import ETIQUETAS_GRANULARIDAD, GRANULARIDAD_INICIAL
+from indice_bitmap import RANGOS_EDAD
+
+OPCIONES_SINTOMAS = [
+    {"label": "Depresión", "value": "tiene_depresion"},
+    {"label": "Ansiedad", "value": "tiene_ansiedad"},
+    {"label": "Ataques de pánico", "value": "tiene_ataques_panico"},
+]
+
+
+# ---------------- Pestaña 1. Contexto ----------------
+def pestana_contexto(figs):
+    return [
+        html.Br(),
+        html.H2("Contexto del problema"),
+        html.P(
+            "En los últimos años, la salud mental ha adquirido una importancia exponencial debido al aumento "
+            "de trastornos como la ansiedad o la depresión. La OMS estima que 1 de cada 7 adolescentes presenta "
+            "un trastorno mental (OMS 2025). En el ámbito educativo por otro lado, diversas investigaciones "
+            "señalan que la depresión puede afectar hasta al 66 % de los estudiantes universitarios y la ansiedad "
+            "a más del 40 %, influyendo directamente en su concentración, rendimiento y permanencia académica. "
+            "En Colombia, se calcula que el 44,7 % de los estudiantes reporta algún tipo de afectación emocional "
+            "como estrés o ansiedad (El Colombiano, 2025)."
+        ),
+        html.P(
+            "Es por lo anterior que vemos la importancia de analizar este conjunto de datos para estudiar la "
+            "relación entre la vida académica y el bienestar mental de los estudiantes universitarios, con el fin "
+            "de encontrar puntos clave para implementar mejoras continuas."
+        ),
+
+        html.H3("Descripción del conjunto de datos:"),
+        html.P(
+            "La información fue recopilada mediante una encuesta anónima en línea aplicada a 102 estudiantes "
+            "universitarios de diversas disciplinas. Las variables incluidas son:"
+        ),
+        html.Ul([
+            html.Li("Seleccione su género: Identidad de género del encuestado."),
+            html.Li("Edad: La edad del estudiante."),
+            html.Li("¿Cuál es tu curso?: Programa académico del estudiante."),
+            html.Li("Año actual de estudio: Nivel académico actual."),
+            html.Li("¿Cuál es su CGPA?: Promedio acumulado de calificaciones."),
+            html.Li("Estado civil: Situación civil del estudiante."),
+            html.Li("¿Sufre usted de depresión, ansiedad o ataques de pánico?: Síntomas reportados."),
+            html.Li("¿Consultó a algún especialista para recibir tratamiento?: Búsqueda de ayuda profesional."),
+        ]),
+
+        html.H3("Resultado general:"),
+        html.P("Inicialmente se observa cuántos estudiantes reportan cada uno de los trastornos mentales:"),
+
+        html.H3("Distribución general de síntomas"),
+        html.P("A continuación se muestra el porcentaje de estudiantes que reportan cada síntoma emocional:"),
+        dcc.Graph(id="fig_resumen_sintomas", figure=figs["fig_resumen_sintomas"]),
+
+        html.P("Distribuidos de la siguiente manera:"),
+
+        html.H4("Detalle por síntoma"),
+
+
+        html.Div([
+            html.Div([dcc.Graph(id="fig_dep", figure=figs["fig_dep"])], style={"width": "32%"}),
+            html.Div([dcc.Graph(id="fig_ans", figure=figs["fig_ans"])], style={"width": "32%"}),
+            html.Div([dcc.Graph(id="fig_panic", figure=figs["fig_panic"])], style={"width": "32%"}),
+        ], style={"display": "flex", "justify-content": "space-between"}),
+
+        html.Br(),
+
+        html.P(
+            "Se puede concluir que todos los estudiantes encuestados tenían o tuvieron algún tipo de trastorno "
+            "mental, ya sea ansiedad, depresión o ataques de pánico. Las proporciones entre cada condición son "
+            "muy similares, aunque la depresión presenta una ligera prevalencia del 34.3 %. Sin embargo, las "
+            "diferencias no son estadísticamente significativas."
+        ),
+
+        html.H3("Perfil de las respuestas"),
+        html.P(
+            "Edad de los encuestados y número de respuestas recibidas a lo largo de la encuesta. Ambos "
+            "gráficos se actualizan con los filtros de la parte superior."
+        ),
+        dcc.Graph(id="fig_edad", figure=figs["fig_edad"]),
+        dcc.RadioItems(
+            id="granularidad-tiempo",
+            options=[{"label": etiqueta, "value": valor} for valor, etiqueta in ETIQUETAS_GRANULARIDAD.items()],
+            value=GRANULARIDAD_INICIAL,
+            inline=True,
+        ),
+        dcc.Graph(id="fig_linea_tiempo", figure=figs["fig_linea_tiempo"]),
+    ]
+
+
+# ---------------- Pestaña 2. Factores académicos ----------------
+def pestana_academicos(figs):
+    return [
+        html.Br(),
+        html.H2("Factores académicos en relación a la salud mental", style={"fontWeight": "bold"}),
+
+
+        html.P(
+            "La siguiente variable por explorar es el programa académico en relación con los estudiantes que tienen "
+            "depresión. Se encuentra que priman con un 2.5 las carreras de tecnología de la información y ciencias "
+            "computacionales; a continuación, se encuentran Inglés, Psicología y Educación con un 2, y con una menor "
+            "cantidad se encuentran las carreras restantes de los alumnos encuestados."
+        ),
+
+
+        html.H3("Estudiantes con depresión por programa académico"),
+        dcc.Graph(id="fig_programa_dep", figure=figs["fig_programa_dep"]),
+
+        html.Br(),
+
+        html.P(
+            "De igual forma, se toma la siguiente variable a considerar, la cual relaciona los estudiantes con "
+            "depresión con el promedio de calificaciones. Podemos observar que el promedio acumulado de calificaciones, "
+            "considerado una medida del rendimiento académico, oscila entre 3.0 y 3.49 con aproximadamente 17 estudiantes; "
+            "contiguo a este, el rango de 3.5 a 4.0 con aproximadamente 13 estudiantes; y finalmente el rango entre "
+            "2.5 y 2.9 con cerca de 3 estudiantes. Dado lo anterior, la mayoría de los estudiantes superan una media "
+            "académica, sin embargo, es una calificación baja para unas expectativas académicas elevadas."
+        ),
+
+
+        html.H3("Relación entre CGPA y depresión"),
+        dcc.Graph(id="fig_cgpa_dep", figure=figs["fig_cgpa_dep"]),
+
+        html.Br(),
+
+        html.P(
+            "Continuando con las relaciones de las variables de depresión, anexamos la variable de ansiedad en relación "
+            "al año de estudio. Podemos observar que en el tercer año se encuentra el mayor número de estudiantes con "
+            "depresión y el segundo mayor número de estudiantes con ansiedad; mientras que en el segundo año se encuentra "
+            "una misma cantidad de estudiantes con ansiedad y con depresión. Esto puede relacionarse a que los momentos "
+            "críticos de un estudiante suelen ser antes del último año, pues se toman decisiones importantes como la "
+            "modalidad y tema de grado."
+        ),
+
+
+        html.H3("Ansiedad y depresión por año de estudio"),
+        dcc.Graph(id="fig_anio_symptoms", figure=figs["fig_anio_symptoms"]),
+
+        html.Br(),
+    ]
+
+
+# ---------------- Pestaña 3. Factores personales ----------------
+def pestana_personales(figs):
+    return [
+        html.Br(),
+
+        html.H2("Factores personales en relación a la salud mental", style={"fontWeight": "bold"}),
+
+        html.P(
+            "Pasando a las variables personales, tenemos el género, la edad y el estado civil, los cuales pueden "
+            "influir positiva o negativamente en los temas de salud mental, afectando el bienestar emocional. "
+            "Inicialmente, se identifica que las mujeres son más propensas a verse afectadas por ataques de pánico "
+            "en comparación con los hombres. Sin embargo, es importante señalar que esta diferencia no es altamente "
+            "marcada, lo cual puede sugerir que el entorno académico no presenta una discriminación significativa "
+            "entre géneros en este aspecto."
+        ),
+
+        html.H3("Proporción de estudiantes con ataques de pánico por género"),
+        dcc.Graph(id="fig_genero_panic", figure=figs["fig_genero_panic"]),
+
+        html.Br(),
+    ]
+
+
+# ---------------- Pestaña 4. Acceso a ayuda profesional ----------------
+def pestana_ayuda(figs):
+    return [
+        html.Br(),
+
+        html.H2("Acceso a ayuda profesional", style={"fontWeight": "bold"}),
+
+        html.P(
+            "Se tiene también la información de si los estudiantes contemplados han buscado o no una ayuda profesional, "
+            "llámese psicólogo y/o psiquiatra. Se observa que el 18% de los estudiantes con depresión han buscado ayuda "
+            "profesional, siendo este el porcentaje más alto en relación con las otras patologías; seguido por quienes "
+            "presentan ataques de pánico con un 9% y, finalmente, los estudiantes con ansiedad con un 12%. "
+            "Podemos observar una brecha importante: aunque muchos estudiantes reportan síntomas, solo una fracción de "
+            "ellos busca ayuda profesional, lo que sugiere la presencia de barreras como estigmas, falta de información "
+            "o acceso limitado a servicios especializados."
+        ),
+
+        html.H3("Brecha entre padecer síntomas y buscar ayuda profesional"),
+        dcc.Graph(id="fig_insight", figure=figs["fig_insight"]),
+
+        html.Br(),
+    ]
+
+
+# ---------------- Pestaña 5. Insight principal ----------------
+def pestana_insight(figs):
+    return [
+        html.Br(),
+
+        html.H2("Insight principal del análisis a través de la correlación", style={"fontWeight": "bold"}),
+
+
+        html.P(
+            "Dadas las visualizaciones obtenidas, para encontrar el punto clave del análisis se obtiene una "
+            "matriz de correlación, representada por el mapa de calor, con el cual se puede analizar la relación "
+            "entre las variables tenidas en cuenta con las patologías identificadas (depresión, ansiedad y ataques "
+            "de pánico). Normalmente, en un mapa de calor los coeficientes de correlación oscilan entre -1 y 1, "
+            "donde valores cercanos a cero indican relaciones débiles y valores positivos o negativos más altos "
+            "indican relaciones fuertes."
+        ),
+
+        html.H3("Mapa de calor de correlaciones: edad, síntomas y búsqueda de tratamiento"),
+        dcc.Graph(id="fig_corr", figure=figs["fig_corr"]),
+
+        html.Br(),
+
+        html.H3("Análisis:"),
+
+        html.P(
+            "En primer lugar, la edad muestra correlaciones muy bajas con los síntomas de salud mental: "
+            "-0.07 con depresión, -0.09 con ansiedad y 0.06 con ataques de pánico. Esto indica que la edad "
+            "no es un factor determinante en la presencia de síntomas, pues personas de distintas edades "
+            "manifiestan niveles similares de malestar emocional."
+        ),
+        html.P(
+            "Por otro lado, se observa una relación moderada y positiva entre depresión y ansiedad (0.27), "
+            "y entre depresión y ataques de pánico (0.25). Esto sugiere que quienes reportan síntomas "
+            "depresivos tienden también a manifestar ansiedad o ataques de pánico, lo cual es coherente "
+            "con la frecuente coexistencia de estos trastornos. La relación entre ansiedad y ataques de pánico "
+            "es baja (0.08), lo que podría deberse a las características de la muestra o a la forma en que se "
+            "formularon las preguntas del cuestionario."
+        ),
+        html.P(
+            "En cuanto a la búsqueda de tratamiento especializado, esta variable mantiene la correlación más alta "
+            "del conjunto con la depresión (0.35). Esto indica que quienes reportan depresión tienen mayor probabilidad "
+            "de acudir a un profesional de salud mental. También existen correlaciones positivas con ansiedad (0.09) "
+            "y ataques de pánico (0.18), aunque de menor magnitud. Esto sugiere que la presencia de síntomas puede "
+            "influir en la decisión de buscar ayuda, pero especialmente cuando se presenta depresión."
+        ),
+
+        html.Br(),
+
+        html.H3("Asociación entre todas las variables (V de Cramér)"),
+
+        html.P(
+            "El mapa de correlaciones solo admite la edad y las variables Sí/No. Para incluir el género, el programa "
+            "académico, el año de estudio, el promedio y el estado civil se usa la V de Cramér con corrección de sesgo, "
+            "que va de 0 (sin asociación) a 1 (asociación perfecta) y se calcula a partir de la tabla de contingencia "
+            "de cada par de variables. Al pasar el cursor sobre una celda se muestra el valor p de la prueba "
+            "chi-cuadrado de independencia."
+        ),
+
+        dcc.Graph(id="fig_asociacion", figure=figs["fig_asociacion"]),
+
+        html.P(
+            "La asociación más fuerte es la del estado civil con la depresión (0.59), seguida del promedio de "
+            "calificaciones con la búsqueda de tratamiento (0.37) y del estado civil con la búsqueda de tratamiento "
+            "(0.34), todas con valores p menores a 0.01. El género, en cambio, casi no se asocia con los síntomas, "
+            "en línea con lo observado en la pestaña de factores personales."
+        ),
+
+        html.Br(),
+    ]
+
+
+# ---------------- Pestaña 6. Limitaciones del análisis ----------------
+def pestana_limitaciones(figs):
+    return [
+        html.Br(),
+
+        html.H2("Consideraciones y limitaciones del estudio", style={"fontWeight": "bold"}),
+
+        html.P(
+            "Cabe resaltar que, aunque el conjunto de datos proporciona información valiosa sobre la relación entre "
+            "la salud mental y diversos factores académicos y personales de los estudiantes universitarios, es importante "
+            "reconocer ciertas limitaciones que pueden influir en la interpretación de los resultados. Dentro de estas "
+            "consideraciones encontramos:"
+        ),
+
+        html.Ul([
+            html.Li(
+                "Las respuestas son auto-reportadas y pueden incluir sesgos de percepción o de deseabilidad social, "
+                "afectando la precisión de los datos."
+            ),
+            html.Li(
+                "El tamaño y la representatividad de la muestra (102 estudiantes) no es suficiente para generalizar "
+                "los resultados a toda la población universitaria."
+            ),
+            html.Li(
+                "La ausencia de variables relevantes no registradas, como factores socioeconómicos, antecedentes "
+                "clínicos, consumo de sustancias, redes de apoyo familiar y social, o carga académica real."
+            ),
+            html.Li(
+                "El uso de preguntas dicotómicas simplifica condiciones que, en la práctica, requieren evaluación "
+                "y diagnóstico clínico, lo cual puede limitar la profundidad e interpretación de los resultados."
+            ),
+        ]),
+
+        html.Br(),
+    ]
+
+
+# ---------------- Pestaña 7. Conclusiones y recomendaciones ----------------
+def pestana_conclusiones(figs):
+    return [
+        html.Br(),
+
+        html.H2("Puntos de mejora y de recomendación", style={"fontWeight": "bold"}),
+        html.P(
+            "Con el fin de proceder a fortalecer el bienestar y salud mental estudiantil, se podría enfatizar en "
+            "realizar acciones estratégicas y de mejora encaminadas a la detección temprana y el acompañamiento oportuno. "
+            "Entre estas acciones, los tamizajes periódicos en programas o cohortes con mayor vulnerabilidad permitirían "
+            "identificar a tiempo a los estudiantes que requieren apoyo. De igual forma, es esencial mejorar el acceso "
+            "a los servicios de salud mental mediante campañas institucionales que reduzcan el estigma, amplíen la "
+            "información disponible y faciliten rutas ágiles hacia la atención psicológica o psiquiátrica. "
+            "Estas iniciativas deben complementarse con una revisión de las cargas académicas y con la incorporación "
+            "de talleres de manejo del estrés y habilidades socioemocionales en momentos críticos del semestre, "
+            "favoreciendo el equilibrio entre rendimiento y bienestar. Asimismo, la capacitación docente en señales "
+            "de alerta y derivación adecuada permitirá una respuesta más rápida y efectiva ante situaciones emergentes. "
+            "Finalmente, establecer un sistema de seguimiento y evaluación de los casos y de las intervenciones "
+            "posibilitará medir su impacto sobre la permanencia estudiantil y el desempeño académico, consolidando "
+            "un entorno universitario más saludable y preventivo."
+        ),
+        html.Br(),
+        html.H2("Conclusiones", style={"fontWeight": "bold"}),
+        html.P(
+            "El análisis realizado permite comprender que la salud mental de los estudiantes universitarios es un aspecto "
+            "profundamente ligado a su experiencia académica y personal. Los resultados evidencian una presencia "
+            "significativa de síntomas como depresión, ansiedad y ataques de pánico, así como relaciones importantes entre "
+            "estos trastornos y variables como el programa de estudio o el año académico, lo que sugiere que determinadas "
+            "etapas y exigencias aumentan la vulnerabilidad emocional. Adicionalmente, se identifica una brecha "
+            "preocupante entre la aparición de síntomas y la búsqueda de apoyo profesional, lo cual señala la existencia "
+            "de barreras que limitan el acceso oportuno a servicios de salud mental. En conjunto, estos hallazgos resaltan "
+            "la necesidad de que las instituciones educativas reconozcan la salud mental como un elemento central del "
+            "bienestar y rendimiento estudiantil, promoviendo acciones preventivas, acompañamiento oportuno y condiciones "
+            "académicas que favorezcan la estabilidad emocional. De esta manera, se contribuye no solo a mejorar el "
+            "desempeño académico, sino también a fomentar una formación integral que responda a las necesidades reales "
+            "de los estudiantes y fortalezca su permanencia y desarrollo personal."
+            )
+        ]
+
+
+# ---------------- Pestaña 8. Exploración de casos ----------------
+def pestana_exploracion(columnas_casos):
+    return [
+        html.Br(),
+
+        html.H2("Consulta de casos individuales", style={"fontWeight": "bold"}),
+        html.P(
+            "Combine los filtros generales con los síntomas, la búsqueda de tratamiento y el rango de edad "
+            "para revisar las respuestas que cumplen todas las condiciones. Dentro de cada grupo se acepta "
+            "cualquiera de las opciones marcadas."
+        ),
+        html.Div([
+            html.Div([html.Label("Síntomas presentes", style={"fontWeight": "bold"}),
+                      dcc.Checklist(id="filtro-sintomas", options=OPCIONES_SINTOMAS, value=[], inline=True)],
+                     style={"flex": "1", "margin": "0 8px"}),
+            html.Div([html.Label("Buscó tratamiento", style={"fontWeight": "bold"}),
+                      dcc.Checklist(id="filtro-tratamiento", options=[{"label": "Sí", "value": 1},
+                                                                      {"label": "No", "value": 0}],
+                                    value=[], inline=True)],
+                     style={"flex": "1", "margin": "0 8px"}),
+            html.Div([html.Label("Rango de edad", style={"fontWeight": "bold"}),
+                      dcc.Checklist(id="filtro-edad", options=[r[0] for r in RANGOS_EDAD], value=[], inline=True)],
+                     style={"flex": "1", "margin": "0 8px"}),
+        ], style={"display": "flex", "flexWrap": "wrap"}),
+
+        html.P(id="conteo-casos", style={"fontStyle": "italic"}),
+        dash_table.DataTable(
+            id="tabla-casos",
+            columns=[{"name": c, "id": c} for c in columnas_casos],
+            page_current=0,
+            page_size=20,
+            page_action="custom",
+            style_table={"overflowX": "auto"},
+        ),
+
+        html.Br(),
+    ]
+
+
+# %%
+# Registro de pestañas: (valor, etiqueta, función que arma el contenido)
+PESTANAS = [
+    ("contexto", "1. Contexto", pestana_contexto),
+    ("academicos", "2. Factores académicos", pestana_academicos),
+    ("personales", "3. Factores personales", pestana_personales),
+    ("ayuda", "4. Acceso a ayuda profesional", pestana_ayuda),
+    ("insight", "5. Insight principal", pestana_insight),
+    ("limitaciones", "6. Limitaciones del análisis", pestana_limitaciones),
+    ("conclusiones", "7. Conclusiones y recomendaciones", pestana_conclusiones),
+    ("exploracion", "8. Exploración de casos", pestana_exploracion),
+]
+
+# Gráficos de cada pestaña que se actualizan con los filtros
+FIGURAS_POR_PESTANA = {
+    "contexto": ["fig_resumen_sintomas", "fig_dep", "fig_ans", "fig_panic"],
+    "academicos": ["fig_programa_dep", "fig_cgpa_dep", "fig_anio_symptoms"],
+    "personales": ["fig_genero_panic"],
+    "ayuda": ["fig_insight"],
+    "insight": ["fig_corr", "fig_asociacion"],
+}
+
+# Pestañas cuyo callback de filtros es caro (intervalos bootstrap, correlación
+# y asociaciones del subconjunto): con TRABAJOS_FONDO=1 corren en segundo plano
+PESTANAS_PESADAS = {"academicos", "personales", "insight"}
+
+
+class CachePestanas:
+    """Contenido de cada pestaña armado una sola vez por proceso.
+
+    `constructores` asocia el valor de cada pestaña con una función sin
+    argumentos que devuelve sus componentes. Se guarda la versión ya
+    serializada (dicts y listas simples) para que Dash no tenga que volver a
+    codificar las figuras de plotly en cada visita. Con `precargar=True`,
+    al servir una pestaña se arma la siguiente en un hilo aparte. `al_armar`
+    se llama sin argumentos cada vez que se guarda una pestaña nueva.
+    """
+
+    def __init__(self, constructores, precargar=False, al_armar=None):
+        self.constructores = constructores
+        self.orden = list(constructores)
+        self.precargar = precargar
+        self.al_armar = al_armar
+        self.contenido = {}
+        self.bytes = {}
+        self.lock = threading.Lock()
+
+    def obtener(self, valor):
+        contenido = self._armar(valor)
+        if self.precargar:
+            i = self.orden.index(valor)
+            if i + 1 < len(self.orden) and self.orden[i + 1] not in self.contenido:
+                threading.Thread(target=self._armar, args=(self.orden[i + 1],), daemon=True).start()
+        return contenido
+
+    def _armar(self, valor):
+        contenido = self.contenido.get(valor)
+        if contenido is None:
+            nueva = False
+            with self.lock:
+                contenido = self.contenido.get(valor)
+                if contenido is None:
+                    cuerpo = serializar(self.constructores[valor]())
+                    contenido = json.loads(cuerpo)
+                    self.bytes[valor] = len(cuerpo)
+                    self.contenido[valor] = contenido
+                    nueva = True
+            # Fuera del lock: el aviso puede tomar el del LRU de cohortes
+            if nueva and self.al_armar is not None:
+                self.al_armar()
+        return contenido
+
+    def tamano(self):
+        """Bytes del JSON de las pestañas ya armadas (estimación de su memoria)."""
+        return sum(list(self.bytes.values()))
+
+    def invalidar(self):
+        with self.lock:
+            self.contenido.clear()
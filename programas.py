@@ -0,0 +1,98 @@
+# 5.1 Normalización del programa académico por valores únicos
+# En lugar de limpiar el texto fila por fila, se factoriza la columna, se
+# resuelve cada escritura distinta una sola vez contra un índice de alias
+# (coincidencia exacta → prefijo → distancia de edición) y el resultado se
+# reparte de vuelta por código. Lo que no se puede resolver se conserva en
+# minúsculas (como antes) y se cuenta para el reporte de no resueltos.
+import difflib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Alias adicionales a course_map para escrituras vistas en las encuestas
+ALIAS_EXTRA = {
+    "it": "Information Technology",
+    "law": "Law",
+    "laws": "Law",
+}
+
+# Largo mínimo para aceptar una coincidencia por prefijo ("engin" → engineering)
+MIN_PREFIJO = 4
+
+# Similitud mínima (difflib, 0 a 1) para aceptar una corrección por edición
+MIN_SIMILITUD = 0.85
+
+
+def construir_indice(course_map):
+    """Índice alias → nombre canónico, incluyendo cada nombre canónico en
+    minúsculas como alias de sí mismo."""
+    indice = {k.strip(): v for k, v in course_map.items()}
+    indice.update(ALIAS_EXTRA)
+    for canonico in set(indice.values()):
+        indice.setdefault(canonico.lower(), canonico)
+    return indice
+
+
+def _resolvedor(indice):
+    claves = sorted(indice)
+
+    @lru_cache(maxsize=None)
+    def resolver(valor):
+        """Devuelve (programa, resuelto) para una escritura ya en minúsculas."""
+        if valor in indice:
+            return indice[valor], True
+
+        if len(valor) >= MIN_PREFIJO:
+            destinos = {indice[k] for k in claves if k.startswith(valor)}
+            if len(destinos) == 1:
+                return destinos.pop(), True
+
+        parecidos = difflib.get_close_matches(valor, claves, n=1, cutoff=MIN_SIMILITUD)
+        if parecidos:
+            return indice[parecidos[0]], True
+
+        return valor, False
+
+    return resolver
+
+
+_resolvedores = {}
+
+
+def normalizar_programas(serie, course_map, no_resueltos=None):
+    """Normaliza la columna de programa académico resolviendo solo los valores
+    distintos. `no_resueltos` (Counter opcional) acumula las escrituras que no
+    se pudieron resolver, con su número de filas."""
+    # Por contenido (no por id): un dict modificado o uno nuevo que reutiliza
+    # la dirección de otro ya liberado no recibe un resolvedor viejo
+    clave = frozenset(course_map.items())
+    if clave not in _resolvedores:
+        _resolvedores[clave] = _resolvedor(construir_indice(course_map))
+    resolver = _resolvedores[clave]
+
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    limpios = [str(u).strip().lower() for u in unicos]
+    resultado = [resolver(u) for u in limpios]
+
+    programas = np.array([r[0] for r in resultado], dtype=object)
+    if no_resueltos is not None:
+        frecuencias = np.bincount(codigos, minlength=len(unicos))
+        for valor, (_, ok), n in zip(limpios, resultado, frecuencias):
+            if not ok:
+                no_resueltos[valor] += int(n)
+
+    return pd.Series(programas[codigos], index=serie.index, name=serie.name)
+
+
+def escribir_reporte_no_resueltos(no_resueltos, destino):
+    """Guarda en CSV las escrituras no resueltas, de la más a la menos frecuente."""
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    reporte = pd.DataFrame(
+        Counter(no_resueltos).most_common(), columns=["valor", "filas"]
+    )
+    reporte.to_csv(destino, index=False)
+    return reporte
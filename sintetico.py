@@ -0,0 +1,225 @@
+# Generador sintético de la encuesta para pruebas de escala y de carga
+# Produce archivos de cualquier tamaño con los mismos encabezados y escrituras
+# que data/Student_Mental_health.csv, para que el pipeline de limpieza (y sus
+# problemas: alias de programas, "year 1" / "Year 1", CGPA con espacio final,
+# fechas en dos formatos) se ejerciten igual que con los datos reales.
+#
+# Modelo: cada fila parte de una fila real elegida al azar (bootstrap), lo que
+# conserva las correlaciones entre género, edad, programa, año, CGPA, estado
+# civil, síntomas y tratamiento. Después, cada columna se reemplaza con
+# probabilidad RUIDO por un valor de su distribución marginal (las marginales
+# no cambian y aparecen combinaciones nuevas) y las escrituras de programa y
+# año reciben variantes de mayúsculas y espacios con probabilidad VARIANTES.
+#
+# Todo es vectorizado por bloques de filas sobre códigos enteros y se escribe
+# con pyarrow, así la memoria queda acotada por `bloque` y 50M filas toman
+# unos pocos minutos.
+#
+# Uso:  python sintetico.py 50000000 data/sintetico-50M.csv [--semilla 0]
+#       python sintetico.py 1000000 data/sintetico.parquet
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+RUTA_REFERENCIA = Path(__file__).resolve().parent / "data" / "Student_Mental_health.csv"
+
+COLUMNA_FECHA = "Timestamp"
+COLUMNA_EDAD = "Age"
+# Columnas cuya escritura se altera (mayúsculas, espacio final)
+COLUMNAS_CON_VARIANTES = ["What is your course?", "Your current year of Study"]
+
+RUIDO = 0.05
+VARIANTES = 0.02
+
+# Fechas: desde el inicio de la encuesta real, repartidas en DIAS días
+INICIO = pd.Timestamp("2020-07-08")
+DIAS = 365
+
+BLOQUE = 1_000_000
+FORMATOS = {".csv": "csv", ".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+
+def _variantes(valor):
+    """Escrituras alternativas de un valor como las que aparecen en la encuesta."""
+    return [valor, valor.lower(), valor.upper(), valor.title(), valor.strip() + " "]
+
+
+class ModeloEncuesta:
+    """Distribución empírica de la encuesta codificada como enteros.
+
+    `codigos[col]` tiene el código de cada fila real en `diccionarios[col]`
+    (con la edad como entero y -1 para nulo) y `marginales[col]` la
+    frecuencia de cada código.
+    """
+
+    def __init__(self, base, ruido=RUIDO, variantes=VARIANTES):
+        self.columnas = list(base.columns)
+        self.n_base = len(base)
+        self.ruido = ruido
+        self.variantes = variantes
+
+        self.codigos, self.diccionarios, self.marginales, self.variantes_de = {}, {}, {}, {}
+        for col in self.columnas:
+            if col == COLUMNA_FECHA:
+                continue
+            codigos, valores = pd.factorize(base[col])
+            if col == COLUMNA_EDAD:
+                valores = valores.astype(np.int64)
+            elif col in COLUMNAS_CON_VARIANTES:
+                # Cada escritura se expande a sus variantes (código real * k + variante)
+                # y `variantes_de[col]` lleva ese índice al valor único en el diccionario
+                expandidos = [v for valor in valores for v in _variantes(valor)]
+                self.variantes_de[col], valores = pd.factorize(pd.Series(expandidos))
+                codigos = np.where(codigos >= 0, codigos * len(_variantes("")), -1)
+            self.codigos[col] = codigos
+            self.diccionarios[col] = pa.array(list(valores))
+            self.marginales[col] = codigos
+
+        # Proporción de fechas con segundos ("13/07/2020 21:22:56" frente a "8/7/2020 12:02")
+        self.p_segundos = float(base[COLUMNA_FECHA].str.count(":").eq(2).mean())
+
+        # Sin comas ni comillas en los valores: el CSV se puede escribir sin comillas
+        texto = [v for d in self.diccionarios.values() if pa.types.is_string(d.type) for v in d.to_pylist()]
+        self.sin_comillas = not any(c in v for v in texto for c in ',"\n')
+        self._tablas_fecha = None
+
+    @classmethod
+    def desde_csv(cls, path=RUTA_REFERENCIA, **kwargs):
+        return cls(pd.read_csv(path), **kwargs)
+
+    def _fechas(self, n, rng, inicio, dias):
+        """Marcas de tiempo en los dos formatos de la encuesta (día primero).
+        Se arman con tablas de textos por día y por segundo del día, sin
+        formatear fecha por fecha."""
+        if self._tablas_fecha is None or self._tablas_fecha[0] != (inicio, dias):
+            fechas = pd.date_range(inicio, periods=dias, freq="D")
+            segundos = np.arange(86_400)
+            hh, mm, ss = segundos // 3600, segundos // 60 % 60, segundos % 60
+            self._tablas_fecha = ((inicio, dias), {
+                "dia_corto": pa.array([f"{f.day}/{f.month}/{f.year} " for f in fechas]),
+                "dia_largo": pa.array(fechas.strftime("%d/%m/%Y ").tolist()),
+                "hora_corta": pa.array([f"{h:02d}:{m:02d}" for h, m in zip(hh, mm)]),
+                "hora_larga": pa.array([f"{h:02d}:{m:02d}:{s:02d}" for h, m, s in zip(hh, mm, ss)]),
+            })
+        t = self._tablas_fecha[1]
+
+        dia = pa.array(rng.integers(0, dias, n))
+        segundo = pa.array(rng.integers(0, 86_400, n))
+        corta = pc.binary_join_element_wise(pc.take(t["dia_corto"], dia), pc.take(t["hora_corta"], segundo), "")
+        larga = pc.binary_join_element_wise(pc.take(t["dia_largo"], dia), pc.take(t["hora_larga"], segundo), "")
+        return pc.if_else(pa.array(rng.random(n) < self.p_segundos), larga, corta)
+
+    def muestra(self, n, rng, inicio=INICIO, dias=DIAS):
+        """Tabla de pyarrow con `n` filas nuevas."""
+        filas = rng.integers(0, self.n_base, n)
+        columnas = {}
+        for col in self.columnas:
+            if col == COLUMNA_FECHA:
+                columnas[col] = self._fechas(n, rng, inicio, dias)
+                continue
+
+            codigos = self.codigos[col][filas]
+            reemplazar = rng.random(n) < self.ruido
+            codigos[reemplazar] = self.marginales[col][rng.integers(0, self.n_base, reemplazar.sum())]
+            if col in COLUMNAS_CON_VARIANTES:
+                k = len(_variantes(""))
+                variante = np.where(rng.random(n) < self.variantes, rng.integers(1, k, n), 0)
+                validos = codigos >= 0
+                codigos = np.where(validos, self.variantes_de[col][np.where(validos, codigos + variante, 0)], -1)
+
+            nulos = codigos < 0
+            indices = pa.array(np.where(nulos, 0, codigos).astype(np.int32), mask=nulos)
+            if col == COLUMNA_EDAD:
+                columnas[col] = pc.take(self.diccionarios[col], indices)
+            else:
+                columnas[col] = pa.DictionaryArray.from_arrays(indices, self.diccionarios[col])
+        return pa.table(columnas)
+
+
+# %%
+# Escritura por bloques
+class _Escritor:
+    def __init__(self, destino, formato, sin_comillas):
+        self.destino, self.formato = destino, formato
+        self.opciones_csv = pa_csv.WriteOptions(
+            include_header=False, quoting_style="none" if sin_comillas else "needed"
+        )
+        self.archivo = None
+        self.escritor = None
+
+    def escribir(self, tabla):
+        if self.formato == "csv":
+            if self.archivo is None:
+                self.archivo = pa.OSFile(str(self.destino), "wb")
+                self.archivo.write((",".join(tabla.column_names) + "\n").encode())
+            # El CSV lleva los valores, no los diccionarios
+            tabla = pa.table({c: (col.cast(col.type.value_type) if pa.types.is_dictionary(col.type) else col)
+                              for c, col in zip(tabla.column_names, tabla.columns)})
+            pa_csv.write_csv(tabla, self.archivo, self.opciones_csv)
+        elif self.formato == "parquet":
+            import pyarrow.parquet as pq
+            if self.escritor is None:
+                self.escritor = pq.ParquetWriter(str(self.destino), tabla.schema)
+            self.escritor.write_table(tabla)
+        else:
+            if self.escritor is None:
+                self.escritor = pa.ipc.new_file(str(self.destino), tabla.schema)
+            self.escritor.write_table(tabla)
+
+    def cerrar(self):
+        for recurso in (self.escritor, self.archivo):
+            if recurso is not None:
+                recurso.close()
+
+
+def generar(destino, n, semilla=0, formato=None, bloque=BLOQUE, modelo=None,
+            inicio=INICIO, dias=DIAS, verbose=False):
+    """Escribe `n` filas sintéticas en `destino` (CSV, Parquet o Feather según
+    la extensión, o `formato`). Con la misma semilla y el mismo `bloque` el
+    archivo es idéntico byte a byte."""
+    destino = Path(destino)
+    formato = formato or FORMATOS.get(destino.suffix.lower(), "csv")
+    modelo = modelo or ModeloEncuesta.desde_csv()
+    rng = np.random.default_rng(semilla)
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    escritor = _Escritor(destino, formato, modelo.sin_comillas)
+    t0 = time.perf_counter()
+    try:
+        for desde in range(0, n, bloque):
+            escritor.escribir(modelo.muestra(min(bloque, n - desde), rng, inicio, dias))
+            if verbose:
+                hechas = min(desde + bloque, n)
+                print(f"\r{hechas:,} / {n:,} filas ({hechas / (time.perf_counter() - t0):,.0f} filas/s)",
+                      end="", flush=True)
+    finally:
+        escritor.cerrar()
+    if verbose:
+        print(f"\n{destino} ({destino.stat().st_size / 2**20:,.1f} MiB)")
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera una encuesta sintética de N filas")
+    parser.add_argument("filas", type=int)
+    parser.add_argument("destino", type=Path, help=".csv, .parquet o .feather")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--bloque", type=int, default=BLOQUE)
+    parser.add_argument("--ruido", type=float, default=RUIDO)
+    parser.add_argument("--variantes", type=float, default=VARIANTES)
+    parser.add_argument("--dias", type=int, default=DIAS)
+    args = parser.parse_args()
+
+    modelo = ModeloEncuesta.desde_csv(ruido=args.ruido, variantes=args.variantes)
+    generar(args.destino, args.filas, args.semilla, bloque=args.bloque, modelo=modelo,
+            dias=args.dias, verbose=True)
+
+
+if __name__ == "__main__":
+    main()
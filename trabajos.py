@@ -0,0 +1,343 @@
+# Callbacks pesados en segundo plano (background callbacks de Dash)
+# Los callbacks que recalculan correlaciones, asociaciones o intervalos
+# bootstrap sobre un subconjunto filtrado pueden tardar; si corren dentro del
+# hilo de gunicorn ocupan el worker y las peticiones baratas (layout, 304,
+# resumen de filtros) esperan detrás. GestorTrabajos es un manager de
+# background callbacks de Dash con una cola en SQLite y procesos propios:
+#
+#   - Cola y resultados en un archivo SQLite (modo WAL), compartido por todos
+#     los workers de gunicorn: la petición que sondea un trabajo puede caer en
+#     otro worker que el que lo lanzó. Los procesos de trabajo toman de la
+#     cola el trabajo pendiente más antiguo.
+#   - Deduplicación: la clave de un trabajo es el hash que arma Dash con la
+#     función y sus argumentos. Si llega una petición idéntica mientras el
+#     trabajo está pendiente o corriendo, se suma como suscriptora en vez de
+#     lanzar otro; si ya terminó hace menos de `retencion` segundos recibe el
+#     mismo resultado.
+#   - Progreso: el callback recibe set_progress (Dash lo muestra en el
+#     navegador) y cada llamada queda en SQLite.
+#   - Cancelación: cuando el usuario cambia de pestaña Dash pide terminar el
+#     trabajo; se descuenta su suscripción y, si no queda nadie esperando, se
+#     marca cancelado. Un trabajo en cola ya no empieza y uno en curso se
+#     interrumpe en su próximo set_progress (cancelación cooperativa: los
+#     procesos de trabajo no se matan, se reutilizan).
+#
+# Los procesos de trabajo se crean con fork en `iniciar()`, así heredan las
+# funciones de los callbacks y los datos ya cargados sin pickle. Debe llamarse
+# con todos los callbacks registrados y antes de que haya otros hilos (un fork
+# con hilos corriendo puede heredar un lock tomado y quedar colgado). Importar
+# app.py no los crea: con gunicorn lo hace el hook when_ready en el maestro
+# (gunicorn.conf.py), así todos los workers comparten los mismos procesos de
+# trabajo, y on_exit los detiene; `python app.py` los crea antes de app.run y
+# los detiene al salir. Sin procesos de trabajo los trabajos quedan en cola.
+# Solo funciona en sistemas con fork (Linux, que es donde corre).
+#
+# Para correr el callback como lo haría Dash se usan piezas internas de dash
+# (context_value, AttributeDict, ProxySetProps) que pueden cambiar entre
+# versiones menores: requirements.txt fija la versión de dash con la que se probó.
+import atexit
+import os
+import pickle
+import signal
+import sqlite3
+import time
+import traceback
+from contextlib import closing
+from contextvars import copy_context
+from pathlib import Path
+
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+from dash.background_callback._proxy_set_props import ProxySetProps
+from dash.background_callback.managers import BaseBackgroundCallbackManager
+from dash.exceptions import PreventUpdate
+
+ACTIVOS = ("pendiente", "corriendo")
+TERMINADOS = ("listo", "cancelado", "fallido")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    clave TEXT PRIMARY KEY,
+    estado TEXT NOT NULL,
+    intento INTEGER NOT NULL,
+    suscriptores INTEGER NOT NULL,
+    pid INTEGER,
+    funcion TEXT,
+    args BLOB,
+    contexto BLOB,
+    creado REAL NOT NULL,
+    terminado REAL,
+    progreso BLOB,
+    props BLOB,
+    resultado BLOB
+);
+CREATE INDEX IF NOT EXISTS trabajos_cola ON trabajos (estado, creado);
+CREATE TABLE IF NOT EXISTS secretos (clave TEXT PRIMARY KEY, valor BLOB NOT NULL);
+"""
+
+# Funciones de los callbacks registrados: {clave de Dash: (fn, usa progreso)}.
+# Los procesos de trabajo las heredan por fork; en la cola solo va la clave.
+FUNCIONES = {}
+
+# Segundos entre consultas a la cola de un proceso de trabajo desocupado
+ESPERA = 0.02
+
+
+class Cancelado(Exception):
+    """El trabajo se canceló mientras corría (se lanza desde set_progress)."""
+
+
+def conectar(ruta):
+    conexion = sqlite3.connect(ruta, timeout=30, isolation_level=None)
+    conexion.execute("PRAGMA busy_timeout = 30000")
+    return conexion
+
+
+# %%
+# Procesos de trabajo
+def _tomar(db):
+    """Marca como corriendo el trabajo pendiente más antiguo y lo devuelve
+    (None si la cola está vacía). Los cancelados ya no están pendientes."""
+    db.execute("BEGIN IMMEDIATE")
+    fila = db.execute(
+        "SELECT clave, intento, funcion, args, contexto FROM trabajos "
+        "WHERE estado = 'pendiente' ORDER BY creado LIMIT 1"
+    ).fetchone()
+    if fila is not None:
+        db.execute("UPDATE trabajos SET estado = 'corriendo', pid = ? WHERE clave = ?", (os.getpid(), fila[0]))
+    db.execute("COMMIT")
+    return fila
+
+
+def _trabajador(ruta, pid_padre):
+    """Ciclo de un proceso de trabajo; termina si muere el proceso que lo creó."""
+    with closing(conectar(ruta)) as db:
+        while os.getppid() == pid_padre:
+            fila = _tomar(db)
+            if fila is None:
+                time.sleep(ESPERA)
+                continue
+            clave, intento, funcion, args, contexto = fila
+            _ejecutar(db, funcion, clave, intento, pickle.loads(args), pickle.loads(contexto))
+
+
+def _ejecutar(db, clave_funcion, clave, intento, args, contexto):
+    """Corre un callback y deja el resultado (o el error) en SQLite."""
+    def vigente():
+        fila = db.execute("SELECT estado, intento FROM trabajos WHERE clave = ?", (clave,)).fetchone()
+        return fila is not None and fila == ("corriendo", intento)
+
+    def guardar(columna, valor):
+        db.execute(f"UPDATE trabajos SET {columna} = ? WHERE clave = ? AND intento = ?",
+                   (pickle.dumps(valor), clave, intento))
+
+    def set_progress(valor):
+        if not vigente():
+            raise Cancelado
+        guardar("progreso", list(valor) if isinstance(valor, (list, tuple)) else [valor])
+
+    def set_props(id_componente, props):
+        guardar("props", {id_componente: props})
+
+    c = AttributeDict(**contexto)
+    c.ignore_register_page = False
+    c.updated_props = ProxySetProps(set_props)
+
+    def correr():
+        # Falla si el callback se registró después de iniciar()
+        fn, con_progreso = FUNCIONES[clave_funcion]
+        previos = [set_progress] if con_progreso else []
+        context_value.set(c)
+        if isinstance(args, dict):
+            return fn(*previos, **args)
+        if isinstance(args, (list, tuple)):
+            return fn(*previos, *args)
+        return fn(*previos, args)
+
+    estado = "listo"
+    try:
+        resultado = copy_context().run(correr)
+    except Cancelado:
+        return
+    except PreventUpdate:
+        resultado = {"_dash_no_update": "_dash_no_update"}
+    except Exception as exc:  # el error se muestra en el navegador, como en Dash
+        estado = "fallido"
+        resultado = {"background_callback_error": {"msg": str(exc), "tb": traceback.format_exc()}}
+    db.execute(
+        "UPDATE trabajos SET estado = ?, resultado = ?, terminado = ? "
+        "WHERE clave = ? AND intento = ? AND estado = 'corriendo'",
+        (estado, pickle.dumps(resultado), time.time(), clave, intento),
+    )
+
+
+class _Tarea:
+    """Lo que Dash guarda en func_registry: solo la clave de la función."""
+
+    def __init__(self, clave_funcion):
+        self.clave_funcion = clave_funcion
+
+
+# %%
+# Manager de Dash
+class GestorTrabajos(BaseBackgroundCallbackManager):
+    """Manager de background callbacks con cola SQLite y procesos de trabajo.
+
+    `ruta` es el archivo SQLite, `procesos` cuántos procesos de trabajo crea
+    `iniciar()` y `retencion` cuántos segundos se guarda un resultado para
+    entregarlo a peticiones idénticas.
+    """
+
+    def __init__(self, ruta, procesos=1, retencion=300, cache_by=None):
+        self.ruta = str(ruta)
+        self.procesos = procesos
+        self.retencion = retencion
+        self.pids = []
+        self.padre = None
+        Path(self.ruta).parent.mkdir(parents=True, exist_ok=True)
+        with closing(conectar(self.ruta)) as db:
+            db.execute("PRAGMA journal_mode = WAL")
+            db.executescript(ESQUEMA)
+            # Lo que quedó en curso de una ejecución anterior ya no tiene proceso
+            db.execute("DELETE FROM trabajos WHERE estado IN (?, ?)", ACTIVOS)
+        super().__init__(cache_by)
+
+    def iniciar(self):
+        """Crea los procesos de trabajo (ver arriba cuándo llamarlo); no hace
+        nada si ya están creados."""
+        if self.pids:
+            return
+        self.padre = os.getpid()
+        for _ in range(self.procesos):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    # El maestro de gunicorn atrapa estas señales para sí: el
+                    # proceso de trabajo vuelve a terminar con ellas
+                    for senal in (signal.SIGTERM, signal.SIGINT, signal.SIGQUIT, signal.SIGHUP):
+                        signal.signal(senal, signal.SIG_DFL)
+                    _trabajador(self.ruta, self.padre)
+                finally:
+                    os._exit(0)
+            self.pids.append(pid)
+        atexit.register(self.detener)
+
+    def detener(self):
+        """Termina los procesos de trabajo y espera su salida. Solo actúa en
+        el proceso que los creó: los workers de gunicorn heredan la lista."""
+        if os.getpid() != self.padre:
+            return
+        for pid in self.pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in self.pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:  # ya lo recogió el maestro de gunicorn
+                pass
+        self.pids = []
+
+    def make_job_fn(self, fn, progress, key=None):
+        FUNCIONES[key] = (fn, bool(progress))
+        return _Tarea(key)
+
+    def call_job_fn(self, key, job_fn, args, context):
+        ahora = time.time()
+        with closing(conectar(self.ruta)) as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM trabajos WHERE estado IN (?, ?, ?) AND terminado < ?",
+                       (*TERMINADOS, ahora - self.retencion))
+            fila = db.execute("SELECT estado, intento FROM trabajos WHERE clave = ?", (key,)).fetchone()
+            if fila is not None and fila[0] in ACTIVOS + ("listo",):
+                # Mismo trabajo en curso (o recién terminado): se comparte
+                db.execute("UPDATE trabajos SET suscriptores = suscriptores + 1 WHERE clave = ?", (key,))
+                db.execute("COMMIT")
+                return key
+            # Nuevo, o relanzado tras cancelarse o fallar: el intento distingue
+            # al proceso viejo (que puede seguir corriendo) del nuevo
+            intento = fila[1] + 1 if fila is not None else 0
+            db.execute(
+                "INSERT OR REPLACE INTO trabajos (clave, estado, intento, suscriptores, funcion, args, contexto, creado) "
+                "VALUES (?, 'pendiente', ?, 1, ?, ?, ?, ?)",
+                (key, intento, job_fn.clave_funcion, pickle.dumps(args), pickle.dumps(dict(context)), ahora),
+            )
+            db.execute("COMMIT")
+        return key
+
+    def terminate_job(self, job):
+        if job is None:
+            return
+        with closing(conectar(self.ruta)) as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("UPDATE trabajos SET suscriptores = suscriptores - 1 WHERE clave = ? AND estado IN (?, ?)",
+                       (job, *ACTIVOS))
+            # Sin nadie esperando el resultado, se cancela
+            db.execute("UPDATE trabajos SET estado = 'cancelado', terminado = ? "
+                       "WHERE clave = ? AND estado IN (?, ?) AND suscriptores <= 0",
+                       (time.time(), job, *ACTIVOS))
+            db.execute("COMMIT")
+
+    def terminate_unhealthy_job(self, job):
+        return not self.job_running(job)
+
+    def job_running(self, job):
+        with closing(conectar(self.ruta)) as db:
+            fila = db.execute("SELECT estado, pid FROM trabajos WHERE clave = ?", (job,)).fetchone()
+            if fila is None or fila[0] not in ACTIVOS:
+                return False
+            if fila[0] == "corriendo" and not _proceso_vivo(fila[1]):
+                # El proceso de trabajo murió (p. ej. sin memoria) a mitad del trabajo
+                error = {"background_callback_error": {"msg": "El proceso del trabajo terminó inesperadamente",
+                                                       "tb": ""}}
+                db.execute("UPDATE trabajos SET estado = 'fallido', resultado = ?, terminado = ? "
+                           "WHERE clave = ? AND estado = 'corriendo'",
+                           (pickle.dumps(error), time.time(), job))
+                return False
+            return True
+
+    def _leer(self, key, columna):
+        with closing(conectar(self.ruta)) as db:
+            fila = db.execute(f"SELECT {columna} FROM trabajos WHERE clave = ?", (key,)).fetchone()
+        return None if fila is None or fila[0] is None else pickle.loads(fila[0])
+
+    def get_progress(self, key):
+        return self._leer(key, "progreso")
+
+    def result_ready(self, key):
+        with closing(conectar(self.ruta)) as db:
+            fila = db.execute("SELECT estado FROM trabajos WHERE clave = ?", (key,)).fetchone()
+        return fila is not None and fila[0] in ("listo", "fallido")
+
+    def get_result(self, key, job):
+        # El resultado se conserva (no se borra al leerlo) porque otras
+        # peticiones idénticas pueden estar esperándolo; caduca con `retencion`
+        if not self.result_ready(key):
+            return self.UNDEFINED
+        return self._leer(key, "resultado")
+
+    def get_updated_props(self, key):
+        return self._leer(key, "props") or {}
+
+    def get_or_create_signing_secret(self, generate):
+        with closing(conectar(self.ruta)) as db:
+            db.execute("INSERT OR IGNORE INTO secretos VALUES (?, ?)", (self.SIGNING_SECRET_KEY, generate()))
+            return db.execute("SELECT valor FROM secretos WHERE clave = ?", (self.SIGNING_SECRET_KEY,)).fetchone()[0]
+
+    def estadisticas(self):
+        """{estado: número de trabajos} en la base (para /metrics)."""
+        with closing(conectar(self.ruta)) as db:
+            return dict(db.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado").fetchall())
+
+
+def _proceso_vivo(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True